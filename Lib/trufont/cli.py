@@ -0,0 +1,167 @@
+"""
+Compilation of UFOs to binary fonts from the command line.
+
+Fonts are loaded through TFont, without an application or windows and with
+notifications turned off, so this runs on machines without a display. Each
+UFO is compiled in a worker process of its own.
+
+    trufont-compile -f otf,ttf -o build/ Regular.ufo Bold.ufo
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from trufont import __version__, representationFactories
+from trufont.objects.defcon import NullNotifications, TFont
+from trufont.objects.fontExporter import EXPORT_FORMATS, ExportSnapshot
+from trufont.tools.artifactCache import ArtifactCache, fontKey
+import argparse
+import os
+import sys
+import time
+
+
+def compileFont(path, formats, directory, useProductionNames=False,
+                optimizeCff=False, cacheDirectory=None, cacheSize=0,
+                workerCount=1):
+    """
+    Compiles the UFO at *path* to each of *formats* in *directory*, the
+    files being named after the UFO. Returns a {format: (path, seconds,
+    error)} dict, error being a message or None. The curves of TrueType
+    glyphs are converted by *workerCount* processes.
+
+    If *cacheDirectory* is given, binary fonts compiled before from the
+    same content are copied from there, and new ones are stored there.
+    """
+    representationFactories.registerAllFactories()
+    # the fonts are spread over processes already
+    font = TFont(path, glyphLoaderWorkerCount=1,
+                 notificationBackend=NullNotifications())
+    for format in formats:
+        font._checkExportable(format)
+    fileName = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+    artifactCache = None
+    if cacheDirectory:
+        artifactCache = ArtifactCache(cacheDirectory, cacheSize)
+    results = {}
+    keys = {}
+    formatsToCompile = []
+    for format in formats:
+        if artifactCache is not None:
+            start = time.perf_counter()
+            key = keys[format] = fontKey(
+                font, format=format, useProductionNames=useProductionNames,
+                optimizeCff=optimizeCff)
+            outputPath = os.path.join(
+                directory, "{}.{}".format(fileName, format))
+            if artifactCache.copyTo(key, outputPath):
+                results[format] = (
+                    outputPath, time.perf_counter() - start, None)
+                continue
+        formatsToCompile.append(format)
+    if formatsToCompile:
+        snapshot = ExportSnapshot(
+            font, useProductionNames, optimizeCff, workerCount=workerCount)
+        results.update(
+            snapshot.exportFormats(formatsToCompile, directory, fileName))
+    if artifactCache is not None:
+        for format in formatsToCompile:
+            outputPath, _, error = results[format]
+            if error is None:
+                artifactCache.put(keys[format], outputPath)
+    return results
+
+
+def _compileFont(path, formats, directory, options):
+    try:
+        return compileFont(path, formats, directory, **options)
+    except Exception as e:
+        error = "{}: {}".format(e.__class__.__name__, e)
+        return {format: (None, 0, error) for format in formats}
+
+
+def _parseFormats(text):
+    formats = [format.strip().lower() for format in text.split(",")]
+    for format in formats:
+        if format not in EXPORT_FORMATS:
+            raise argparse.ArgumentTypeError(
+                "unknown format: {} (choose from {})".format(
+                    format, ", ".join(EXPORT_FORMATS)))
+    return formats
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(
+        prog="trufont-compile",
+        description="Compiles UFO fonts to binary fonts.")
+    parser.add_argument(
+        "ufos", metavar="UFO", nargs="+", help="the UFO fonts to compile")
+    parser.add_argument(
+        "-f", "--formats", type=_parseFormats, default=["otf"],
+        help="comma-separated formats to compile to, among {} "
+             "(default: otf)".format(", ".join(EXPORT_FORMATS)))
+    parser.add_argument(
+        "-o", "--output-dir",
+        help="where to write the binary fonts (default: next to each UFO)")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1,
+        help="how many fonts to compile at once (default: number of CPUs)")
+    parser.add_argument(
+        "--production-names", action="store_true",
+        help="rename glyphs to their production names")
+    parser.add_argument(
+        "--optimize-cff", action="store_true",
+        help="subroutinize CFF outlines")
+    parser.add_argument(
+        "--cache-dir",
+        help="reuse binary fonts compiled from the same content, kept in "
+             "this directory")
+    parser.add_argument(
+        "--cache-size", type=int, default=512,
+        help="maximum size of the cache directory, in MB (default: 512)")
+    parser.add_argument(
+        "--version", action="version", version=__version__)
+    args = parser.parse_args(args)
+
+    options = dict(
+        useProductionNames=args.production_names,
+        optimizeCff=args.optimize_cff,
+        cacheDirectory=args.cache_dir,
+        cacheSize=args.cache_size * 1024 * 1024,
+    )
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+    jobs = []
+    for path in args.ufos:
+        directory = args.output_dir
+        if directory is None:
+            directory = os.path.dirname(os.path.abspath(path))
+        jobs.append((path, args.formats, directory, options))
+
+    failed = False
+
+    def report(path, results):
+        nonlocal failed
+        for format in args.formats:
+            outputPath, seconds, error = results[format]
+            if error is None:
+                outcome = outputPath
+            else:
+                outcome = "failed: {}".format(error)
+                failed = True
+            print("{} {} {:.2f}s {}".format(path, format, seconds, outcome))
+
+    jobCount = min(args.jobs, len(jobs))
+    # the jobs left over go to converting the curves of TrueType glyphs
+    options["workerCount"] = max(1, args.jobs // len(jobs))
+    if jobCount < 2:
+        for job in jobs:
+            report(job[0], _compileFont(*job))
+    else:
+        with ProcessPoolExecutor(jobCount) as executor:
+            futures = {
+                executor.submit(_compileFont, *job): job[0] for job in jobs}
+            for future in as_completed(futures):
+                report(futures[future], future.result())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
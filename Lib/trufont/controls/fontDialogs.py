@@ -2,9 +2,12 @@ from defconQt.controls.colorVignette import ColorVignette
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QTextCursor
 from PyQt5.QtWidgets import (
-    QCheckBox, QComboBox, QDialog, QDialogButtonBox, QGridLayout,
-    QGroupBox, QPlainTextEdit, QPushButton, QRadioButton, QVBoxLayout)
+    QCheckBox, QComboBox, QDialog, QDialogButtonBox, QFileDialog, QGridLayout,
+    QGroupBox, QHBoxLayout, QLineEdit, QMessageBox, QPlainTextEdit,
+    QPushButton, QRadioButton, QVBoxLayout)
 from trufont.objects import settings
+from trufont.objects.fontExporter import EXPORT_FORMATS
+from collections import OrderedDict
 
 sortItems = ["alphabetical", "category", "unicode", "script", "suffix",
              "decompositionBase", "weightedSuffix", "ligature"]
@@ -13,12 +16,13 @@ sortItems = ["alphabetical", "category", "unicode", "script", "suffix",
 class AddGlyphsDialog(QDialog):
 
     # TODO: implement Frederik's Glyph Construction Builder
-    def __init__(self, currentGlyphs=None, parent=None):
+    def __init__(self, currentGlyphNames=None, parent=None):
         super().__init__(parent)
         self.setWindowModality(Qt.WindowModal)
         self.setWindowTitle(self.tr("Add Glyphs…"))
-        self.currentGlyphs = currentGlyphs
-        self.currentGlyphNames = [glyph.name for glyph in currentGlyphs]
+        if currentGlyphNames is None:
+            currentGlyphNames = []
+        self.currentGlyphNames = currentGlyphNames
 
         layout = QGridLayout(self)
         self.markColorWidget = ColorVignette(self)
@@ -57,8 +61,8 @@ class AddGlyphsDialog(QDialog):
         self.setLayout(layout)
 
     @classmethod
-    def getNewGlyphNames(cls, parent, currentGlyphs=None):
-        dialog = cls(currentGlyphs, parent)
+    def getNewGlyphNames(cls, parent, currentGlyphNames=None):
+        dialog = cls(currentGlyphNames, parent)
         result = dialog.exec_()
         markColor = dialog.markColorWidget.color()
         if markColor is not None:
@@ -253,3 +257,104 @@ class SortDialog(QDialog):
     def customSortToggle(self):
         checkBox = self.sender()
         self.customSortGroup.setEnabled(checkBox.isChecked())
+
+
+class BatchExportDialog(QDialog):
+
+    def __init__(self, directory=None, parent=None):
+        super().__init__(parent)
+        self.setWindowModality(Qt.WindowModal)
+        self.setWindowTitle(self.tr("Export All Fonts…"))
+
+        formatsGroup = QGroupBox(self.tr("Formats"), self)
+        formatsLayout = QHBoxLayout(formatsGroup)
+        self.formatBoxes = OrderedDict()
+        for format in EXPORT_FORMATS:
+            box = QCheckBox(format.upper(), self)
+            box.setChecked(True)
+            formatsLayout.addWidget(box)
+            self.formatBoxes[format] = box
+        formatsGroup.setLayout(formatsLayout)
+
+        self.directoryEdit = QLineEdit(directory or "", self)
+        browseButton = QPushButton(self.tr("Browse…"), self)
+        browseButton.clicked.connect(self.browseDirectory)
+
+        buttonBox = QDialogButtonBox(
+            QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttonBox.accepted.connect(self.accept)
+        buttonBox.rejected.connect(self.reject)
+
+        layout = QGridLayout(self)
+        row = 0
+        layout.addWidget(formatsGroup, row, 0, 1, 2)
+        row += 1
+        layout.addWidget(self.directoryEdit, row, 0)
+        layout.addWidget(browseButton, row, 1)
+        row += 1
+        layout.addWidget(buttonBox, row, 0, 1, 2)
+        self.setLayout(layout)
+
+    @classmethod
+    def getExportOptions(cls, parent, directory=None):
+        dialog = cls(directory, parent)
+        result = dialog.exec_()
+        formats = [format for format, box in dialog.formatBoxes.items()
+                   if box.isChecked()]
+        directory = dialog.directoryEdit.text()
+        return (formats, directory, result and formats and directory)
+
+    def browseDirectory(self):
+        directory = QFileDialog.getExistingDirectory(
+            self, self.tr("Export To"), self.directoryEdit.text())
+        if directory:
+            self.directoryEdit.setText(directory)
+
+
+class PreflightDialog(QMessageBox):
+
+    def __init__(self, reports, parent=None):
+        super().__init__(parent)
+        self.setWindowModality(Qt.WindowModal)
+        self.setIcon(QMessageBox.Warning)
+        self.setWindowTitle(self.tr("Export"))
+        count = sum(len(report) for _, report in reports)
+        self.setText(self.tr(
+            "{} issues were found in the glyphs. Export anyway?").format(
+                count))
+        issuesByCheck = {}
+        for _, report in reports:
+            for check, issues in report.issuesByCheck().items():
+                issuesByCheck[check] = issuesByCheck.get(check, 0) + len(
+                    issues)
+        checkNames = dict(
+            openContour=self.tr("open contours"),
+            missingComponent=self.tr("missing component base glyphs"),
+            overlap=self.tr("overlapping contours"),
+            extremePoints=self.tr("missing extreme points"),
+        )
+        self.setInformativeText("\n".join(
+            "{}: {}".format(checkNames.get(check, check), count)
+            for check, count in sorted(issuesByCheck.items())))
+        details = []
+        for fontName, report in reports:
+            if len(reports) > 1:
+                details.append("{}:".format(fontName))
+            details.append(str(report))
+        self.setDetailedText("\n".join(details))
+        self.setStandardButtons(QMessageBox.Ok | QMessageBox.Cancel)
+        self.setDefaultButton(QMessageBox.Cancel)
+
+    @classmethod
+    def confirmExport(cls, parent, reports):
+        """
+        Asks whether to export despite the issues in *reports*, a list of
+        (fontName, PreflightReport) tuples. Returns True right away if
+        there are none.
+        """
+        reports = [(fontName, report) for fontName, report in reports
+                   if len(report)]
+        if not reports:
+            return True
+        dialog = cls(reports, parent)
+        return dialog.exec_() == QMessageBox.Ok
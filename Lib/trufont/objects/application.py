@@ -3,7 +3,8 @@ from PyQt5.Qt import PYQT_VERSION_STR, QT_VERSION_STR
 from PyQt5.QtCore import QEvent, QSize, QStandardPaths, Qt, QUrl
 from PyQt5.QtGui import QDesktopServices
 from PyQt5.QtWidgets import (
-    QAction, QApplication, QDialogButtonBox, QFileDialog, QMessageBox)
+    QAction, QApplication, QDialogButtonBox, QFileDialog, QMessageBox,
+    QPushButton)
 from trufont import __version__
 from trufont.drawingTools.selectionTool import SelectionTool
 from trufont.drawingTools.penTool import PenTool
@@ -12,11 +13,15 @@ from trufont.drawingTools.knifeTool import KnifeTool
 from trufont.windows.fontWindow import FontWindow
 from trufont.windows.inspectorWindow import InspectorWindow
 from trufont.windows.scriptingWindow import ScriptingWindow
+from trufont.controls.fontDialogs import BatchExportDialog, PreflightDialog
+from trufont.objects.batchExporter import BatchExporter
 from trufont.objects import settings
 from trufont.objects.defcon import TFont
+from trufont.objects.fontWatcher import FontWatcher
 from trufont.objects.menu import (
     Entries, MAX_RECENT_FILES, globalMenuBar, MenuBar)
 from trufont.tools import errorReports, glyphList, platformSpecific
+from trufont.tools.artifactCache import ArtifactCache
 import os
 import platform
 import subprocess
@@ -47,6 +52,9 @@ class Application(QApplication):
         self.GL2UV = None
         self.inspectorWindow = None
         self.outputWindow = None
+        self.fontWatcher = FontWatcher(self)
+        self._batchExporter = None
+        self._batchExportCancelButton = None
 
     # --------------
     # Event handling
@@ -94,8 +102,7 @@ class Application(QApplication):
                     self._launched = True
                 else:
                     notification = "applicationActivated"
-                    # XXX: do it
-                    # self.lookupExternalChanges()
+                    self.lookupExternalChanges()
                 self.postNotification(notification)
             elif applicationState == Qt.ApplicationInactive:
                 self.postNotification("applicationWillIdle")
@@ -125,16 +132,9 @@ class Application(QApplication):
                 self.GL2UV = glyphList_
 
     def lookupExternalChanges(self):
-        for font in self.allFonts():
-            if not font.path:
-                continue
-            changed = font.testForExternalChanges()
-            for attr in ("info", "kerning", "groups", "features", "lib"):
-                if changed[attr]:
-                    data = dict(font=font)
-                    self.postNotification("fontChangedExternally", data)
-                    return
-            # XXX: do more
+        # the watcher picks up changes as they happen, only flush what
+        # hasn't been looked at yet
+        self.fontWatcher.checkPendingFonts()
 
     # -----------------
     # Window management
@@ -190,6 +190,7 @@ class Application(QApplication):
         # TODO: maybe move save in there and add save all and close
         recentFilesMenu = fileMenu.fetchMenu(Entries.File_Open_Recent)
         self.updateRecentFiles(recentFilesMenu)
+        fileMenu.fetchAction(Entries.File_Export_All, self.exportAllFonts)
         fileMenu.fetchAction(Entries.File_Exit, self.exit)
 
         scriptsMenu = menuBar.fetchMenu(Entries.Scripts)
@@ -252,7 +253,7 @@ class Application(QApplication):
             if isinstance(widget, FontWindow):
                 font = widget.font_()
                 fonts.append(font)
-        return
+        return fonts
 
     def currentFont(self):
         # might be None when closing all windows with scripting window open
@@ -310,6 +311,32 @@ class Application(QApplication):
     def getScriptsDirectory(self):
         return self._getLocalDirectory("scripting/scriptsPath", "Scripts")
 
+    def getArtifactCacheDirectory(self):
+        return self._getLocalDirectory(
+            "misc/artifactCacheDirectory", "Artifacts")
+
+    def getGlyphCacheDirectory(self):
+        """
+        Returns where fonts keep their glyph cache, or None if it is turned
+        off.
+        """
+        if not settings.useGlyphCache():
+            return None
+        cacheFolder = QStandardPaths.writableLocation(
+            QStandardPaths.CacheLocation)
+        return os.path.join(cacheFolder, "Glyphs")
+
+    def artifactCache(self):
+        """
+        Returns the ArtifactCache set up in the settings, or None if it is
+        turned off.
+        """
+        size = settings.artifactCacheSize()
+        if not size:
+            return None
+        return ArtifactCache(
+            self.getArtifactCacheDirectory(), size * 1024 * 1024)
+
     # -------------
     # Drawing tools
     # -------------
@@ -410,7 +437,13 @@ class Application(QApplication):
                     widget.raise_()
                     return
         try:
-            font = TFont(path)
+            font = TFont(
+                path,
+                glyphLoaderWorkerCount=settings.glyphLoaderWorkerCount(),
+                glyphCacheDirectory=self.getGlyphCacheDirectory(),
+                packedContours=settings.packedContours(),
+                glyphBudget=settings.glyphBudget(),
+                artifactCache=self.artifactCache())
             window = FontWindow(font)
         except Exception as e:
             msg = self.tr(
@@ -425,6 +458,77 @@ class Application(QApplication):
         fontPath = self.sender().toolTip()
         self.openFile(fontPath)
 
+    def exportAllFonts(self):
+        fonts = self.allFonts()
+        if not fonts or self._batchExporter is not None:
+            return
+        directory = None
+        if fonts[0].path is not None:
+            directory = os.path.dirname(fonts[0].path)
+        formats, directory, ok = BatchExportDialog.getExportOptions(
+            self.activeWindow(), directory)
+        if not ok:
+            return
+        for font in fonts:
+            try:
+                for format in formats:
+                    font._checkExportable(format)
+            except Exception as e:
+                errorReports.showCriticalException(e)
+                return
+        reports = [
+            ("{} {}".format(font.info.familyName, font.info.styleName),
+             font.preflight()) for font in fonts]
+        if not PreflightDialog.confirmExport(self.activeWindow(), reports):
+            return
+        exporter = BatchExporter(fonts, formats, directory, parent=self)
+        exporter.progressChanged.connect(self._batchExportProgressChanged)
+        exporter.finished.connect(self._batchExportFinished)
+        self._batchExporter = exporter
+        window = self.currentMainWindow()
+        if window is not None:
+            button = QPushButton(self.tr("Cancel"), window)
+            button.clicked.connect(exporter.cancel)
+            window.statusBar().addWidget(button)
+            self._batchExportCancelButton = button
+        exporter.start()
+
+    def _batchExportProgressChanged(self, done, count):
+        window = self.currentMainWindow()
+        if window is not None:
+            window.statusBar().showMessage(
+                self.tr("Exporting fonts… {}/{}").format(done, count))
+
+    def _batchExportFinished(self):
+        exporter = self._batchExporter
+        self._batchExporter = None
+        button = self._batchExportCancelButton
+        self._batchExportCancelButton = None
+        if button is not None:
+            try:
+                button.deleteLater()
+            except RuntimeError:
+                # went away with its window
+                pass
+        window = self.currentMainWindow()
+        if window is not None:
+            window.statusBar().clearMessage()
+        if exporter.error is not None:
+            try:
+                raise exporter.error
+            except Exception as e:
+                errorReports.showCriticalException(e)
+            return
+        if exporter.cancelled:
+            message = self.tr(
+                "The export was cancelled, see {} for the fonts that were "
+                "exported.")
+        else:
+            message = self.tr("The fonts were exported, see {} for details.")
+        QMessageBox.information(
+            window, self.tr("Export All Fonts"),
+            message.format(exporter.reportPath()))
+
     # Window
 
     def minimizeAll(self):
@@ -0,0 +1,145 @@
+"""
+Exporting of several fonts to several binary formats at once.
+
+Each font is copied into an ExportSnapshot and handed to a pool of worker
+processes, one font per worker. A worker compiles the formats asked for
+out of a single copy of the font: features are compiled once and shared by
+all formats, and the TrueType outlines (cubic to quadratic conversion
+included) are shared by the TTF, WOFF and WOFF2 files.
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from defcon import Glyph, registerRepresentationFactory
+from PyQt5.QtCore import pyqtSignal, QThread
+from trufont.objects.fontExporter import EXPORT_FORMATS, ExportSnapshot
+from trufont.representationFactories.glyphDigestFactory import (
+    GlyphDigestFactory)
+import multiprocessing
+import os
+
+REPORT_FILE_NAME = "export-report.txt"
+
+
+def _exportFormats(snapshot, formats, directory, fileName):
+    # runs in a worker process
+    registerRepresentationFactory(
+        Glyph, "TruFont.Digest", GlyphDigestFactory)
+    results = snapshot.exportFormats(formats, directory, fileName)
+    return results, snapshot.compileCache
+
+
+class BatchExporter(QThread):
+    """
+    Exports each of *fonts* to each of *formats* (see EXPORT_FORMATS) in
+    *directory*, using up to *workerCount* processes (defaults to the number
+    of CPUs). Those that are left when there are fewer fonts convert the
+    curves of TrueType glyphs.
+
+    progressChanged is emitted with the number of fonts done so far. Once
+    finished is emitted, *results* holds a {font: {format: (path, seconds,
+    error)}} dict, *error* the exception that stopped the export, if any,
+    and the timing report is written to REPORT_FILE_NAME in *directory*.
+    """
+    progressChanged = pyqtSignal(int, int)
+
+    def __init__(self, fonts, formats, directory, workerCount=None,
+                 parent=None):
+        super().__init__(parent)
+        self.formats = list(formats)
+        self.directory = directory
+        self.workerCount = workerCount or os.cpu_count() or 1
+        self.results = {}
+        self.error = None
+        self.cancelled = False
+        self._futures = []
+        self._compileCaches = {}
+        # snapshots are taken now, the fonts may be edited from here on
+        self._jobs = []
+        fileNames = set()
+        fonts = list(fonts)
+        conversionWorkerCount = max(
+            1, self.workerCount // max(1, len(fonts)))
+        for font in fonts:
+            snapshot = ExportSnapshot(
+                font, workerCount=conversionWorkerCount)
+            fileName = baseName = snapshot.fileName()
+            index = 1
+            while fileName in fileNames:
+                index += 1
+                fileName = "{}-{}".format(baseName, index)
+            fileNames.add(fileName)
+            self._jobs.append((font, snapshot, fileName))
+        self.finished.connect(self._exportFinished)
+
+    def reportPath(self):
+        return os.path.join(self.directory, REPORT_FILE_NAME)
+
+    def run(self):
+        jobs = self._jobs
+        try:
+            # don't fork the GUI process
+            executor = ProcessPoolExecutor(
+                min(self.workerCount, len(jobs)) or 1,
+                mp_context=multiprocessing.get_context("spawn"))
+            with executor:
+                for font, snapshot, fileName in jobs:
+                    if self.cancelled:
+                        break
+                    future = executor.submit(
+                        _exportFormats, snapshot, self.formats,
+                        self.directory, fileName)
+                    future.font = font
+                    self._futures.append(future)
+                done = 0
+                self.progressChanged.emit(done, len(jobs))
+                for future in as_completed(list(self._futures)):
+                    if future.cancelled():
+                        continue
+                    results, compileCache = future.result()
+                    self.results[future.font] = results
+                    self._compileCaches[future.font] = compileCache
+                    done += 1
+                    self.progressChanged.emit(done, len(jobs))
+            with open(self.reportPath(), "w", encoding="utf-8") as file:
+                file.write(self.report())
+        except Exception as e:
+            self.error = e
+
+    def cancel(self):
+        """
+        Drops the fonts that didn't start exporting yet.
+        """
+        self.cancelled = True
+        for future in self._futures:
+            future.cancel()
+
+    def report(self):
+        """
+        Returns the timing report of the export, one line per font and
+        format.
+        """
+        lines = []
+        for font, snapshot, fileName in self._jobs:
+            results = self.results.get(font)
+            if results is None:
+                continue
+            fontName = "{} {}".format(
+                snapshot.info.get("familyName"),
+                snapshot.info.get("styleName"))
+            for format in EXPORT_FORMATS:
+                if format not in results:
+                    continue
+                path, seconds, error = results[format]
+                if error is None:
+                    outcome = os.path.basename(path)
+                else:
+                    outcome = "failed: {}".format(error)
+                lines.append("{:<32} {:<6} {:>8.2f}s  {}".format(
+                    fontName, format, seconds, outcome))
+        return "\n".join(lines) + "\n"
+
+    def _exportFinished(self):
+        self._futures = []
+        # later exports of the fonts reuse the glyphs compiled here
+        for font, compileCache in self._compileCaches.items():
+            font.setCompileCache(compileCache)
+        self._compileCaches = {}
@@ -1,19 +1,104 @@
 from booleanOperations.booleanGlyph import BooleanGlyph
 from defcon import (
     Font, Layer, Glyph, Contour, Point, Anchor, Component, Guideline, Image)
+from defcon.errors import DefconError
 from defcon.objects.base import BaseObject
+from defcon.pens.glyphObjectPointPen import GlyphObjectLoadingPointPen
 from fontTools.misc.transform import Identity
-from PyQt5.QtCore import pyqtSignal, QObject
+from PyQt5.QtCore import pyqtSignal, QObject, QTimer
 from PyQt5.QtWidgets import QApplication
 from trufont.objects import settings
+from trufont.objects.fontExporter import (
+    EXPORT_FORMATS, ExportSnapshot, FontExporter, compileSubsetFont)
+from trufont.objects.fontImporter import FontImporter
+from trufont.objects.fontSaver import (
+    FontSaver, FontSnapshot, recoverInterruptedSave)
+from trufont.objects.pointArray import PointArray
+from trufont.tools.artifactCache import fontKey
+from trufont.tools.componentIndex import ComponentIndex
+from trufont.tools.featureCache import FeatureCache
+from trufont.tools.glyphCache import GlyphCache, cachePath, dumpGlyphData
+from trufont.tools.glyphLoader import GlyphData, GlyphLoader
+from trufont.tools.preflight import PreflightChecker, hasOverlap
+from trufont.tools.representationStats import representationStats
+from trufont.tools.incrementalCompiler import CompileCache
+from trufont.tools.ufoFileIndex import FONT_FILES, UFOFileIndex, dataDigest
+from ufoLib import UFOReader
+from collections import OrderedDict
 import extractor
 import fontTools
 import math
+import os
+
+
+class ApplicationNotifications(object):
+    """
+    Posts the notifications of fonts (newGlyphCreated, fontSaved, etc.)
+    through the running application, and takes the glyph list that maps
+    glyph names to unicodes from it. Without an application, nothing is
+    posted.
+    """
+    # whether fonts may skip the notifications of their own objects when
+    # nothing outside of them observes these
+    quiet = False
+
+    def postNotification(self, notification, data=None):
+        app = QApplication.instance()
+        if app is not None and hasattr(app, "postNotification"):
+            app.postNotification(notification, data)
+
+    def glyphList(self):
+        app = QApplication.instance()
+        GL2UV = getattr(app, "GL2UV", None)
+        if GL2UV is None:
+            GL2UV = fontTools.agl.AGL2UV
+        return GL2UV
+
+
+class NullNotifications(ApplicationNotifications):
+    """
+    Posts nothing, for batch jobs and scripts. Fonts that use it build new
+    glyphs without posting notifications for each of their attributes.
+    """
+    quiet = True
+
+    def postNotification(self, notification, data=None):
+        pass
+
+    def glyphList(self):
+        return fontTools.agl.AGL2UV
+
+
+def _recordRepresentation(obj, name, kwargs):
+    if representationStats.enabled:
+        representationStats.record(
+            name, obj.hasCachedRepresentation(name, **kwargs))
+
+
+def notificationBackend(font):
+    """
+    Returns the notifications backend of *font*, or the default one if it
+    is None.
+    """
+    return getattr(font, "notificationBackend", TFont.notificationBackend)
 
 
 class TFont(Font):
+    # set a NullNotifications() here (or pass one to a font) when running
+    # without the user interface
+    notificationBackend = ApplicationNotifications()
 
     def __init__(self, *args, **kwargs):
+        notificationBackend = kwargs.pop("notificationBackend", None)
+        if notificationBackend is not None:
+            self.notificationBackend = notificationBackend
+        glyphLoaderWorkerCount = kwargs.pop("glyphLoaderWorkerCount", None)
+        glyphCacheDirectory = kwargs.pop("glyphCacheDirectory", None)
+        glyphBudget = kwargs.pop("glyphBudget", 0)
+        artifactCache = kwargs.pop("artifactCache", None)
+        if kwargs.pop("packedContours", False):
+            kwargs.setdefault("glyphContourClass", TPackedContour)
+            kwargs.setdefault("glyphPointClass", TPackedPoint)
         # TODO: maybe subclass all objects into our own for caller stability
         attrs = (
             ("glyphAnchorClass", TAnchor),
@@ -28,11 +113,36 @@ class TFont(Font):
         for attr, defaultClass in attrs:
             if attr not in kwargs:
                 kwargs[attr] = defaultClass
+        path = args[0] if args else kwargs.get("path")
+        if path is not None:
+            recoverInterruptedSave(path)
+        self._fileIndex = None
+        self._glyphCache = None
+        self._glyphBudget = glyphBudget
+        self._holdGlyphOrder = False
         super().__init__(*args, **kwargs)
+        self.glyphLoader = GlyphLoader(glyphLoaderWorkerCount)
+        self._backgroundSaver = None
+        self._backgroundImporter = None
+        self._backgroundExporter = None
+        self._compileCache = CompileCache()
+        self._featureCache = FeatureCache()
+        self._artifactCache = artifactCache
+        self._preflightChecker = PreflightChecker(glyphLoaderWorkerCount)
+        self._glyphCacheDirectory = glyphCacheDirectory
+        if self.path is not None:
+            self._newFileIndex()
+            if glyphCacheDirectory is not None:
+                self._glyphCache = GlyphCache(
+                    cachePath(self.path, glyphCacheDirectory))
+
+    def getRepresentation(self, name, **kwargs):
+        _recordRepresentation(self, name, kwargs)
+        return super().getRepresentation(name, **kwargs)
 
     @classmethod
-    def newStandardFont(cls):
-        font = cls()
+    def newStandardFont(cls, notificationBackend=None):
+        font = cls(notificationBackend=notificationBackend)
         font.info.unitsPerEm = 1000
         font.info.ascender = 750
         font.info.descender = -250
@@ -46,13 +156,11 @@ class TFont(Font):
             if defaultGlyphSet in glyphSets:
                 glyphNames = glyphSets[defaultGlyphSet]
             if glyphNames is not None:
-                for name in glyphNames:
-                    font.newStandardGlyph(name, asTemplate=True)
+                font.newStandardGlyphs(glyphNames, asTemplate=True)
         font.dirty = False
 
-        app = QApplication.instance()
         data = dict(font=font)
-        app.postNotification("newFontCreated", data)
+        font.notificationBackend.postNotification("newFontCreated", data)
 
         return font
 
@@ -63,53 +171,621 @@ class TFont(Font):
             if name in self:
                 return None
         glyph = self.newGlyph(name)
-        if asTemplate:
+        quiet = asTemplate or self.notificationBackend.quiet
+        if quiet:
             glyph.disableNotifications()
         glyph.width = width
         if addUnicode:
             glyph.autoUnicodes()
         glyph.template = asTemplate
-        if asTemplate:
-            glyph.dirty = False
+        if quiet:
+            if asTemplate:
+                glyph.dirty = False
+            else:
+                glyph.markColor = markColor
             glyph.enableNotifications()
-        glyph.markColor = markColor
+            # the layer didn't hear of the unicodes
+            layer = glyph.layer
+            if glyph.unicodes and layer._unicodeData is not None:
+                layer._unicodeData.addGlyphData(name, glyph.unicodes)
+        if asTemplate or not quiet:
+            glyph.markColor = markColor
+        else:
+            # nor of the other changes
+            glyph.dirty = True
 
-        app = QApplication.instance()
         data = dict(glyph=glyph)
-        app.postNotification("newGlyphCreated", data)
+        self.notificationBackend.postNotification("newGlyphCreated", data)
 
         return glyph
 
+    def newStandardGlyphs(self, names, **kwargs):
+        """
+        Creates standard glyphs for *names*, passing *kwargs* on to
+        newStandardGlyph(), and returns those that were created. The glyph
+        order is updated once for all of them.
+        """
+        layer = self.layers.defaultLayer
+        # with a quiet backend, the layer doesn't tell about each glyph
+        quiet = self.notificationBackend.quiet
+        if quiet:
+            layer.disableNotifications()
+        self._holdGlyphOrder = True
+        try:
+            glyphs = [self.newStandardGlyph(name, **kwargs) for name in names]
+        finally:
+            self._holdGlyphOrder = False
+            if quiet:
+                layer.enableNotifications()
+        glyphs = [glyph for glyph in glyphs if glyph is not None]
+        if glyphs:
+            glyphOrder = self.glyphOrder
+            glyphNames = set(glyphOrder)
+            for glyph in glyphs:
+                if glyph.name not in glyphNames:
+                    glyphOrder.append(glyph.name)
+                    glyphNames.add(glyph.name)
+            self.glyphOrder = glyphOrder
+            if quiet:
+                layer.dirty = True
+        return glyphs
+
+    def updateGlyphOrder(self, addedGlyph=None, removedGlyph=None):
+        # newStandardGlyphs() and imports set the glyph order all at once
+        if self._holdGlyphOrder and removedGlyph is None:
+            return
+        super().updateGlyphOrder(addedGlyph, removedGlyph)
+
+    def loadGlyphs(self, glyphNames=None):
+        """
+        Loads the glyphs of *glyphNames* (defaults to all glyphs) that aren't
+        loaded yet, parsing their .glif files in parallel.
+        """
+        layer = self.layers.defaultLayer
+        if glyphNames is None:
+            glyphNames = layer.keys()
+        layer.loadGlyphs(glyphNames)
+
     def extract(self, path):
         fileFormat = extractor.extractFormat(path)
-        app = QApplication.instance()
         data = dict(
             font=self,
             format=fileFormat,
         )
-        app.postNotification("fontWillExtract", data)
-        extractor.extractUFO(path, self, fileFormat)
+        self.notificationBackend.postNotification("fontWillExtract", data)
+        extractor.extractUFO(path, self, format=fileFormat)
         for glyph in self:
             glyph.dirty = False
 
+    def extractInBackground(self, path, parent=None):
+        """
+        Extracts the binary font at *path* into this font and returns the
+        FontImporter. Glyphs are decoded by worker processes and added as
+        they come in, starting on the next event loop iteration.
+        """
+        fileFormat = extractor.extractFormat(path)
+        data = dict(
+            font=self,
+            format=fileFormat,
+        )
+        self.notificationBackend.postNotification("fontWillExtract", data)
+        importer = FontImporter(self, path, fileFormat, parent)
+        self._backgroundImporter = importer
+        QTimer.singleShot(0, importer.start)
+        return importer
+
+    def isExtractingInBackground(self):
+        return self._backgroundImporter is not None
+
+    def cancelBackgroundExtract(self):
+        importer = self._backgroundImporter
+        if importer is not None:
+            importer.cancel()
+
+    def finishBackgroundExtract(self, importer):
+        # called by FontImporter once done or cancelled
+        if importer is self._backgroundImporter:
+            self._backgroundImporter = None
+
     def save(self, path=None, formatVersion=None,
              removeUnreferencedImages=False, progressBar=None):
-        app = QApplication.instance()
+        self.waitForBackgroundSave()
         data = dict(
             font=self,
             path=path or self.path,
         )
-        app.postNotification("fontWillSave", data)
+        self.notificationBackend.postNotification("fontWillSave", data)
+        oldPath, oldFormatVersion = self.path, self.ufoFormatVersion
+        writtenGlyphNames = {
+            layer.name: layer._dirtyGlyphNames | set(
+                layer._scheduledForDeletion) for layer in self.layers}
         super().save(
             path, formatVersion, removeUnreferencedImages, progressBar)
-        for glyph in self:
-            glyph.dirty = False
+        # saved glyphs are clean already, this catches template glyphs
+        for layer in self.layers:
+            for glyph in layer.dirtyGlyphs():
+                glyph.dirty = False
+        self.dirty = False
+        if self.path != oldPath or self.ufoFormatVersion != oldFormatVersion:
+            # written anew
+            self._newFileIndex()
+        else:
+            self._updateFileIndex(writtenGlyphNames)
+        self.updateGlyphCache()
+        self.notificationBackend.postNotification("fontSaved", data)
+
+    def reloadChanges(self, changes):
+        """
+        Reloads the parts of the font listed in *changes*, in the format
+        posted with "fontChangedExternally". Only the objects and glyphs
+        that are loaded are read again.
+        """
+        wasDirty = self.dirty
+        # groups go before kerning, which is validated against them
+        for attr in ("info", "groups", "kerning", "features", "lib"):
+            if changes.get(attr) and getattr(self, "_" + attr) is not None:
+                getattr(self, "reload" + attr.capitalize())()
+        layerData = dict(layers={})
+        for layerName, layerChanges in changes.get("layers", {}).items():
+            if layerName not in self.layers:
+                continue
+            layer = self.layers[layerName]
+            layer.reloadContents(
+                layerChanges["addedGlyphs"], layerChanges["deletedGlyphs"])
+            glyphNames = [
+                glyphName for glyphName in layerChanges["modifiedGlyphs"]
+                if layer.isGlyphLoaded(glyphName)]
+            if glyphNames or layerChanges["info"]:
+                layerData["layers"][layerName] = dict(
+                    glyphNames=glyphNames,
+                    info=layerChanges["info"],
+                )
+        if layerData["layers"]:
+            self.reloadLayers(layerData)
+        # what was read from disk is saved already
+        if not wasDirty:
+            self._markClean()
+
+    def reload(self):
+        """
+        Reverts the font to its UFO on disk. Only what changed since the UFO
+        was last read or written, on disk or in memory, is read again so
+        unchanged glyphs keep their representations.
+        """
+        index = self.fileIndex()
+        if index is None:
+            return
+        changes = index.changes() or dict(layers={})
+        for attr in ("info", "groups", "kerning", "features", "lib"):
+            obj = getattr(self, "_" + attr)
+            if obj is not None and obj.dirty:
+                changes[attr] = True
+        for layer in self.layers:
+            glyphSet = layer._glyphSet
+            if glyphSet is None:
+                continue
+            layerChanges = changes["layers"].setdefault(layer.name, dict(
+                info=False,
+                modifiedGlyphs=set(),
+                addedGlyphs=set(),
+                deletedGlyphs=set(),
+            ))
+            layerChanges["info"] = layerChanges["info"] or layer.dirty
+            layerChanges["modifiedGlyphs"].update(
+                glyph.name for glyph in layer.dirtyGlyphs())
+            # deleted glyphs come back, new ones go away
+            layerChanges["addedGlyphs"].update(layer._scheduledForDeletion)
+            glyphSet.rebuildContents()
+            for glyphName in layer.keys() - set(glyphSet.contents):
+                if layer.isGlyphLoaded(glyphName) and \
+                        not layer[glyphName].template:
+                    del layer[glyphName]
+        self.reloadChanges(changes)
+        self._markClean()
+
+    def _markClean(self):
+        for obj in (self._info, self._groups, self._kerning, self._lib,
+                    self._features):
+            if obj is not None:
+                obj.dirty = False
+        for layer in self.layers:
+            layer.dirty = False
+        self.dirty = False
+
+    # file index
+
+    def fileIndex(self):
+        """
+        Returns the UFOFileIndex of the font's files as they were last read
+        or written, or None if the font isn't on disk.
+        """
+        return self._fileIndex
+
+    def _newFileIndex(self):
+        # from what was read already, the UFO is scanned on the first check
+        layerDirs, contents = self._layerContents()
+        index = self._fileIndex = UFOFileIndex(self.path, layerDirs, contents)
+        for fileName, attr in FONT_FILES.items():
+            obj = getattr(self, "_" + attr)
+            if obj is not None and obj._dataOnDisk is not None:
+                index.setDigest(fileName, obj._dataOnDisk)
+        for dirName in layerDirs.values():
+            index.stat(os.path.join(dirName, "layerinfo.plist"))
+        for layer in self.layers:
+            for glyph in layer._glyphs.values():
+                layer._recordGlyphDigest(glyph)
+
+    def _layerContents(self):
+        layerDirs, contents = {}, {}
+        for layer in self.layers:
+            glyphSet = layer._glyphSet
+            if glyphSet is None:
+                continue
+            dirName = os.path.basename(os.path.normpath(glyphSet.dirName))
+            layerDirs[layer.name] = dirName
+            contents[dirName] = glyphSet.contents
+        return layerDirs, contents
+
+    def _updateFileIndex(self, writtenGlyphNames):
+        """
+        Brings the file index in line with a save that wrote the glyphs of
+        *writtenGlyphNames* ({layerName: glyphNames}) and the metadata.
+        """
+        index = self._fileIndex
+        if index is None or index.path != self.path:
+            self._newFileIndex()
+            return
+        layerDirs, contents = self._layerContents()
+        relPaths = set(FONT_FILES)
+        relPaths.update(("metainfo.plist", "layercontents.plist"))
+        for layerName, dirName in layerDirs.items():
+            relPaths.add(os.path.join(dirName, "contents.plist"))
+            relPaths.add(os.path.join(dirName, "layerinfo.plist"))
+            for glyphName in writtenGlyphNames.get(layerName, ()):
+                # where the glyph was, and where it is now
+                relPath = index.glyphPath(layerName, glyphName)
+                if relPath is not None:
+                    relPaths.add(relPath)
+                fileName = contents[dirName].get(glyphName)
+                if fileName is not None:
+                    relPaths.add(os.path.join(dirName, fileName))
+        index.updateFiles(relPaths, layerDirs, contents)
+        for layerName, glyphNames in writtenGlyphNames.items():
+            if layerName not in self.layers:
+                continue
+            layer = self.layers[layerName]
+            for glyphName in glyphNames:
+                glyph = layer.loadedGlyph(glyphName)
+                if glyph is not None:
+                    layer._recordGlyphDigest(glyph)
+
+    # glyph budget
+
+    def glyphBudget(self):
+        """
+        Returns the number of glyphs each layer keeps loaded before
+        unloading the least recently used ones, 0 meaning no limit.
+        """
+        return self._glyphBudget
+
+    def setGlyphBudget(self, glyphBudget):
+        self._glyphBudget = glyphBudget
+        for layer in self.layers:
+            layer.scheduleGlyphEviction()
+
+    def residentGlyphCount(self):
+        """
+        Returns the number of glyphs loaded in memory across layers.
+        """
+        return sum(layer.residentGlyphCount() for layer in self.layers)
+
+    # glyph cache
+
+    def glyphCache(self):
+        """
+        Returns the GlyphCache glyphs are loaded from when their .glif file
+        didn't change, or None if the font doesn't use one.
+        """
+        return self._glyphCache
+
+    def updateGlyphCache(self):
+        """
+        Brings the glyph cache in line with the UFO on disk, adding the
+        glyphs that were read or saved since it was written.
+        """
+        if self._glyphCacheDirectory is None or self._fileIndex is None:
+            return
+        cache = self._glyphCache
+        path = cachePath(self.path, self._glyphCacheDirectory)
+        if cache is None or cache.path != path:
+            if cache is not None:
+                cache.close()
+            cache = self._glyphCache = GlyphCache(path)
+        index = self._fileIndex
+        glyphs = {}
+        changed = False
+        for layer in self.layers:
+            if layer._glyphSet is None:
+                continue
+            layerGlyphs = glyphs[layer.name] = {}
+            for glyphName in layer.keys():
+                relPath = index.glyphPath(layer.name, glyphName)
+                stat = relPath and index.stat(relPath)
+                if not stat:
+                    continue
+                payload = cache.glyphPayload(
+                    layer.name, glyphName, relPath, stat)
+                if payload is None:
+                    # take loaded glyphs that match their file
+                    glyph = layer._glyphs.get(glyphName)
+                    if glyph is None or glyph.dirty or \
+                            glyph._dataOnDisk is None or \
+                            index.digest(relPath) != dataDigest(
+                                glyph._dataOnDisk):
+                        continue
+                    data = GlyphData.fromGlyph(glyph)
+                    data.text = glyph._dataOnDisk
+                    data.modificationTime = glyph._dataOnDiskTimeStamp
+                    payload = dumpGlyphData(data)
+                    if payload is None:
+                        continue
+                    changed = True
+                layerGlyphs[glyphName] = (relPath, stat, payload)
+        if changed or len(cache) != sum(
+                len(layerGlyphs) for layerGlyphs in glyphs.values()):
+            try:
+                cache.write(glyphs)
+            except OSError:
+                # the cache is only a speedup
+                pass
+
+    def _stampFontDataState(self, obj, fileName, reader=None):
+        super()._stampFontDataState(obj, fileName, reader)
+        index = self._fileIndex
+        if index is not None and obj is not None and \
+                obj._dataOnDisk is not None:
+            index.setDigest(fileName, obj._dataOnDisk)
+
+    # background save
+
+    def canSaveInBackground(self, path=None, formatVersion=None):
+        """
+        Returns whether saving to *path* in *formatVersion* can be done with
+        saveInBackground(), i.e. only updates the UFO already on disk.
+        """
+        if self.path is None or not os.path.isdir(self.path):
+            return False
+        if path is not None and os.path.normpath(path) != \
+                os.path.normpath(self.path):
+            return False
+        if formatVersion is not None and \
+                formatVersion != self.ufoFormatVersion:
+            return False
+        if self.ufoFormatVersion < 2:
+            return False
+        # layer set changes, images and data go through a regular save
+        reader = UFOReader(self.path)
+        layers = self.layers
+        if layers.layerOrder != reader.getLayerNames() or \
+                layers.defaultLayer.name != reader.getDefaultLayerName():
+            return False
+        if self.ufoFormatVersion >= 3:
+            for fileSet in (self.images, self.data):
+                if fileSet._scheduledForDeletion or any(
+                        item["dirty"] for item in fileSet._data.values()):
+                    return False
+        return all(layer._glyphSet is not None for layer in layers)
+
+    def saveInBackground(self, parent=None):
+        """
+        Saves the font to its path on a worker thread and returns the
+        FontSaver. The changes are copied on the spot, after which the font
+        is clean and may be edited while the save is in flight.
+
+        Check canSaveInBackground() before calling this.
+        """
+        self.waitForBackgroundSave()
+        data = dict(
+            font=self,
+            path=self.path,
+        )
+        self.notificationBackend.postNotification("fontWillSave", data)
+        snapshot = FontSnapshot(self)
+        for obj in (self._info, self._groups, self._kerning, self._lib,
+                    self._features):
+            if obj is not None:
+                obj.dirty = False
+        for layer in self.layers:
+            for glyph in layer.dirtyGlyphs():
+                glyph.dirty = False
+            layer.dirty = False
         self.dirty = False
-        app.postNotification("fontSaved", data)
+        saver = FontSaver(self, snapshot, parent)
+        self._backgroundSaver = saver
+        saver.start()
+        return saver
+
+    def isSavingInBackground(self):
+        return self._backgroundSaver is not None
+
+    def waitForBackgroundSave(self):
+        """
+        Blocks until the background save in flight, if any, is done.
+        """
+        saver = self._backgroundSaver
+        if saver is not None:
+            saver.wait()
+            self.finishBackgroundSave(saver)
+
+    def finishBackgroundSave(self, saver):
+        # called by FontSaver once its thread is done
+        if saver is not self._backgroundSaver:
+            return
+        self._backgroundSaver = None
+        snapshot = saver.snapshot
+        if saver.error is not None:
+            # put back the changes that didn't make it
+            for obj, changed in (
+                    (self._info, snapshot.info is not None),
+                    (self._groups, snapshot.groups is not None),
+                    (self._kerning, snapshot.kerning is not None),
+                    (self._lib, snapshot.lib is not None),
+                    (self._features, snapshot.featuresChanged)):
+                if obj is not None and changed:
+                    obj.dirty = True
+            for layerSnapshot in snapshot.layers:
+                if layerSnapshot.name not in self.layers:
+                    continue
+                layer = self.layers[layerSnapshot.name]
+                for glyphName in layerSnapshot.glyphs:
+                    if layer.isGlyphLoaded(glyphName):
+                        layer[glyphName].dirty = True
+            self.dirty = True
+            return
+        for layerSnapshot in snapshot.layers:
+            if layerSnapshot.name not in self.layers:
+                continue
+            layer = self.layers[layerSnapshot.name]
+            glyphSet = layer._glyphSet
+            glyphSet.rebuildContents()
+            for glyphName in layerSnapshot.glyphs:
+                if layer.isGlyphLoaded(glyphName):
+                    layer._stampGlyphDataState(layer[glyphName])
+            for glyphName in layerSnapshot.deletedGlyphNames:
+                if glyphName not in glyphSet.contents:
+                    layer._scheduledForDeletion.pop(glyphName, None)
+            if layerSnapshot.info is not None:
+                self.layers._stampLayerInfoDataState(layer)
+        if snapshot.info is not None:
+            self._stampInfoDataState()
+        if snapshot.groups is not None:
+            self._stampGroupsDataState()
+        if snapshot.kerning is not None:
+            self._stampKerningDataState()
+        if snapshot.lib is not None:
+            self._stampLibDataState()
+        if snapshot.featuresChanged:
+            self._stampFeaturesDataState()
+        self._updateFileIndex({
+            layerSnapshot.name: set(layerSnapshot.glyphs) | set(
+                layerSnapshot.deletedGlyphNames)
+            for layerSnapshot in snapshot.layers})
+        self.updateGlyphCache()
+        data = dict(
+            font=self,
+            path=self.path,
+        )
+        self.notificationBackend.postNotification("fontSaved", data)
+
+    # only write info, groups and lib when they changed (defcon always
+    # writes them)
+
+    def _saveInfo(self, writer, saveAs=False, progressBar=None):
+        if saveAs or self._info is not None and self._info.dirty:
+            super()._saveInfo(writer, saveAs, progressBar)
+        elif progressBar is not None:
+            progressBar.update()
+
+    def _saveGroups(self, writer, saveAs=False, progressBar=None):
+        if saveAs or self._groups is not None and self._groups.dirty:
+            super()._saveGroups(writer, saveAs, progressBar)
+        elif progressBar is not None:
+            progressBar.update()
+
+    def _saveLib(self, writer, saveAs=False, progressBar=None):
+        if saveAs or self._lib is not None and self._lib.dirty:
+            super()._saveLib(writer, saveAs, progressBar)
+        elif progressBar is not None:
+            progressBar.update()
+
+    def compileCache(self):
+        """
+        Returns the CompileCache that binary font representations reuse
+        unchanged glyphs from.
+        """
+        return self._compileCache
+
+    def setCompileCache(self, compileCache):
+        self._compileCache = compileCache
+
+    def featureCache(self):
+        """
+        Returns the FeatureCache that feature checks and binary font
+        representations share.
+        """
+        return self._featureCache
+
+    def artifactCache(self):
+        """
+        Returns the ArtifactCache exports copy unchanged binary fonts from,
+        or None.
+        """
+        return self._artifactCache
+
+    def setArtifactCache(self, artifactCache):
+        self._artifactCache = artifactCache
+
+    def _artifactKey(self, format, **options):
+        if self._artifactCache is None:
+            return None
+        return fontKey(self, format=format, **options)
+
+    def preflight(self, glyphNames=None):
+        """
+        Checks the glyphs of *glyphNames* (all glyphs by default) for
+        issues that would show in exported fonts and returns a
+        PreflightReport. Only the glyphs that changed since the last check
+        are looked at again.
+        """
+        return self._preflightChecker.check(self, glyphNames)
 
     def export(self, path, format="otf"):
+        self._checkExportable(format)
+        # go ahead
+        data = dict(
+            font=self,
+            format=format,
+            path=path,
+        )
+        self.notificationBackend.postNotification("fontWillExport", data)
+        artifactCache = self._artifactCache
+        key = self._artifactKey(
+            format, useProductionNames=False, optimizeCff=False)
         if format != "otf":
-            raise ValueError("unknown format: %s")
+            snapshot = ExportSnapshot(
+                self, format=format,
+                workerCount=self.glyphLoader.workerCount())
+            if key is not None:
+                snapshot.setArtifact(artifactCache, key)
+            snapshot.export(path)
+        elif key is None or not artifactCache.copyTo(key, path):
+            otf = self.getRepresentation("TruFont.TTFont")
+            otf.save(path)
+            if key is not None:
+                artifactCache.put(key, path)
+        self.notificationBackend.postNotification("fontExported", data)
+
+    def exportSubset(self, path, glyphNames, format="otf"):
+        """
+        Exports the glyphs of *glyphNames*, and those their components use,
+        to *path*. Meant for proofing: the time it takes depends on the
+        size of the subset, not of the font.
+        """
+        self._checkExportable(format)
+        data = dict(
+            font=self,
+            format=format,
+            path=path,
+            glyphNames=glyphNames,
+        )
+        self.notificationBackend.postNotification("fontWillExport", data)
+        otf = compileSubsetFont(self, glyphNames, format)
+        otf.save(path)
+        self.notificationBackend.postNotification("fontExported", data)
+
+    def _checkExportable(self, format):
+        if format not in EXPORT_FORMATS:
+            raise ValueError("unknown format: %s" % format)
         missingAttrs = []
         for attr in ("familyName", "styleName", "unitsPerEm", "ascender",
                      "descender", "xHeight", "capHeight"):
@@ -118,17 +794,62 @@ class TFont(Font):
         if missingAttrs:
             raise ValueError("font info attributes required for export are "
                              "missing: {}".format(" ".join(missingAttrs)))
-        # go ahead
-        app = QApplication.instance()
+
+    # background export
+
+    def exportInBackground(self, path, format="otf", parent=None,
+                           useProductionNames=False, optimizeCff=False):
+        """
+        Exports the font to *path* in a worker process and returns the
+        FontExporter. The font is copied on the spot and may be edited while
+        the export is in flight; an export already in flight is cancelled.
+        """
+        self._checkExportable(format)
+        self.cancelBackgroundExport()
         data = dict(
             font=self,
             format=format,
             path=path,
         )
-        app.postNotification("fontWillExport", data)
-        otf = self.getRepresentation("TruFont.TTFont")
-        otf.save(path)
-        app.postNotification("fontExported", data)
+        self.notificationBackend.postNotification("fontWillExport", data)
+        snapshot = ExportSnapshot(
+            self, useProductionNames, optimizeCff, format,
+            self.glyphLoader.workerCount())
+        key = self._artifactKey(
+            format, useProductionNames=useProductionNames,
+            optimizeCff=optimizeCff)
+        if key is not None:
+            snapshot.setArtifact(self._artifactCache, key)
+        exporter = FontExporter(self, snapshot, path, parent)
+        self._backgroundExporter = exporter
+        exporter.start()
+        return exporter
+
+    def isExportingInBackground(self):
+        return self._backgroundExporter is not None
+
+    def cancelBackgroundExport(self):
+        exporter = self._backgroundExporter
+        if exporter is not None:
+            exporter.cancel()
+            exporter.wait()
+            self.finishBackgroundExport(exporter)
+
+    def finishBackgroundExport(self, exporter):
+        # called by FontExporter once its thread is done
+        if exporter is not self._backgroundExporter:
+            return
+        self._backgroundExporter = None
+        if exporter.compileCache is not None:
+            self.setCompileCache(exporter.compileCache)
+        if exporter.error is not None or exporter.cancelled:
+            return
+        data = dict(
+            font=self,
+            format=exporter.format,
+            path=exporter.path,
+        )
+        self.notificationBackend.postNotification("fontExported", data)
 
     # sort descriptor
 
@@ -159,6 +880,389 @@ class TFont(Font):
 
 class TLayer(Layer):
 
+    def __init__(self, *args, **kwargs):
+        self._dirtyGlyphNames = set()
+        # loaded glyph names, least recently used first
+        self._recentGlyphNames = OrderedDict()
+        self._glyphEvictionScheduled = False
+        # loaded glyphs by base glyph, maintained by TComponent
+        self._componentIndex = ComponentIndex()
+        self._changedComposites = set()
+        super().__init__(*args, **kwargs)
+
+    def isGlyphLoaded(self, name):
+        return name in self._glyphs
+
+    def loadedGlyph(self, name):
+        """
+        Returns the glyph *name* if it is loaded, or None. Unlike
+        layer[name], this doesn't count as a use of the glyph.
+        """
+        return self._glyphs.get(name)
+
+    def __getitem__(self, name):
+        glyph = super().__getitem__(name)
+        if self._glyphBudget():
+            self._recentGlyphNames[name] = None
+            self._recentGlyphNames.move_to_end(name)
+        return glyph
+
+    def _insertGlyph(self, glyph, beginObservations=True):
+        super()._insertGlyph(glyph, beginObservations)
+        if self._glyphBudget():
+            self._recentGlyphNames[glyph.name] = None
+            self._recentGlyphNames.move_to_end(glyph.name)
+            self.scheduleGlyphEviction()
+
+    # glyph eviction
+
+    def residentGlyphCount(self):
+        return len(self._glyphs)
+
+    def _glyphBudget(self):
+        font = self.font
+        if font is None:
+            return 0
+        return font.glyphBudget()
+
+    def scheduleGlyphEviction(self):
+        """
+        Unloads glyphs past the font's glyph budget once control returns to
+        the event loop, so that glyphs held by the code running now are
+        left alone.
+        """
+        budget = self._glyphBudget()
+        if not budget or len(self._glyphs) <= budget or \
+                self._glyphEvictionScheduled or \
+                QApplication.instance() is None:
+            return
+        self._glyphEvictionScheduled = True
+        QTimer.singleShot(0, self._evictGlyphs)
+
+    def _evictGlyphs(self):
+        self._glyphEvictionScheduled = False
+        budget = self._glyphBudget()
+        if not budget or len(self._glyphs) <= budget:
+            return
+        # leave some room so that the next few loads don't evict again
+        count = len(self._glyphs) - budget + budget // 10
+        recentGlyphNames = self._recentGlyphNames
+        # glyphs loaded before the budget was set come first
+        candidates = [name for name in self._glyphs
+                      if name not in recentGlyphNames]
+        candidates.extend(recentGlyphNames)
+        glyphNames = []
+        for name in candidates:
+            if len(glyphNames) >= count:
+                break
+            if name not in self._glyphs:
+                recentGlyphNames.pop(name, None)
+            elif self._canUnloadGlyph(name):
+                glyphNames.append(name)
+        self.unloadGlyphs(glyphNames)
+        data = dict(
+            font=self.font,
+            layer=self,
+            glyphNames=glyphNames,
+            residentGlyphCount=len(self._glyphs),
+        )
+        notificationBackend(self.font).postNotification(
+            "glyphsUnloaded", data)
+
+    def unloadGlyphs(self, glyphNames):
+        """
+        Drops the glyphs of *glyphNames* from memory, along with their
+        representations and undo history. They are read from disk again
+        when accessed. Only clean glyphs that are saved should be passed.
+        """
+        for name in glyphNames:
+            glyph = self._glyphs.pop(name, None)
+            if glyph is None:
+                continue
+            self._recentGlyphNames.pop(name, None)
+            self.endSelfGlyphNotificationObservation(glyph)
+            glyph.destroyAllRepresentations()
+
+    def _canUnloadGlyph(self, name):
+        glyph = self._glyphs[name]
+        if glyph.dirty or glyph.template or glyph._dataOnDisk is None or \
+                self._glyphSet is None or name not in self._glyphSet or \
+                name in self._scheduledForDeletion:
+            return False
+        # in use by windows, tools or components of other glyphs
+        if glyph.isPinned() or glyph.isObserved():
+            return False
+        return not _hasSelection(glyph)
+
+    # composite glyphs
+
+    def componentIndex(self):
+        """
+        The ComponentIndex of the loaded glyphs of this layer.
+        """
+        return self._componentIndex
+
+    def beginSelfGlyphNotificationObservation(self, glyph):
+        super().beginSelfGlyphNotificationObservation(glyph)
+        glyph.addObserver(
+            observer=self, methodName="_glyphDataChanged",
+            notification="Glyph.ContoursChanged")
+        glyph.addObserver(
+            observer=self, methodName="_glyphDataChanged",
+            notification="Glyph.ComponentsChanged")
+
+    def endSelfGlyphNotificationObservation(self, glyph):
+        if glyph.dispatcher is None:
+            return
+        glyph.removeObserver(
+            observer=self, notification="Glyph.ContoursChanged")
+        glyph.removeObserver(
+            observer=self, notification="Glyph.ComponentsChanged")
+        super().endSelfGlyphNotificationObservation(glyph)
+
+    def _glyphDataChanged(self, notification):
+        self.invalidateComposites([notification.object.name])
+
+    def invalidateComposites(self, glyphNames):
+        """
+        Marks the loaded glyphs that use *glyphNames* through components as
+        changed. Their representations are dropped when next requested, and
+        those that are observed get a Glyph.Changed notification once
+        control returns to the event loop.
+        """
+        index = self._componentIndex
+        dependents = set()
+        for glyphName in glyphNames:
+            dependents |= index.dependents(glyphName)
+        if not dependents:
+            return
+        glyphs = self._glyphs
+        observed = []
+        for glyphName in dependents:
+            glyph = glyphs.get(glyphName)
+            if glyph is None:
+                continue
+            glyph._baseGlyphDataChanged = True
+            if glyph.isObserved():
+                observed.append(glyphName)
+        if not observed:
+            return
+        scheduled = bool(self._changedComposites)
+        self._changedComposites.update(observed)
+        if QApplication.instance() is None:
+            self._postCompositeChanges()
+        elif not scheduled:
+            QTimer.singleShot(0, self._postCompositeChanges)
+
+    def _postCompositeChanges(self):
+        glyphNames = self._changedComposites
+        self._changedComposites = set()
+        for glyphName in glyphNames:
+            glyph = self._glyphs.get(glyphName)
+            if glyph is not None and glyph.dispatcher is not None:
+                glyph.postNotification(glyph.changeNotificationName)
+
+    def glyphLoader(self):
+        font = self.font
+        if font is not None:
+            return font.glyphLoader
+        return _defaultGlyphLoader
+
+    def loadGlyphs(self, glyphNames):
+        glyphSet = self._glyphSet
+        if glyphSet is None:
+            return
+        glyphNames = [
+            name for name in glyphNames if name not in self._glyphs and
+            name not in self._scheduledForDeletion]
+        glyphsData = {}
+        for name in glyphNames:
+            data = self._cachedGlyphData(name)
+            if data is not None:
+                glyphsData[name] = data
+        glyphsData.update(self.glyphLoader().readGlyphs(
+            glyphSet, [name for name in glyphNames if name not in glyphsData]))
+        for name in glyphNames:
+            if name in glyphsData:
+                self._loadGlyphFromData(name, glyphsData[name])
+
+    def loadGlyph(self, name):
+        if self._glyphSet is not None and name in self._glyphSet and \
+                name not in self._scheduledForDeletion:
+            data = self._cachedGlyphData(name)
+            if data is not None:
+                return self._loadGlyphFromData(name, data)
+        return super().loadGlyph(name)
+
+    def _cachedGlyphData(self, name):
+        font = self.font
+        if font is None:
+            return None
+        cache, index = font.glyphCache(), font.fileIndex()
+        if cache is None or index is None:
+            return None
+        relPath = index.glyphPath(self.name, name)
+        if relPath is None:
+            return None
+        stat = index.stat(relPath)
+        if stat is None:
+            return None
+        return cache.glyphData(self.name, name, relPath, stat)
+
+    def _loadGlyphFromData(self, name, data):
+        glyph = self.instantiateGlyphObject()
+        glyph.disableNotifications()
+        glyph._isLoading = True
+        glyph.name = name
+        self._insertGlyph(glyph)
+        self._readGlyphFromData(glyph, data)
+        glyph.dirty = False
+        glyph._isLoading = False
+        glyph.enableNotifications()
+        return glyph
+
+    def addGlyphsFromData(self, glyphsData):
+        """
+        Adds new glyphs from *glyphsData*, (glyphName, GlyphData) pairs
+        read out of another source than the UFO, and returns them. Posts
+        Layer.GlyphAdded for each glyph, but none of the notifications of
+        building them.
+        """
+        glyphs = []
+        for name, data in glyphsData:
+            self.postNotification(
+                "Layer.GlyphWillBeAdded", data=dict(name=name))
+            if name in self and self._unicodeData is not None:
+                self._unicodeData.removeGlyphData(name, self[name].unicodes)
+            glyph = self._loadGlyphFromData(name, data)
+            # the glyph was inserted before its unicodes were read
+            if glyph.unicodes and self._unicodeData is not None:
+                self._unicodeData.addGlyphData(name, glyph.unicodes)
+            self.postNotification("Layer.GlyphAdded", data=dict(name=name))
+            glyphs.append(glyph)
+        if glyphs:
+            self.dirty = True
+            self.invalidateComposites([glyph.name for glyph in glyphs])
+        return glyphs
+
+    def _readGlyphFromData(self, glyph, data):
+        for attr, value in data.attributes.items():
+            setattr(glyph, attr, value)
+        data.drawPoints(glyph.getPointPen())
+        glyph._dataOnDisk = data.text
+        glyph._dataOnDiskTimeStamp = data.modificationTime
+        self._recordGlyphDigest(glyph)
+
+    def _stampGlyphDataState(self, glyph):
+        super()._stampGlyphDataState(glyph)
+        self._recordGlyphDigest(glyph)
+
+    def _recordGlyphDigest(self, glyph):
+        font = self.font
+        if font is None or glyph._dataOnDisk is None:
+            return
+        index = font.fileIndex()
+        if index is not None:
+            index.setGlyphDigest(self.name, glyph.name, glyph._dataOnDisk)
+
+    def reloadGlyphs(self, glyphNames):
+        # glyphs that aren't loaded will be read fresh from disk on access,
+        # so only parse those we hold
+        glyphNames = [name for name in glyphNames if name in self._glyphs]
+        glyphsData = self.glyphLoader().readGlyphs(
+            self._glyphSet, glyphNames)
+        for glyphName in glyphNames:
+            if glyphName not in glyphsData:
+                continue
+            glyph = self._glyphs[glyphName]
+            glyph.destroyAllRepresentations(None)
+            glyph.clear()
+            self._readGlyphFromData(glyph, glyphsData[glyphName])
+            glyph.dirty = False
+        # update the glyphs that reference the reloaded glyphs via
+        # components
+        self.invalidateComposites(glyphNames)
+
+    def reloadContents(self, addedGlyphs=(), deletedGlyphs=()):
+        """
+        Takes in glyphs that were added to or deleted from the glyph set on
+        disk by another application. Glyphs that have unsaved changes are
+        kept.
+        """
+        glyphSet = self._glyphSet
+        if glyphSet is None:
+            return
+        glyphSet.rebuildContents()
+        for glyphName in deletedGlyphs:
+            if glyphName not in self._keys:
+                continue
+            glyph = self._glyphs.get(glyphName)
+            if glyph is not None and glyph.dirty:
+                continue
+            self.postNotification(
+                "Layer.GlyphWillBeDeleted", data=dict(name=glyphName))
+            if glyph is not None:
+                self._deleteGlyph(glyphName)
+            else:
+                unicodeData = self._unicodeData
+                if unicodeData is not None:
+                    values = [value for value, glyphNames in
+                              unicodeData.items() if glyphName in glyphNames]
+                    unicodeData.removeGlyphData(glyphName, values)
+                self._keys.discard(glyphName)
+            self.postNotification(
+                "Layer.GlyphDeleted", data=dict(name=glyphName))
+        for glyphName in addedGlyphs:
+            if glyphName not in glyphSet:
+                continue
+            self._scheduledForDeletion.pop(glyphName, None)
+            if glyphName in self._keys:
+                continue
+            self._keys.add(glyphName)
+            if self._unicodeData is not None:
+                self.loadGlyphs([glyphName])
+            self.postNotification(
+                "Layer.GlyphAdded", data=dict(name=glyphName))
+
+    # dirty glyphs tracking, maintained by TGlyph
+
+    def dirtyGlyphs(self):
+        return [self._glyphs[name] for name in self._dirtyGlyphNames]
+
+    def _glyphDirtyChanged(self, glyph):
+        if glyph.dirty:
+            self._dirtyGlyphNames.add(glyph.name)
+        else:
+            self._dirtyGlyphNames.discard(glyph.name)
+
+    def _glyphNameChange(self, notification):
+        data = notification.data
+        self._dirtyGlyphNames.discard(data["oldValue"])
+        self._componentIndex.renameGlyph(data["oldValue"], data["newValue"])
+        super()._glyphNameChange(notification)
+
+    def _deleteGlyph(self, name, endObservations=True):
+        super()._deleteGlyph(name, endObservations)
+        self._dirtyGlyphNames.discard(name)
+
+    def save(self, glyphSet, saveAs=False, progressBar=None):
+        if saveAs:
+            # a save as needs all glyphs loaded, batch that up
+            self.loadGlyphs(self.keys())
+            super().save(glyphSet, saveAs, progressBar)
+            return
+        # otherwise only visit the glyphs that changed
+        for glyphName in sorted(self._dirtyGlyphNames):
+            self.saveGlyph(self._glyphs[glyphName], glyphSet)
+        # remove deleted glyphs
+        if self._scheduledForDeletion:
+            for glyphName in self._scheduledForDeletion.keys():
+                if glyphName in glyphSet:
+                    glyphSet.deleteGlyph(glyphName)
+        glyphSet.writeContents()
+        self._glyphSet = glyphSet
+        self._scheduledForDeletion.clear()
+
     def saveGlyph(self, glyph, glyphSet, saveAs=False):
         if not glyph.template:
             super().saveGlyph(glyph, glyphSet, saveAs)
@@ -166,11 +1270,74 @@ class TLayer(Layer):
 
 class TGlyph(Glyph):
 
+    # what defcon glyphs post when the base glyph of a component changes
+    baseGlyphDataNotifications = (
+        "Glyph.Changed", "Glyph.ComponentsChanged",
+        "Glyph.ComponentBaseGlyphDataChanged")
+
     def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
         self._template = False
+        self._baseGlyphDataChanged = False
+        self._observerCount = 0
+        self._pinCount = 0
+        super().__init__(*args, **kwargs)
         self._undoManager = UndoManager(self)
 
+    def getRepresentation(self, name, **kwargs):
+        if self._baseGlyphDataChanged:
+            self._destroyBaseGlyphDataRepresentations()
+        _recordRepresentation(self, name, kwargs)
+        return super().getRepresentation(name, **kwargs)
+
+    def _destroyBaseGlyphDataRepresentations(self):
+        # the layer marks us when the base glyph of a component changes
+        self._baseGlyphDataChanged = False
+        for name, dataDict in self.representationFactories.items():
+            destructiveNotifications = dataDict["destructiveNotifications"]
+            for notification in self.baseGlyphDataNotifications:
+                if notification in destructiveNotifications:
+                    self.destroyRepresentation(name)
+                    break
+        for component in self.components:
+            component.destroyAllRepresentations()
+
+    # in use tracking, for glyph eviction
+
+    def addObserver(self, observer, methodName, notification):
+        if not self._isOwnObserver(observer) and \
+                not self.hasObserver(observer, notification):
+            self._observerCount += 1
+        super().addObserver(observer, methodName, notification)
+
+    def removeObserver(self, observer, notification):
+        if not self._isOwnObserver(observer) and \
+                self.hasObserver(observer, notification):
+            self._observerCount -= 1
+        super().removeObserver(observer, notification)
+
+    def _isOwnObserver(self, observer):
+        return observer is self or isinstance(observer, Layer)
+
+    def isObserved(self):
+        """
+        Whether something else than the glyph and its layer observes it, for
+        any notification.
+        """
+        return self._observerCount > 0
+
+    def pin(self):
+        """
+        Keeps the glyph loaded, until unpin() is called as many times.
+        For code that holds onto a glyph without observing it.
+        """
+        self._pinCount += 1
+
+    def unpin(self):
+        self._pinCount = max(0, self._pinCount - 1)
+
+    def isPinned(self):
+        return self._pinCount > 0
+
     # observe anchor selection
 
     def beginSelfAnchorNotificationObservation(self, anchor):
@@ -261,25 +1428,57 @@ class TGlyph(Glyph):
         return self._template
 
     def _set_template(self, value):
+        if value == self._template:
+            return
         self._template = value
+        if self.dispatcher is not None:
+            self.postNotification("Glyph.TemplateChanged")
 
     template = property(
         _get_template, _set_template,
         doc="A boolean indicating whether the glyph is a template glyph.")
 
     def _set_dirty(self, value):
+        oldValue = self._dirty
         BaseObject._set_dirty(self, value)
         if value:
             self.template = False
+        if value != oldValue and self.dispatcher is not None:
+            self.postNotification("Glyph.DirtyStateChanged")
+        layer = self.layer
+        if isinstance(layer, TLayer) and self.name is not None:
+            layer._glyphDirtyChanged(self)
 
     dirty = property(BaseObject._get_dirty, _set_dirty)
 
+    # keep shallow loaded contours in point arrays with packed contours
+
+    def getPointPen(self):
+        if self._isLoading and issubclass(self._contourClass, TPackedContour):
+            self._shallowLoadedContours = []
+            return _PackedLoadingPointPen(self)
+        return super().getPointPen()
+
+    def _drawShallowLoadedContours(self, pointPen, contours):
+        if not contours or not isinstance(contours[0]["points"], PointArray):
+            super()._drawShallowLoadedContours(pointPen, contours)
+            return
+        for contour in contours:
+            pointPen.beginPath(identifier=contour.get("identifier"))
+            for x, y, segmentType, smooth, name, identifier, _ in \
+                    contour["points"].iterValues():
+                if identifier is None:
+                    pointPen.addPoint(
+                        (x, y), segmentType=segmentType, smooth=smooth,
+                        name=name)
+                else:
+                    pointPen.addPoint(
+                        (x, y), segmentType=segmentType, smooth=smooth,
+                        name=name, identifier=identifier)
+            pointPen.endPath()
+
     def autoUnicodes(self):
-        app = QApplication.instance()
-        if app.GL2UV is not None:
-            GL2UV = app.GL2UV
-        else:
-            GL2UV = fontTools.agl.AGL2UV
+        GL2UV = notificationBackend(self.font).glyphList()
         hexes = "ABCDEF0123456789"
         name = self.name
         if name in GL2UV:
@@ -295,16 +1494,7 @@ class TGlyph(Glyph):
         self.unicodes = [uni]
 
     def hasOverlap(self):
-        bGlyph = BooleanGlyph()
-        pen = bGlyph.getPointPen()
-        openContours = 0
-        for contour in self:
-            if not contour.open:
-                contour.drawPoints(pen)
-            else:
-                openContours += 1
-        bGlyph.removeOverlap()
-        return len(bGlyph.contours) + openContours != len(self)
+        return hasOverlap(self)
 
     def removeOverlap(self):
         # TODO: maybe clear undo stack if no changes
@@ -361,6 +1551,26 @@ class TGlyph(Glyph):
             anchor.snap(base)
 
 
+class _PackedLoadingPointPen(GlyphObjectLoadingPointPen):
+    # like defcon's, but stores the points of each contour in a PointArray
+
+    def beginPath(self, identifier=None, **kwargs):
+        super().beginPath(identifier, **kwargs)
+        self._contours[-1]["points"] = PointArray(self._glyph.pointClass)
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None,
+                 identifier=None, **kwargs):
+        if identifier is not None and self.skipConflictingIdentifiers and \
+                identifier in self._glyph.identifiers:
+            identifier = None
+        if identifier is not None and identifier in self._glyph.identifiers:
+            raise DefconError(
+                "The contour identifier (%s) is already used." % identifier)
+        x, y = pt
+        self._contours[-1]["points"].appendValues(
+            x, y, segmentType, smooth, name, identifier)
+
+
 class TContour(Contour):
 
     def __init__(self, *args, **kwargs):
@@ -433,6 +1643,61 @@ class TContour(Contour):
         self.dirty = True
 
 
+class TPackedContour(TContour):
+    """
+    A TContour that keeps its points in a PointArray rather than as a list
+    of point objects, which takes several times less memory. Points handed
+    out are TPackedPoint views onto the array.
+    """
+
+    def __init__(self, *args, **kwargs):
+        if "pointClass" not in kwargs:
+            kwargs["pointClass"] = TPackedPoint
+        super().__init__(*args, **kwargs)
+        self._pointArray.pointClass = self._pointClass
+
+    def _get_points(self):
+        return self._pointArray
+
+    def _set_points(self, points):
+        # defcon assigns lists (or other contours' arrays) to _points
+        oldArray = self.__dict__.get("_pointArray")
+        if points is oldArray:
+            return
+        if points is not None:
+            pointClass = self.__dict__.get("_pointClass", TPackedPoint)
+            points = PointArray(pointClass, points)
+        if oldArray is not None:
+            oldArray.detachPoints()
+        self._pointArray = points
+
+    _points = property(_get_points, _set_points)
+
+    def addPoint(self, values, segmentType=None, smooth=False, name=None,
+                 identifier=None, selected=False, **kwargs):
+        # skip making a point object
+        if identifier is not None:
+            identifiers = self.identifiers
+            assert identifier not in identifiers
+            identifiers.add(identifier)
+        x, y = values
+        self._points.appendValues(
+            x, y, segmentType, smooth, name, identifier, selected)
+        self.postNotification("Contour.PointsChanged")
+        self.dirty = True
+
+    def drawPoints(self, pointPen):
+        """
+        Draw the contour with **pointPen**.
+        """
+        pointPen.beginPath()
+        for x, y, segmentType, smooth, name, _, selected in \
+                self._points.iterValues():
+            pointPen.addPoint((x, y), segmentType=segmentType,
+                              smooth=smooth, name=name, selected=selected)
+        pointPen.endPath()
+
+
 class TAnchor(Anchor):
 
     def __init__(self, *args, **kwargs):
@@ -473,8 +1738,69 @@ class TComponent(Component):
 
     def __init__(self, *args, **kwargs):
         self._selected = False
+        # the base glyph we are in the layer's ComponentIndex under
+        self._indexedBaseGlyph = None
         super().__init__(*args, **kwargs)
 
+    def getRepresentation(self, name, **kwargs):
+        glyph = self.glyph
+        if isinstance(glyph, TGlyph) and glyph._baseGlyphDataChanged:
+            glyph._destroyBaseGlyphDataRepresentations()
+        _recordRepresentation(self, name, kwargs)
+        return super().getRepresentation(name, **kwargs)
+
+    # rather than each component observing the data of its base glyph,
+    # TLayer indexes components and marks composites when base glyphs
+    # change
+
+    def beginSelfBaseGlyphNotificationObservation(self):
+        super().beginSelfBaseGlyphNotificationObservation()
+        layer = self.layer
+        if not isinstance(layer, TLayer) or self.baseGlyph is None or \
+                self.dispatcher is None or self._indexedBaseGlyph is not None:
+            return
+        layer._componentIndex.addReference(self.glyph.name, self.baseGlyph)
+        self._indexedBaseGlyph = self.baseGlyph
+
+    def endSelfBaseGlyphNotificationObservation(self):
+        if self._indexedBaseGlyph is not None:
+            # when collected along with its font, the glyph is gone first
+            glyph, layer = self.glyph, self.layer
+            if glyph is not None and isinstance(layer, TLayer):
+                layer._componentIndex.removeReference(
+                    glyph.name, self._indexedBaseGlyph)
+            self._indexedBaseGlyph = None
+        super().endSelfBaseGlyphNotificationObservation()
+
+    def _beginBaseGlyphObservations(self, baseGlyph=None):
+        if not isinstance(self.layer, TLayer):
+            super()._beginBaseGlyphObservations(baseGlyph)
+            return
+        layer = self.layer
+        if baseGlyph is None:
+            baseGlyph = layer[self.baseGlyph]
+        baseGlyph.addObserver(
+            self, "baseGlyphNameChangedNotificationCallback",
+            "Glyph.NameChanged")
+        layer.addObserver(
+            self, "layerGlyphWillBeDeletedNotificationCallback",
+            "Layer.GlyphWillBeDeleted")
+
+    def _endBaseGlyphObservations(self, baseGlyph=None):
+        if not isinstance(self.layer, TLayer):
+            super()._endBaseGlyphObservations(baseGlyph)
+            return
+        layer = self.layer
+        if baseGlyph is None:
+            baseGlyph = self.baseGlyph
+            if baseGlyph is None or baseGlyph not in layer:
+                return
+            baseGlyph = layer[baseGlyph]
+        if baseGlyph.hasObserver(self, "Glyph.NameChanged"):
+            baseGlyph.removeObserver(self, "Glyph.NameChanged")
+        if layer.hasObserver(self, "Layer.GlyphWillBeDeleted"):
+            layer.removeObserver(self, "Layer.GlyphWillBeDeleted")
+
     def _get_selected(self):
         return self._selected
 
@@ -526,6 +1852,143 @@ class TPoint(Point):
         doc="A boolean indicating the selected state of the point.")
 
 
+class TPackedPoint(TPoint):
+    """
+    A point of a TPackedContour. While in a contour it reads and writes the
+    contour's PointArray, otherwise it holds its own values.
+    """
+    __slots__ = ["_array", "_index", "__weakref__"]
+
+    def __init__(self, pt, selected=False, **kwargs):
+        super().__init__(pt, selected, **kwargs)
+        self._array = None
+        self._index = None
+
+    @classmethod
+    def viewPoint(cls, pointArray, index):
+        point = cls.__new__(cls)
+        point._array = pointArray
+        point._index = index
+        return point
+
+    def attachPoint(self, pointArray, index):
+        self._array = pointArray
+        self._index = index
+
+    def detachPoint(self, x, y, segmentType, smooth, name, identifier,
+                    selected):
+        self._x = x
+        self._y = y
+        self._segmentType = segmentType
+        self._smooth = smooth
+        self._name = name
+        self._identifier = identifier
+        self._selected = selected
+        self._array = None
+        self._index = None
+
+    def _get_x(self):
+        if self._array is None:
+            return self._x
+        return self._array.getX(self._index)
+
+    def _set_x(self, value):
+        if self._array is None:
+            self._x = value
+        else:
+            self._array.setX(self._index, value)
+
+    x = property(_get_x, _set_x, doc="The x coordinate.")
+
+    def _get_y(self):
+        if self._array is None:
+            return self._y
+        return self._array.getY(self._index)
+
+    def _set_y(self, value):
+        if self._array is None:
+            self._y = value
+        else:
+            self._array.setY(self._index, value)
+
+    y = property(_get_y, _set_y, doc="The y coordinate.")
+
+    def _get_segmentType(self):
+        if self._array is None:
+            return self._segmentType
+        return self._array.getSegmentType(self._index)
+
+    def _set_segmentType(self, value):
+        if self._array is None:
+            self._segmentType = value
+        else:
+            self._array.setSegmentType(self._index, value)
+
+    segmentType = property(
+        _get_segmentType, _set_segmentType, doc="The segment type.")
+
+    def _get_smooth(self):
+        if self._array is None:
+            return self._smooth
+        return self._array.getSmooth(self._index)
+
+    def _set_smooth(self, value):
+        if self._array is None:
+            self._smooth = value
+        else:
+            self._array.setSmooth(self._index, value)
+
+    smooth = property(
+        _get_smooth, _set_smooth,
+        doc="A boolean indicating the smooth state of the point.")
+
+    def _get_name(self):
+        if self._array is None:
+            return self._name
+        return self._array.getName(self._index)
+
+    def _set_name(self, value):
+        if self._array is None:
+            self._name = value
+        else:
+            self._array.setName(self._index, value)
+
+    name = property(
+        _get_name, _set_name, doc="An arbitrary name for the point.")
+
+    def _get_identifier(self):
+        if self._array is None:
+            return self._identifier
+        return self._array.getIdentifier(self._index)
+
+    def _set_identifier(self, value):
+        # don't allow overwritting an existing identifier
+        if self.identifier is not None:
+            return
+        if self._array is None:
+            self._identifier = value
+        else:
+            self._array.setIdentifier(self._index, value)
+
+    identifier = property(
+        _get_identifier, _set_identifier, doc="The identifier.")
+
+    def _get_selected(self):
+        if self._array is None:
+            return self._selected
+        return self._array.getSelected(self._index)
+
+    def _set_selected(self, value):
+        if self._array is None:
+            self._selected = value
+        else:
+            self._array.setSelected(self._index, value)
+
+    selected = property(
+        _get_selected, _set_selected,
+        doc="A boolean indicating the selected state of the point.")
+
+
 class TGuideline(Guideline):
 
     def __init__(self, *args, **kwargs):
@@ -644,6 +2107,21 @@ class UndoManager(QObject):
             self.canRedoChanged.emit(False)
 
 
+_defaultGlyphLoader = GlyphLoader()
+
+
+def _hasSelection(glyph):
+    if glyph._shallowLoadedContours is None:
+        for contour in glyph._contours:
+            for point in contour:
+                if point.selected:
+                    return True
+    for obj in glyph.components + glyph.anchors + glyph.guidelines:
+        if obj.selected:
+            return True
+    return glyph.image.selected
+
+
 def _scalePointFromCenter(point, scale, center):
     pointX, pointY = point
     scaleX, scaleY = scale
@@ -0,0 +1,82 @@
+"""
+Checking of feature files as they are edited.
+
+FeatureChecker waits for a pause in the edits, then compiles the text
+against the glyphs of the font on a QThread. The work lands in the font's
+FeatureCache, where exporting the font finds it.
+"""
+from PyQt5.QtCore import pyqtSignal, QObject, QThread, QTimer
+from trufont.tools.featureCache import officialGlyphOrder
+
+# how long to wait after an edit before compiling, in ms
+CHECK_DELAY = 400
+
+
+class _FeatureCheckThread(QThread):
+
+    def __init__(self, featureCache, text, glyphOrder, path, parent=None):
+        super().__init__(parent)
+        self.featureCache = featureCache
+        self.text = text
+        self.glyphOrder = glyphOrder
+        self.path = path
+        self.error = None
+
+    def run(self):
+        self.error = self.featureCache.check(
+            self.text, self.glyphOrder, self.path)
+
+
+class FeatureChecker(QObject):
+    """
+    Compiles the features text given to check() in the background, once
+    it hasn't changed for CHECK_DELAY ms.
+
+    checked is emitted with the error of the text (a FeatureLibError
+    usually), or None if it compiles.
+    """
+    checked = pyqtSignal(object)
+
+    def __init__(self, font, parent=None):
+        super().__init__(parent)
+        self.font = font
+        self._text = None
+        self._thread = None
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(CHECK_DELAY)
+        self._timer.timeout.connect(self._startCheck)
+
+    def check(self, text):
+        self._text = text
+        self._timer.start()
+
+    def _startCheck(self):
+        # a check is underway, start again once it's done
+        if self._thread is not None:
+            return
+        font = self.font
+        thread = _FeatureCheckThread(
+            font.featureCache(), self._text, officialGlyphOrder(font),
+            font.path, self)
+        thread.finished.connect(self._checkFinished)
+        self._thread = thread
+        thread.start()
+
+    def _checkFinished(self):
+        thread = self._thread
+        self._thread = None
+        thread.deleteLater()
+        if thread.text != self._text:
+            if not self._timer.isActive():
+                self._startCheck()
+            return
+        self.checked.emit(thread.error)
+
+    def wait(self):
+        """
+        Stops the pending check and waits for the running one to finish.
+        """
+        self._timer.stop()
+        if self._thread is not None:
+            self._thread.wait()
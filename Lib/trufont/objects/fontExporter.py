@@ -0,0 +1,476 @@
+"""
+Exporting of a font to a binary font off the main thread.
+
+TFont copies the font into an ExportSnapshot (plain data), which is compiled
+in a worker process so that the font can keep being edited and the export
+can be stopped at any time. The worker reports the compilation stages as it
+goes through them and hands back the updated CompileCache, so that the next
+export reuses the glyphs compiled by this one.
+"""
+from defcon import Font, Glyph, registerRepresentationFactory
+from fontTools.ttLib import TTFont
+from functools import partial
+from PyQt5.QtCore import pyqtSignal, QThread
+from trufont.representationFactories.glyphDigestFactory import (
+    GlyphDigestFactory)
+from trufont.tools.featureCache import (
+    CachedFeatureCompiler, LAYOUT_TABLES, officialGlyphOrder, otherTablesRe)
+from trufont.tools.glyphLoader import GlyphData
+from trufont.tools.incrementalCompiler import (
+    IncrementalOTFCompiler, IncrementalTTFCompiler)
+from ufo2ft import compileOTF, compileTTF
+from ufo2ft.featureCompiler import FeatureCompiler
+from ufoLib import fontInfoAttributesVersion3
+import copy
+import io
+import multiprocessing
+import os
+import tempfile
+import time
+
+EXPORT_FORMATS = ("otf", "ttf", "woff", "woff2")
+
+
+class ExportSnapshot(object):
+    """
+    What it takes to compile *font*: info, groups, kerning, lib, features
+    and the glyphs of the default layer, copied into plain data. export()
+    writes *format*, one of EXPORT_FORMATS. The curves of TrueType glyphs
+    are converted by *workerCount* processes.
+    """
+
+    def __init__(self, font, useProductionNames=False, optimizeCff=False,
+                 format="otf", workerCount=1):
+        self.useProductionNames = useProductionNames
+        self.optimizeCff = optimizeCff
+        self.format = format
+        self.workerCount = workerCount
+        self.info = {}
+        for attr in fontInfoAttributesVersion3:
+            value = getattr(font.info, attr)
+            if value is None:
+                continue
+            if attr == "guidelines":
+                value = [dict(guideline) for guideline in value]
+            self.info[attr] = copy.deepcopy(value)
+        self.groups = {
+            name: list(glyphs) for name, glyphs in font.groups.items()}
+        self.kerning = dict(font.kerning)
+        self.lib = copy.deepcopy(dict(font.lib))
+        self.features = font.features.text
+        self.path = font.path
+        self.glyphOrder = list(font.glyphOrder)
+        font.loadGlyphs()
+        self.glyphs = [
+            (glyph.name, GlyphData.fromGlyph(glyph)) for glyph in font]
+        self.compileCache = font.compileCache()
+        self.artifactCache = self.artifactKey = None
+
+    def setArtifact(self, artifactCache, key):
+        """
+        Has export() copy the binary font stored under *key* in
+        *artifactCache* if there is one, and store it there otherwise.
+        """
+        self.artifactCache = artifactCache
+        self.artifactKey = key
+
+    def stages(self):
+        """
+        Returns the names of the stages the compilation goes through.
+        """
+        stages = ["outlines", "features"]
+        if self.optimizeCff and self.format == "otf":
+            stages.append("subroutinization")
+        stages.append("save")
+        return stages
+
+    def makeFont(self):
+        font = Font()
+        # lets ufo2ft find features.fea includes
+        font._path = self.path
+        for attr, value in self.info.items():
+            setattr(font.info, attr, value)
+        font.groups.update(self.groups)
+        font.kerning.update(self.kerning)
+        font.lib.update(self.lib)
+        font.features.text = self.features
+        for glyphName, data in self.glyphs:
+            glyph = font.newGlyph(glyphName)
+            for attr, value in data.attributes.items():
+                setattr(glyph, attr, value)
+            data.drawPoints(glyph.getPointPen())
+        font.glyphOrder = self.glyphOrder
+        return font
+
+    def fileName(self):
+        """
+        Returns the name binary fonts of the snapshot are given, without
+        extension.
+        """
+        name = self.info.get("postscriptFontName")
+        if not name:
+            name = "{}-{}".format(
+                self.info.get("familyName"), self.info.get("styleName"))
+        return name.replace(" ", "").replace(os.sep, "_")
+
+    def compileOTF(self, font, reportStage=None, featureTables=None):
+        """
+        Compiles *font*, made by makeFont(), to an OpenType CFF font.
+        """
+        if reportStage is None:
+            def reportStage(stage):
+                pass
+        reportStage("outlines")
+        return compileOTF(
+            font,
+            outlineCompilerClass=partial(
+                IncrementalOTFCompiler, compileCache=self.compileCache),
+            featureCompilerClass=partial(
+                _FeatureCompiler, reportStage=reportStage,
+                nextStage="subroutinization" if self.optimizeCff else None,
+                featureTables=featureTables),
+            useProductionNames=self.useProductionNames,
+            optimizeCff=self.optimizeCff)
+
+    def compileTTF(self, font, reportStage=None, featureTables=None):
+        """
+        Compiles *font*, made by makeFont(), to a TrueType font.
+        """
+        if reportStage is not None:
+            reportStage("outlines")
+        return compileTTF(
+            font,
+            outlineCompilerClass=partial(
+                IncrementalTTFCompiler, compileCache=self.compileCache,
+                workerCount=self.workerCount),
+            featureCompilerClass=partial(
+                _FeatureCompiler, reportStage=reportStage,
+                featureTables=featureTables),
+            useProductionNames=self.useProductionNames)
+
+    def export(self, path, reportStage=None):
+        """
+        Compiles the snapshot to a binary font of its format at *path*,
+        calling *reportStage(name)* as each stage starts.
+        """
+        artifactCache = self.artifactCache
+        if artifactCache is not None and \
+                artifactCache.copyTo(self.artifactKey, path):
+            return
+        format = self.format
+        if format == "otf":
+            otf = self.compileOTF(self.makeFont(), reportStage)
+            otf.recalcBBoxes = False
+        else:
+            otf = self.compileTTF(self.makeFont(), reportStage)
+            if format != "ttf":
+                otf.flavor = format
+        if reportStage is not None:
+            reportStage("save")
+        saveFont(otf, path)
+        if artifactCache is not None:
+            artifactCache.put(self.artifactKey, path)
+
+    def exportFormats(self, formats, directory, fileName=None):
+        """
+        Compiles the snapshot to each of *formats* (see EXPORT_FORMATS) in
+        *directory*. Returns a {format: (path, seconds, error)} dict, error
+        being a message or None. Web fonts are made from the TrueType font
+        and their time doesn't account for compiling it.
+        """
+        if fileName is None:
+            fileName = self.fileName()
+        results = {}
+        font = self.makeFont()
+        # layout tables are compiled once for all formats
+        featureTables = {}
+        ttfData = None
+        for format in EXPORT_FORMATS:
+            if format not in formats:
+                continue
+            path = os.path.join(directory, "{}.{}".format(fileName, format))
+            start = time.perf_counter()
+            try:
+                if format == "otf":
+                    otf = self.compileOTF(font, featureTables=featureTables)
+                    otf.recalcBBoxes = False
+                    saveFont(otf, path)
+                else:
+                    if ttfData is None:
+                        ttf = self.compileTTF(
+                            font, featureTables=featureTables)
+                        stream = io.BytesIO()
+                        ttf.save(stream)
+                        ttfData = stream.getvalue()
+                    # tables are carried over as is, web fonts only compress
+                    # them
+                    ttf = TTFont(io.BytesIO(ttfData))
+                    if format != "ttf":
+                        ttf.flavor = format
+                    saveFont(ttf, path)
+            except Exception as e:
+                error = "{}: {}".format(e.__class__.__name__, e)
+            else:
+                error = None
+            results[format] = (path, time.perf_counter() - start, error)
+        return results
+
+
+def subsetGlyphNames(font, glyphNames):
+    """
+    Returns the names of *glyphNames* in *font* and of the base glyphs of
+    their components, recursively, in glyph order. .notdef is added if the
+    font has one.
+    """
+    subset = set()
+    stack = [name for name in glyphNames if name in font]
+    if ".notdef" in font:
+        stack.append(".notdef")
+    while stack:
+        name = stack.pop()
+        if name in subset:
+            continue
+        subset.add(name)
+        for component in font[name].components:
+            if component.baseGlyph in font:
+                stack.append(component.baseGlyph)
+    subsetNames = [name for name in font.glyphOrder if name in subset]
+    subsetNames.extend(sorted(subset.difference(subsetNames)))
+    return subsetNames
+
+
+def makeSubsetFont(font, glyphNames):
+    """
+    Returns a defcon Font with the glyphs of *glyphNames* (see
+    subsetGlyphNames()) copied from *font*, along with its info, lib and
+    the groups and kerning that apply to them. Features are left out.
+    """
+    subsetFont = Font()
+    subsetFont._path = font.path
+    for attr in fontInfoAttributesVersion3:
+        value = getattr(font.info, attr)
+        if value is None:
+            continue
+        if attr == "guidelines":
+            value = [dict(guideline) for guideline in value]
+        setattr(subsetFont.info, attr, copy.deepcopy(value))
+    glyphNames = set(glyphNames)
+    for name, members in font.groups.items():
+        members = [member for member in members if member in glyphNames]
+        if members:
+            subsetFont.groups[name] = members
+    for pair, value in font.kerning.items():
+        if all(side in glyphNames or side in subsetFont.groups
+               for side in pair):
+            subsetFont.kerning[pair] = value
+    subsetFont.lib.update(copy.deepcopy(dict(font.lib)))
+    for name in glyphNames:
+        subsetFont.newGlyph(name).copyDataFromGlyph(font[name])
+    subsetFont.glyphOrder = [
+        name for name in font.glyphOrder if name in glyphNames]
+    return subsetFont
+
+
+def compileSubsetFont(font, glyphNames, format="otf"):
+    """
+    Compiles the glyphs of *glyphNames* in TFont *font*, along with those
+    their components use, to a binary font of *format* (one of
+    EXPORT_FORMATS) for proofing. Returns the TTFont.
+
+    The features of the font are kept if they only refer to glyphs of the
+    subset. Glyphs and features come out of the font's caches when they
+    are there and are added to them otherwise.
+    """
+    subsetFont = makeSubsetFont(font, subsetGlyphNames(font, glyphNames))
+    featureCache = font.featureCache()
+    features = font.features.text or ""
+    if features.strip():
+        try:
+            featureCache.parse(
+                features, officialGlyphOrder(subsetFont), font.path)
+        except Exception:
+            pass
+        else:
+            subsetFont.features.text = features
+    featureCompilerClass = partial(
+        CachedFeatureCompiler, featureCache=featureCache)
+    if format == "otf":
+        otf = compileOTF(
+            subsetFont,
+            outlineCompilerClass=partial(
+                IncrementalOTFCompiler, compileCache=font.compileCache(),
+                pruneCache=False),
+            featureCompilerClass=featureCompilerClass,
+            useProductionNames=False)
+        otf.recalcBBoxes = False
+    else:
+        otf = compileTTF(
+            subsetFont,
+            outlineCompilerClass=partial(
+                IncrementalTTFCompiler, compileCache=font.compileCache(),
+                workerCount=font.glyphLoader.workerCount(),
+                pruneCache=False),
+            featureCompilerClass=featureCompilerClass,
+            useProductionNames=False)
+        if format != "ttf":
+            otf.flavor = format
+    return otf
+
+
+def saveFont(ttFont, path):
+    """
+    Saves *ttFont* next to *path* and swaps it in, so that an interrupted
+    save leaves no partial file behind.
+    """
+    dirName, fileName = os.path.split(os.path.abspath(path))
+    fd, tempPath = tempfile.mkstemp(prefix=".%s" % fileName, dir=dirName)
+    os.close(fd)
+    try:
+        ttFont.save(tempPath)
+        os.replace(tempPath, path)
+    except Exception:
+        try:
+            os.remove(tempPath)
+        except OSError:
+            pass
+        raise
+
+
+class _FeatureCompiler(FeatureCompiler):
+    """
+    Reports the features stage and the next one once done. When given a
+    *featureTables* dict, fills it with the compiled layout tables, or
+    takes them from it if a previous compilation already did.
+    """
+
+    def __init__(self, *args, reportStage=None, nextStage=None,
+                 featureTables=None, **kwargs):
+        if reportStage is not None:
+            reportStage("features")
+        self._reportStage = reportStage
+        self._nextStage = nextStage
+        self._featureTables = featureTables
+        super().__init__(*args, **kwargs)
+
+    def compile(self):
+        featureTables = self._featureTables
+        if featureTables:
+            # tables refer to glyphs by name, they don't depend on the
+            # glyph order of the format
+            for tag, table in featureTables.items():
+                self.outline[tag] = copy.deepcopy(table)
+            self.postProcess()
+        else:
+            super().compile()
+            features = getattr(self, "features", "")
+            if featureTables is not None and \
+                    not otherTablesRe.search(features):
+                for tag in LAYOUT_TABLES:
+                    if tag in self.outline:
+                        featureTables[tag] = copy.deepcopy(
+                            self.outline[tag])
+        if self._nextStage is not None:
+            self._reportStage(self._nextStage)
+
+
+def _exportSnapshot(snapshot, path, connection):
+    # runs in the worker process
+    registerRepresentationFactory(
+        Glyph, "TruFont.Digest", GlyphDigestFactory)
+    try:
+        snapshot.export(
+            path, lambda stage: connection.send(("stage", stage)))
+    except Exception as e:
+        try:
+            connection.send(("error", e))
+        except Exception:
+            # the exception doesn't pickle
+            connection.send(("error", RuntimeError(str(e))))
+    else:
+        connection.send(("done", snapshot.compileCache))
+    connection.close()
+
+
+class FontExporter(QThread):
+    """
+    Exports an ExportSnapshot of *font* to *path* in a worker process,
+    watched over from a QThread.
+
+    Use TFont.exportInBackground() rather than instantiating this directly.
+    stageChanged is emitted with the name of each stage (see
+    ExportSnapshot.stages()) and progressChanged with the number of stages
+    done so far. Once finished is emitted, *error* holds the exception
+    raised by the export, if any, and *cancelled* tells whether cancel()
+    was called.
+    """
+    stageChanged = pyqtSignal(str)
+    progressChanged = pyqtSignal(int, int)
+
+    def __init__(self, font, snapshot, path, parent=None):
+        super().__init__(parent)
+        self._font = font
+        self.snapshot = snapshot
+        self.path = path
+        self.format = snapshot.format
+        self.error = None
+        self.cancelled = False
+        self.compileCache = None
+        self._process = None
+        self.finished.connect(self._exportFinished)
+
+    def font(self):
+        return self._font
+
+    def run(self):
+        if self.cancelled:
+            return
+        # don't fork the GUI process
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        # not a daemon, so that it may start the processes that convert
+        # TrueType curves; cancel() stops it
+        process = context.Process(
+            target=_exportSnapshot, args=(self.snapshot, self.path, sender))
+        process.start()
+        self._process = process
+        sender.close()
+        if self.cancelled:
+            process.terminate()
+        stages = self.snapshot.stages()
+        done = False
+        while True:
+            try:
+                kind, value = receiver.recv()
+            except EOFError:
+                break
+            if kind == "stage":
+                self.stageChanged.emit(value)
+                self.progressChanged.emit(stages.index(value), len(stages))
+            elif kind == "error":
+                self.error = value
+                break
+            else:
+                self.compileCache = value
+                done = True
+                self.progressChanged.emit(len(stages), len(stages))
+                break
+        receiver.close()
+        process.join()
+        self._process = None
+        if not (done or self.cancelled or self.error is not None):
+            self.error = RuntimeError(
+                "export process exited with code {}".format(
+                    process.exitcode))
+
+    def cancel(self):
+        """
+        Stops the export. finished is emitted once the worker process is
+        gone.
+        """
+        self.cancelled = True
+        process = self._process
+        if process is not None:
+            process.terminate()
+
+    def _exportFinished(self):
+        self._font.finishBackgroundExport(self)
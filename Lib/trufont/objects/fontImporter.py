@@ -0,0 +1,227 @@
+"""
+Importing of binary fonts off the main thread.
+
+For OpenType and WOFF fonts, the metadata is extracted up front, then glyph
+outlines are decoded in chunks by a pool of worker processes (see
+trufont.tools.sfntReader). Chunks are added to the font in glyph order as
+they come back, and announced through glyphsAdded so that the font window
+fills up while the rest is being read. The glyph order of the font is set
+once at the end.
+
+Other formats are extracted as a whole by extractor, in a worker process
+as well.
+"""
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from defcon import Font
+from PyQt5.QtCore import pyqtSignal, QObject
+from trufont.tools import sfntReader
+from trufont.tools.glyphLoader import GlyphData
+from ufoLib import fontInfoAttributesVersion3
+import extractor
+import multiprocessing
+
+# number of glyphs decoded by a worker in one go
+CHUNK_SIZE = 200
+# formats whose glyphs we can decode ourselves, others go through extractor
+STREAMED_FORMATS = ("OTF", "WOFF")
+
+
+def _extractFont(path, fileFormat):
+    # runs in a worker process
+    font = Font()
+    extractor.extractUFO(path, font, format=fileFormat)
+    info = {}
+    for attr in fontInfoAttributesVersion3:
+        value = getattr(font.info, attr)
+        if value is None:
+            continue
+        if attr == "guidelines":
+            value = [dict(guideline) for guideline in value]
+        info[attr] = value
+    fontData = dict(
+        info=info,
+        groups={name: list(glyphs) for name, glyphs in font.groups.items()},
+        kerning=dict(font.kerning),
+        lib=dict(font.lib),
+        features=font.features.text,
+    )
+    glyphOrder = [name for name in font.glyphOrder if name in font]
+    glyphOrder.extend(sorted(set(font.keys()) - set(glyphOrder)))
+    glyphsData = [
+        (name, GlyphData.fromGlyph(font[name])) for name in glyphOrder]
+    return fontData, glyphsData
+
+
+class FontImporter(QObject):
+    """
+    Extracts the binary font at *path* into *font*.
+
+    Use TFont.extractInBackground() rather than instantiating this
+    directly. Once finished is emitted, *error* holds the exception raised
+    by the import, if any, and *cancelled* tells whether cancel() was
+    called; the glyphs read until then are kept in the font.
+    """
+    progressChanged = pyqtSignal(int, int)
+    # the names of glyphs added to the font, in order
+    glyphsAdded = pyqtSignal(list)
+    finished = pyqtSignal()
+    # emitted from the executor's thread, hence queued to ours
+    _chunkRead = pyqtSignal(object)
+    _fontExtracted = pyqtSignal(object)
+
+    def __init__(self, font, path, fileFormat, parent=None):
+        super().__init__(parent)
+        self._font = font
+        self.path = path
+        self.fileFormat = fileFormat
+        self.error = None
+        self.cancelled = False
+        self._executor = None
+        self._futures = []
+        self._chunks = []
+        self._readChunks = {}
+        self._nextChunk = 0
+        self._glyphCount = self._doneCount = 0
+        self._glyphOrder = []
+        self._unicodes = {}
+        self._running = True
+        self._chunkRead.connect(self._addChunk)
+        self._fontExtracted.connect(self._addExtractedFont)
+
+    def font(self):
+        return self._font
+
+    def isRunning(self):
+        return self._running
+
+    def start(self):
+        if not self._running:
+            return
+        font = self._font
+        if self.fileFormat not in STREAMED_FORMATS:
+            self._executor = _newExecutor(1)
+            future = self._executor.submit(
+                _extractFont, self.path, self.fileFormat)
+            future.add_done_callback(self._fontExtracted.emit)
+            self._futures.append(future)
+            return
+        try:
+            extractor.extractUFO(
+                self.path, font, doGlyphs=False, format=self.fileFormat)
+            glyphOrder, self._unicodes = sfntReader.readGlyphOrder(self.path)
+            # the glyph order is set once the glyphs are in
+            font.glyphOrder = []
+            font._holdGlyphOrder = True
+        except Exception as e:
+            self.error = e
+            self._finish()
+            return
+        self._chunks = [glyphOrder[i:i + CHUNK_SIZE]
+                        for i in range(0, len(glyphOrder), CHUNK_SIZE)]
+        self._glyphCount = len(glyphOrder)
+        if not self._chunks:
+            self._finish()
+            return
+        workerCount = min(font.glyphLoader.workerCount(), len(self._chunks))
+        self._executor = _newExecutor(workerCount)
+        for index, glyphNames in enumerate(self._chunks):
+            future = self._executor.submit(
+                sfntReader.readGlyphs, self.path, glyphNames)
+            future.chunkIndex = index
+            future.add_done_callback(self._chunkRead.emit)
+            self._futures.append(future)
+        self.progressChanged.emit(0, self._glyphCount)
+
+    def cancel(self):
+        """
+        Stops reading glyphs. finished is emitted right away.
+        """
+        if not self._running:
+            return
+        self.cancelled = True
+        self._finish()
+
+    # ---------
+    # Internals
+    # ---------
+
+    def _addChunk(self, future):
+        if not self._running:
+            return
+        try:
+            self._readChunks[future.chunkIndex] = future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            self.error = e
+            self._finish()
+            return
+        # keep the glyph order, ahead chunks wait for those before them
+        layer = self._font.layers.defaultLayer
+        glyphsData = []
+        while self._nextChunk in self._readChunks:
+            for glyphName, data in self._readChunks.pop(self._nextChunk):
+                data.attributes["unicodes"] = self._unicodes.get(
+                    glyphName, [])
+                glyphsData.append((glyphName, data))
+            self._nextChunk += 1
+        if glyphsData:
+            glyphNames = [glyph.name for glyph in layer.addGlyphsFromData(
+                glyphsData)]
+            self._glyphOrder.extend(glyphNames)
+            self._doneCount += len(glyphNames)
+            self.glyphsAdded.emit(glyphNames)
+            self.progressChanged.emit(self._doneCount, self._glyphCount)
+        if self._nextChunk == len(self._chunks):
+            self._finish()
+
+    def _addExtractedFont(self, future):
+        if not self._running:
+            return
+        try:
+            fontData, glyphsData = future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            self.error = e
+            self._finish()
+            return
+        font = self._font
+        for attr, value in fontData["info"].items():
+            setattr(font.info, attr, value)
+        font.groups.update(fontData["groups"])
+        font.kerning.update(fontData["kerning"])
+        font.lib.update(fontData["lib"])
+        font.features.text = fontData["features"]
+        font.glyphOrder = []
+        font._holdGlyphOrder = True
+        layer = font.layers.defaultLayer
+        glyphNames = [glyph.name for glyph in layer.addGlyphsFromData(
+            glyphsData)]
+        self._glyphOrder = glyphNames
+        self._glyphCount = self._doneCount = len(glyphNames)
+        self.glyphsAdded.emit(glyphNames)
+        self.progressChanged.emit(self._doneCount, self._glyphCount)
+        self._finish()
+
+    def _finish(self):
+        self._running = False
+        if self._executor is not None:
+            for future in self._futures:
+                future.cancel()
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        self._futures = []
+        self._readChunks = {}
+        font = self._font
+        if font._holdGlyphOrder:
+            font._holdGlyphOrder = False
+            font.glyphOrder = self._glyphOrder
+        font.finishBackgroundExtract(self)
+        self.finished.emit()
+
+
+def _newExecutor(workerCount):
+    # don't fork the GUI process
+    return ProcessPoolExecutor(
+        workerCount, mp_context=multiprocessing.get_context("spawn"))
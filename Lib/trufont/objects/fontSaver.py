@@ -0,0 +1,277 @@
+"""
+Saving of a font off the main thread.
+
+TFont captures what needs to be written in a FontSnapshot (plain data only,
+so the font can keep being edited) and FontSaver writes it on a QThread.
+Only the files being rewritten are staged, in a temporary directory next to
+the UFO. Once they all are, a manifest of the staged files and of the files
+to delete is written, and the staged files are moved over those of the UFO
+one atomic rename at a time, glyphs first and contents last. If that is cut
+short, recoverInterruptedSave() finishes it from the manifest.
+"""
+from PyQt5.QtCore import pyqtSignal, QThread
+from ufoLib import (
+    FEATURES_FILENAME, FONTINFO_FILENAME, GROUPS_FILENAME, KERNING_FILENAME,
+    LIB_FILENAME, UFOWriter, fontInfoAttributesVersion3)
+from ufoLib.glifLib import LAYERINFO_FILENAME, GlyphSet
+from trufont.tools.glyphLoader import GlyphData
+import copy
+import glob
+import os
+import plistlib
+import shutil
+import tempfile
+
+STAGING_PREFIX = ".trufont-save-"
+# name of the staged UFO files in the staging directory
+STAGED_NAME = "staged"
+# written once everything is staged, then the save can be finished
+MANIFEST_NAME = "manifest.plist"
+
+
+def recoverInterruptedSave(path):
+    """
+    Cleans up after saves of the UFO at *path* that were cut short. If
+    the staged files were being moved in, the rest of them are.
+    """
+    path = os.path.normpath(os.path.abspath(path))
+    pattern = os.path.join(
+        glob.escape(os.path.dirname(path)), STAGING_PREFIX + "*")
+    for stagingDir in glob.glob(pattern):
+        if not os.path.isdir(stagingDir):
+            continue
+        manifest = _readManifest(stagingDir)
+        if manifest is not None and os.path.isdir(path):
+            _moveStagedFiles(stagingDir, path, manifest)
+        shutil.rmtree(stagingDir, ignore_errors=True)
+
+
+def _readManifest(stagingDir):
+    try:
+        with open(os.path.join(stagingDir, MANIFEST_NAME), "rb") as file:
+            return plistlib.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _writeManifest(stagingDir, manifest):
+    path = os.path.join(stagingDir, MANIFEST_NAME)
+    tempPath = path + ".tmp"
+    with open(tempPath, "wb") as file:
+        plistlib.dump(manifest, file)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tempPath, path)
+
+
+def _moveStagedFiles(stagingDir, path, manifest):
+    stagedPath = os.path.join(stagingDir, STAGED_NAME)
+    for relPath in manifest["files"]:
+        stagedFile = os.path.join(stagedPath, relPath)
+        # those that are gone were moved in before the save was cut short
+        if os.path.exists(stagedFile):
+            os.replace(stagedFile, os.path.join(path, relPath))
+    for relPath in manifest["deletedFiles"]:
+        try:
+            os.remove(os.path.join(path, relPath))
+        except FileNotFoundError:
+            pass
+
+
+class _InfoData(object):
+    pass
+
+
+class LayerSnapshot(object):
+    """
+    What to write for one layer: the glyphs that changed, as GlyphData,
+    and the names of deleted glyphs.
+    """
+
+    def __init__(self, layer, formatVersion):
+        self.name = layer.name
+        self.dirName = os.path.basename(layer._glyphSet.dirName)
+        self.glyphs = dict()
+        for glyph in layer.dirtyGlyphs():
+            if glyph.template:
+                continue
+            self.glyphs[glyph.name] = GlyphData.fromGlyph(glyph)
+        self.deletedGlyphNames = list(layer._scheduledForDeletion.keys())
+        self.info = None
+        if formatVersion >= 3:
+            self.info = _InfoData()
+            self.info.color = layer.color
+            self.info.lib = copy.deepcopy(dict(layer.lib))
+
+    def __len__(self):
+        return len(self.glyphs) + len(self.deletedGlyphNames)
+
+
+class FontSnapshot(object):
+    """
+    The changed parts of *font*, copied into plain data on the main thread.
+    Only those parts are written, everything else is carried over from the
+    UFO on disk.
+    """
+
+    def __init__(self, font):
+        self.path = font.path
+        self.formatVersion = font.ufoFormatVersion
+        self.kerningGroupConversionRenameMaps = None
+        if self.formatVersion < 3:
+            self.kerningGroupConversionRenameMaps = \
+                font._kerningGroupConversionRenameMaps
+        self.info = self.groups = self.kerning = self.lib = None
+        self.features = None
+        if font._info is not None and font._info.dirty:
+            self.info = _InfoData()
+            for attr in fontInfoAttributesVersion3:
+                value = getattr(font.info, attr)
+                if attr == "guidelines":
+                    value = [dict(guideline) for guideline in value]
+                setattr(self.info, attr, copy.deepcopy(value))
+        if font._groups is not None and font._groups.dirty:
+            self.groups = {
+                name: list(glyphs) for name, glyphs in font.groups.items()}
+        if font._kerning is not None and font._kerning.dirty:
+            self.kerning = dict(font.kerning)
+        if font._lib is not None and font._lib.dirty:
+            self.lib = copy.deepcopy(dict(font.lib))
+        self.featuresChanged = \
+            font._features is not None and font._features.dirty
+        if self.featuresChanged:
+            self.features = font.features.text
+        self.layers = [
+            LayerSnapshot(layer, self.formatVersion) for layer in font.layers]
+
+    def writeCount(self):
+        return sum(len(layer) for layer in self.layers) + 1
+
+    def write(self, progress=None):
+        """
+        Writes the snapshot, calling *progress(done, total)* as it goes.
+        """
+        path = os.path.normpath(self.path)
+        stagingDir = tempfile.mkdtemp(
+            prefix=STAGING_PREFIX, dir=os.path.dirname(path))
+        try:
+            stagedPath = os.path.join(stagingDir, STAGED_NAME)
+            total = self.writeCount()
+            done = 0
+            glyphFiles, layerFiles, fontFiles, deletedFiles = [], [], [], []
+            # metadata
+            writer = UFOWriter(stagedPath, formatVersion=self.formatVersion)
+            if self.kerningGroupConversionRenameMaps is not None:
+                writer.setKerningGroupConversionRenameMaps(
+                    self.kerningGroupConversionRenameMaps)
+            if self.info is not None:
+                writer.writeInfo(self.info)
+            if self.groups is not None:
+                writer.writeGroups(self.groups)
+            if self.kerning is not None:
+                writer.writeKerning(self.kerning)
+            if self.lib is not None:
+                writer.writeLib(self.lib)
+            if self.featuresChanged and self.features is not None:
+                writer.writeFeatures(self.features)
+            for fileName, changed in (
+                    (FONTINFO_FILENAME, self.info is not None),
+                    (GROUPS_FILENAME, self.groups is not None),
+                    (KERNING_FILENAME, self.kerning is not None),
+                    (LIB_FILENAME, self.lib is not None),
+                    (FEATURES_FILENAME, self.featuresChanged)):
+                if not changed:
+                    continue
+                # empty data isn't written, the file goes away
+                if os.path.exists(os.path.join(stagedPath, fileName)):
+                    fontFiles.append(fileName)
+                else:
+                    deletedFiles.append(fileName)
+            done += 1
+            # glyphs
+            for layer in self.layers:
+                stagedLayerPath = os.path.join(stagedPath, layer.dirName)
+                os.mkdir(stagedLayerPath)
+                glyphSet = GlyphSet(
+                    os.path.join(path, layer.dirName),
+                    ufoFormatVersion=self.formatVersion)
+                # keep the contents of the UFO, but write to the staging
+                # directory
+                glyphSet.dirName = stagedLayerPath
+                for glyphName, data in sorted(layer.glyphs.items()):
+                    glyphSet.writeGlyph(glyphName, data, data.drawPoints)
+                    glyphFiles.append(os.path.join(
+                        layer.dirName, glyphSet.contents[glyphName]))
+                    done += 1
+                    if progress is not None and not done % 100:
+                        progress(done, total)
+                for glyphName in layer.deletedGlyphNames:
+                    fileName = glyphSet.contents.pop(glyphName, None)
+                    if fileName is not None:
+                        deletedFiles.append(
+                            os.path.join(layer.dirName, fileName))
+                    done += 1
+                glyphSet.writeContents()
+                layerFiles.append(
+                    os.path.join(layer.dirName, "contents.plist"))
+                if layer.info is not None:
+                    glyphSet.writeLayerInfo(layer.info)
+                    layerFiles.append(
+                        os.path.join(layer.dirName, LAYERINFO_FILENAME))
+            # move the staged files in, glyphs before the contents that
+            # reference them
+            manifest = dict(
+                files=glyphFiles + layerFiles + fontFiles,
+                deletedFiles=deletedFiles,
+            )
+            _writeManifest(stagingDir, manifest)
+            _moveStagedFiles(stagingDir, path, manifest)
+            os.utime(path)
+            if progress is not None:
+                progress(total, total)
+        finally:
+            shutil.rmtree(stagingDir, ignore_errors=True)
+
+
+class FontSaver(QThread):
+    """
+    Writes a FontSnapshot of *font* on a worker thread.
+
+    Use TFont.saveInBackground() rather than instantiating this directly.
+    Progress is also posted to the font's notification backend as
+    fontSaveProgress. The font is brought up to date with the save once
+    finished is emitted; *error* then holds the exception raised by the
+    save, if any.
+    """
+    progressChanged = pyqtSignal(int, int)
+
+    def __init__(self, font, snapshot, parent=None):
+        super().__init__(parent)
+        self._font = font
+        self.snapshot = snapshot
+        self.error = None
+        # emitted from the worker thread, queued to ours
+        self.progressChanged.connect(self._postProgress)
+        self.finished.connect(self._saveFinished)
+
+    def font(self):
+        return self._font
+
+    def run(self):
+        try:
+            self.snapshot.write(self.progressChanged.emit)
+        except Exception as e:
+            self.error = e
+
+    def _postProgress(self, done, total):
+        font = self._font
+        data = dict(
+            font=font,
+            path=self.snapshot.path,
+            done=done,
+            total=total,
+        )
+        font.notificationBackend.postNotification("fontSaveProgress", data)
+
+    def _saveFinished(self):
+        self._font.finishBackgroundSave(self)
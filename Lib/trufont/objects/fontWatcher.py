@@ -0,0 +1,161 @@
+"""
+Detection of changes made to open UFOs by other applications.
+
+FontWatcher compares a font against its UFOFileIndex when the file system
+reports activity under the UFO (falling back to polling where the file
+system can't be watched), then posts a "fontChangedExternally"
+notification that lists exactly what changed.
+"""
+from PyQt5.QtCore import QFileSystemWatcher, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+import os
+
+# time given to other applications to finish writing, in milliseconds
+SETTLE_DELAY = 250
+# interval between two scans of the fonts that can't be watched
+POLL_INTERVAL = 2000
+
+
+class FontWatcher(QObject):
+    """
+    Watches the UFOs of the fonts that have a window open and posts
+    "fontChangedExternally" when other applications change them.
+
+    Saves made by TruFont aren't reported since TFont keeps its file index
+    up to date as it writes.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._fonts = set()
+        self._pendingFonts = set()
+        self._polledFonts = set()
+        self._fileSystemWatcher = QFileSystemWatcher(self)
+        self._fileSystemWatcher.fileChanged.connect(self._pathChanged)
+        self._fileSystemWatcher.directoryChanged.connect(self._pathChanged)
+        self._settleTimer = QTimer(self)
+        self._settleTimer.setSingleShot(True)
+        self._settleTimer.setInterval(SETTLE_DELAY)
+        self._settleTimer.timeout.connect(self.checkPendingFonts)
+        self._pollTimer = QTimer(self)
+        self._pollTimer.setInterval(POLL_INTERVAL)
+        self._pollTimer.timeout.connect(self._poll)
+
+        app = QApplication.instance()
+        dispatcher = app.dispatcher
+        dispatcher.addObserver(self, "_fontOpened", "fontWindowOpened")
+        dispatcher.addObserver(self, "_fontWillClose", "fontWindowWillClose")
+        dispatcher.addObserver(self, "_fontSaved", "fontSaved")
+
+    def fonts(self):
+        return list(self._fonts)
+
+    def watchFont(self, font):
+        self._fonts.add(font)
+        self._watchPaths(font)
+
+    def unwatchFont(self, font):
+        self._fonts.discard(font)
+        self._pendingFonts.discard(font)
+        self._polledFonts.discard(font)
+        if not self._polledFonts:
+            self._pollTimer.stop()
+        watcher = self._fileSystemWatcher
+        watchedPaths = set(watcher.files()) | set(watcher.directories())
+        paths = [path for path in watchedPaths
+                 if self._fontForPath(path) is None]
+        if paths:
+            watcher.removePaths(paths)
+
+    def checkPendingFonts(self):
+        """
+        Looks for changes in the fonts that had file system activity.
+        """
+        fonts = self._pendingFonts
+        self._pendingFonts = set()
+        for font in fonts:
+            # look again once the save is through
+            if font.isSavingInBackground():
+                self._pendingFonts.add(font)
+                continue
+            self._checkFont(font)
+        if self._pendingFonts:
+            self._settleTimer.start()
+
+    # ---------
+    # Internals
+    # ---------
+
+    def _watchPaths(self, font):
+        index = font.fileIndex()
+        if index is None:
+            return
+        watcher = self._fileSystemWatcher
+        watchedPaths = set(watcher.files()) | set(watcher.directories())
+        paths = [path for path in index.paths() if path not in watchedPaths]
+        failedPaths = watcher.addPaths(paths) if paths else []
+        if failedPaths:
+            self._polledFonts.add(font)
+            if not self._pollTimer.isActive():
+                self._pollTimer.start()
+        else:
+            self._polledFonts.discard(font)
+
+    def _fontForPath(self, path):
+        for font in self._fonts:
+            fontPath = font.path
+            if fontPath is None:
+                continue
+            if path == fontPath or path.startswith(fontPath + os.sep):
+                return font
+        return None
+
+    def _pathChanged(self, path):
+        font = self._fontForPath(path)
+        if font is None:
+            return
+        self._pendingFonts.add(font)
+        self._settleTimer.start()
+
+    def _poll(self):
+        self._pendingFonts |= self._polledFonts
+        self.checkPendingFonts()
+
+    def _checkFont(self, font):
+        index = font.fileIndex()
+        if index is None:
+            return
+        try:
+            changes = index.changes()
+        except OSError:
+            # moved away or being swapped, try again later
+            self._polledFonts.add(font)
+            if not self._pollTimer.isActive():
+                self._pollTimer.start()
+            return
+        # files replaced by a rename aren't watched anymore
+        self._watchPaths(font)
+        if changes is None:
+            return
+        app = QApplication.instance()
+        data = dict(font=font)
+        data.update(changes)
+        app.postNotification("fontChangedExternally", data)
+
+    # -------------
+    # Notifications
+    # -------------
+
+    def _fontOpened(self, notification):
+        self.watchFont(notification.data["font"])
+
+    def _fontWillClose(self, notification):
+        self.unwatchFont(notification.data["font"])
+
+    def _fontSaved(self, notification):
+        font = notification.data["font"]
+        if font not in self._fonts:
+            return
+        # the font may have been saved to another path or swapped in place
+        self.unwatchFont(font)
+        self.watchFont(font)
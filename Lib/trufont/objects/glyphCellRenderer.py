@@ -0,0 +1,233 @@
+"""
+Drawing of glyph cells on worker threads.
+
+The cell view asks for the "TruFont.GlyphCellImage" representation of the
+glyphs it shows, which is empty at first, and hands these to a
+GlyphCellRenderer along with the glyphs around them. The renderer snapshots
+the glyphs on the main thread, draws the cells onto QImages on a thread
+pool, then fills in the representations. Since these are representations,
+editing a glyph drops its cell and changing the cell size asks for new
+ones. Where Qt can't draw text outside the main thread, the cells are drawn
+on the main thread a few at a time instead.
+
+The pixmaps of the cells are kept in a GlyphCellCache, which empties the
+least recently shown cells once they take more than a given size.
+"""
+from PyQt5.QtCore import pyqtSignal, QObject, QRunnable, QThreadPool, QTimer
+from PyQt5.QtGui import QFontDatabase, QPixmap
+from trufont.representationFactories.glyphCellFactory import (
+    FontCellSnapshot, GlyphCellSnapshot, drawGlyphCellImage)
+from collections import OrderedDict
+import os
+import threading
+
+# cells have little to draw, past that many threads they wait on the GIL
+MAX_THREAD_COUNT = 4
+# cells drawn per event loop iteration, without threads
+MAIN_THREAD_BATCH_SIZE = 8
+
+
+def _snapshot(glyph, fontSnapshots):
+    font = glyph.font
+    fontSnapshot = fontSnapshots.get(id(font))
+    if fontSnapshot is None:
+        fontSnapshot = fontSnapshots[id(font)] = FontCellSnapshot(font)
+    return GlyphCellSnapshot(glyph, fontSnapshot)
+
+
+class GlyphCellCache(object):
+    """
+    Keeps track of the pixmaps of GlyphCellImages, and drops those of the
+    least recently used ones past *maxSize* bytes.
+    """
+
+    def __init__(self, maxSize):
+        self.maxSize = maxSize
+        # id(cellImage): (cellImage, size)
+        self._cellImages = OrderedDict()
+        self._size = 0
+
+    def __len__(self):
+        return len(self._cellImages)
+
+    def size(self):
+        return self._size
+
+    def add(self, cellImage):
+        pixmap = cellImage.pixmap
+        size = pixmap.width() * pixmap.height() * pixmap.depth() // 8
+        key = id(cellImage)
+        item = self._cellImages.pop(key, None)
+        if item is not None:
+            self._size -= item[1]
+        self._cellImages[key] = (cellImage, size)
+        self._size += size
+        self.evict()
+
+    def touch(self, cellImage):
+        """
+        Marks *cellImage* as recently used.
+        """
+        key = id(cellImage)
+        if key in self._cellImages:
+            self._cellImages.move_to_end(key)
+
+    def evict(self):
+        # keep the last one, even if it doesn't fit
+        cellImages = self._cellImages
+        while self._size > self.maxSize and len(cellImages) > 1:
+            _, (cellImage, size) = cellImages.popitem(last=False)
+            cellImage.pixmap = None
+            self._size -= size
+
+    def clear(self):
+        for cellImage, _ in self._cellImages.values():
+            cellImage.pixmap = None
+        self._cellImages.clear()
+        self._size = 0
+
+
+class _RenderTask(QRunnable):
+
+    def __init__(self, renderer):
+        super().__init__()
+        self.renderer = renderer
+
+    def run(self):
+        self.renderer._renderQueued()
+
+
+class GlyphCellRenderer(QObject):
+    """
+    Draws GlyphCellImages on *threadCount* threads (defaults to the number
+    of CPUs, up to MAX_THREAD_COUNT, or none if the platform doesn't support
+    threaded font rendering), keeping up to *cacheSize* bytes of their
+    pixmaps.
+
+    render() replaces the cells waiting to be drawn, cellsRendered is
+    emitted on the main thread once some are ready.
+    """
+    cellsRendered = pyqtSignal()
+    _cellsReady = pyqtSignal()
+
+    def __init__(self, threadCount=None, cacheSize=128 * 1024 * 1024,
+                 parent=None):
+        super().__init__(parent)
+        self._cache = GlyphCellCache(cacheSize)
+        if threadCount is None:
+            if QFontDatabase.supportsThreadedFontRendering():
+                threadCount = min(os.cpu_count() or 1, MAX_THREAD_COUNT)
+            else:
+                threadCount = 0
+        self._threadCount = threadCount
+        self._threadPool = QThreadPool(self)
+        self._threadPool.setMaxThreadCount(max(1, threadCount))
+        self._lock = threading.Lock()
+        # id(cellImage): (cellImage, glyphSnapshot)
+        self._queue = OrderedDict()
+        self._rendering = set()
+        self._renderedCells = []
+        self._taskCount = 0
+        self._batchPending = False
+        self._cellsReady.connect(self._deliverCells)
+
+    def cache(self):
+        return self._cache
+
+    def threadCount(self):
+        return self._threadCount
+
+    def render(self, glyphs, cellImages):
+        """
+        Queues the GlyphCellImages *cellImages* of *glyphs* to be drawn, in
+        order. Cells queued before that aren't among these are dropped.
+        """
+        fontSnapshots = {}
+        with self._lock:
+            previousQueue = self._queue
+            rendering = set(self._rendering)
+        queue = OrderedDict()
+        for glyph, cellImage in zip(glyphs, cellImages):
+            key = id(cellImage)
+            if cellImage.pixmap is not None or key in rendering or \
+                    key in queue:
+                continue
+            item = previousQueue.get(key)
+            if item is None:
+                item = (cellImage, _snapshot(glyph, fontSnapshots))
+            queue[key] = item
+        if not self._threadCount:
+            self._queue = queue
+            if queue and not self._batchPending:
+                self._batchPending = True
+                QTimer.singleShot(0, self._renderBatch)
+            return
+        with self._lock:
+            self._queue = queue
+            taskCount = min(
+                len(queue), self.threadCount()) - self._taskCount
+            self._taskCount += max(0, taskCount)
+        for _ in range(taskCount):
+            self._threadPool.start(_RenderTask(self))
+
+    def renderNow(self, glyphs, cellImages):
+        """
+        Draws the GlyphCellImages *cellImages* of *glyphs* right away, on the
+        calling thread.
+        """
+        fontSnapshots = {}
+        for glyph, cellImage in zip(glyphs, cellImages):
+            image = drawGlyphCellImage(
+                _snapshot(glyph, fontSnapshots), **cellImage.arguments)
+            cellImage.pixmap = QPixmap.fromImage(image)
+            self._cache.add(cellImage)
+
+    def clear(self):
+        """
+        Drops the cells waiting to be drawn and waits for those being drawn.
+        """
+        with self._lock:
+            self._queue = OrderedDict()
+        self._threadPool.waitForDone()
+        self._deliverCells()
+
+    def _renderQueued(self):
+        # runs on the thread pool
+        while True:
+            with self._lock:
+                if not self._queue:
+                    self._taskCount -= 1
+                    return
+                key, (cellImage, glyphSnapshot) = self._queue.popitem(
+                    last=False)
+                self._rendering.add(key)
+            image = drawGlyphCellImage(glyphSnapshot, **cellImage.arguments)
+            with self._lock:
+                self._renderedCells.append((cellImage, image))
+            self._cellsReady.emit()
+
+    def _renderBatch(self):
+        # runs on the main thread, without threads
+        self._batchPending = False
+        queue = self._queue
+        for _ in range(min(len(queue), MAIN_THREAD_BATCH_SIZE)):
+            _, (cellImage, glyphSnapshot) = queue.popitem(last=False)
+            image = drawGlyphCellImage(glyphSnapshot, **cellImage.arguments)
+            self._renderedCells.append((cellImage, image))
+        self._deliverCells()
+        if self._queue and not self._batchPending:
+            self._batchPending = True
+            QTimer.singleShot(0, self._renderBatch)
+
+    def _deliverCells(self):
+        with self._lock:
+            renderedCells = self._renderedCells
+            self._renderedCells = []
+            for cellImage, _ in renderedCells:
+                self._rendering.discard(id(cellImage))
+        if not renderedCells:
+            return
+        for cellImage, image in renderedCells:
+            cellImage.pixmap = QPixmap.fromImage(image)
+            self._cache.add(cellImage)
+        self.cellsRendered.emit()
@@ -0,0 +1,88 @@
+class LazyGlyphList(object):
+    """
+    A list of glyphs that is backed by glyph names and only pulls a glyph
+    out of its font (parsing its .glif file if needed) when it is accessed.
+
+    This is what FontWindow hands to its cell view so that opening a font
+    does not depend on glyph count.
+    """
+
+    def __init__(self, font, glyphNames=None):
+        self._font = font
+        if glyphNames is None:
+            glyphNames = []
+        self._glyphNames = list(glyphNames)
+        # glyphName: index, built on lookup
+        self._indexes = None
+
+    def font(self):
+        return self._font
+
+    def glyphNames(self):
+        return list(self._glyphNames)
+
+    def setGlyphNames(self, glyphNames):
+        self._glyphNames = list(glyphNames)
+        self._indexes = None
+
+    def addGlyphNames(self, glyphNames):
+        self._glyphNames.extend(glyphNames)
+        self._indexes = None
+
+    def glyphName(self, index):
+        return self._glyphNames[index]
+
+    def isLoaded(self, index):
+        layer = self._font.layers.defaultLayer
+        return layer.isGlyphLoaded(self._glyphNames[index])
+
+    def glyphIndexes(self):
+        """
+        Returns a mapping of glyph names to their index in the list (the
+        first one, if a name is listed more than once).
+        """
+        if self._indexes is None:
+            indexes = self._indexes = {}
+            for index, name in enumerate(self._glyphNames):
+                indexes.setdefault(name, index)
+        return self._indexes
+
+    def loadedGlyphs(self):
+        layer = self._font.layers.defaultLayer
+        glyphs = []
+        for name in self._glyphNames:
+            # listing glyphs doesn't make them recently used
+            glyph = layer.loadedGlyph(name)
+            if glyph is not None:
+                glyphs.append(glyph)
+        return glyphs
+
+    # list behavior
+
+    def __len__(self):
+        return len(self._glyphNames)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.__class__(self._font, self._glyphNames[index])
+        return self._font[self._glyphNames[index]]
+
+    def __iter__(self):
+        font = self._font
+        for name in self._glyphNames:
+            yield font[name]
+
+    def __contains__(self, glyph):
+        if glyph is None:
+            return False
+        return glyph.name in self.glyphIndexes()
+
+    def index(self, glyph):
+        try:
+            return self.glyphIndexes()[glyph.name]
+        except KeyError:
+            raise ValueError("%r is not in list" % glyph.name)
+
+    def append(self, glyph):
+        self._glyphNames.append(glyph.name)
+        self._indexes = None
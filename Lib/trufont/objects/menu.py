@@ -99,6 +99,8 @@ class Entries(object):
     File_Close = "&Close"
     File_Reload = "&Revert to Saved"
     File_Export = "&Export…"
+    File_Export_All = "Export All &Fonts…"
+    File_Export_Selection = "Export Se&lection…"
     File_Exit = "E&xit"
 
     Edit = "&Edit"
@@ -203,6 +205,8 @@ def globalMenuBar():
     fileMenu.fetchAction(Entries.File_Reload)
     fileMenu.addSeparator()
     fileMenu.fetchAction(Entries.File_Export)
+    fileMenu.fetchAction(Entries.File_Export_Selection)
+    fileMenu.fetchAction(Entries.File_Export_All)
     fileMenu.fetchAction(Entries.File_Exit)
 
     editMenu = menuBar.fetchMenu(Entries.Edit)
@@ -0,0 +1,307 @@
+"""
+Compact storage for the points of a contour.
+
+PointArray keeps coordinates in float arrays and point attributes in a byte
+array, with names and identifiers on the side only when some point has
+them. It stands in for the list of points of TPackedContour: point objects
+(TPackedPoint) are views onto one index of the array, made as they are
+asked for and dropped once nobody holds them.
+"""
+from array import array
+import weakref
+
+SEGMENT_TYPES = (None, "move", "line", "curve", "qcurve")
+
+_SEGMENT_TYPE_CODES = {
+    segmentType: code for code, segmentType in enumerate(SEGMENT_TYPES)}
+_SEGMENT_TYPE_MASK = 0x07
+_SMOOTH = 0x08
+_SELECTED = 0x10
+# coordinates are stored as floats, these keep track of integers
+_INT_X = 0x20
+_INT_Y = 0x40
+
+# dead views are pruned past this many
+_MAX_VIEWS = 64
+
+
+def _packFlags(x, y, segmentType, smooth, selected):
+    flags = _SEGMENT_TYPE_CODES[segmentType]
+    if smooth:
+        flags |= _SMOOTH
+    if selected:
+        flags |= _SELECTED
+    if isinstance(x, int):
+        flags |= _INT_X
+    if isinstance(y, int):
+        flags |= _INT_Y
+    return flags
+
+
+class PointArray(object):
+    """
+    A list of points backed by arrays. Points inserted into it become views
+    of the array until they are removed, so references held to them keep
+    working; *pointClass* must provide attachPoint() and detachPoint() for
+    that (see TPackedPoint).
+    """
+    __slots__ = ["pointClass", "_xs", "_ys", "_flags", "_extras", "_views"]
+
+    def __init__(self, pointClass, points=()):
+        self.pointClass = pointClass
+        self._xs = array("d")
+        self._ys = array("d")
+        self._flags = bytearray()
+        # (name, identifier) per point, once one of them is set
+        self._extras = None
+        # {index: weakref} of the point objects handed out
+        self._views = None
+        self.extend(points)
+
+    # -------------
+    # List behavior
+    # -------------
+
+    def __len__(self):
+        return len(self._flags)
+
+    def __iter__(self):
+        for index in range(len(self._flags)):
+            yield self._view(index)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._view(i)
+                    for i in range(*index.indices(len(self._flags)))]
+        count = len(self._flags)
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("point index out of range")
+        return self._view(index)
+
+    def __contains__(self, point):
+        return getattr(point, "_array", None) is self
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def index(self, point):
+        if getattr(point, "_array", None) is not self:
+            raise ValueError("point not in contour")
+        return point._index
+
+    def append(self, point):
+        self.insert(len(self._flags), point)
+
+    def extend(self, points):
+        for point in list(points):
+            self.insert(len(self._flags), point)
+
+    def insert(self, index, point):
+        count = len(self._flags)
+        if index < 0:
+            index = max(0, index + count)
+        index = min(index, count)
+        values = (point.x, point.y, point.segmentType, point.smooth,
+                  point.name, point.identifier,
+                  getattr(point, "selected", False))
+        self._insertValues(index, *values)
+        if point.__class__ is self.pointClass:
+            oldArray = getattr(point, "_array", None)
+            if oldArray is not None:
+                oldArray._dropView(point)
+            point.attachPoint(self, index)
+            if self._views is None:
+                self._views = {}
+            self._views[index] = weakref.ref(point)
+
+    def remove(self, point):
+        index = self.index(point)
+        self._dropView(point)
+        point.detachPoint(*self.pointValues(index))
+        del self._xs[index]
+        del self._ys[index]
+        del self._flags[index]
+        if self._extras is not None:
+            del self._extras[index]
+        self._shiftViews(index + 1, -1)
+
+    def detachPoints(self):
+        """
+        Turns the point objects handed out into standalone points, for when
+        the array is discarded.
+        """
+        if self._views is None:
+            return
+        for index, ref in self._views.items():
+            point = ref()
+            if point is not None and point._array is self:
+                point.detachPoint(*self.pointValues(index))
+        self._views = None
+
+    # ------
+    # Values
+    # ------
+
+    def appendValues(self, x, y, segmentType=None, smooth=False, name=None,
+                     identifier=None, selected=False):
+        """
+        Appends a point without making a point object.
+        """
+        self._insertValues(
+            len(self._flags), x, y, segmentType, smooth, name, identifier,
+            selected)
+
+    def pointValues(self, index):
+        """
+        Returns x, y, segmentType, smooth, name, identifier and selected of
+        the point at *index*.
+        """
+        flags = self._flags[index]
+        name = identifier = None
+        if self._extras is not None:
+            name, identifier = self._extras[index]
+        return (self.getX(index), self.getY(index),
+                SEGMENT_TYPES[flags & _SEGMENT_TYPE_MASK],
+                bool(flags & _SMOOTH), name, identifier,
+                bool(flags & _SELECTED))
+
+    def iterValues(self):
+        for index in range(len(self._flags)):
+            yield self.pointValues(index)
+
+    def getX(self, index):
+        x = self._xs[index]
+        if self._flags[index] & _INT_X:
+            return int(x)
+        return x
+
+    def setX(self, index, value):
+        self._xs[index] = value
+        self._setFlag(index, _INT_X, isinstance(value, int))
+
+    def getY(self, index):
+        y = self._ys[index]
+        if self._flags[index] & _INT_Y:
+            return int(y)
+        return y
+
+    def setY(self, index, value):
+        self._ys[index] = value
+        self._setFlag(index, _INT_Y, isinstance(value, int))
+
+    def getSegmentType(self, index):
+        return SEGMENT_TYPES[self._flags[index] & _SEGMENT_TYPE_MASK]
+
+    def setSegmentType(self, index, value):
+        flags = self._flags[index] & ~_SEGMENT_TYPE_MASK
+        self._flags[index] = flags | _SEGMENT_TYPE_CODES[value]
+
+    def getSmooth(self, index):
+        return bool(self._flags[index] & _SMOOTH)
+
+    def setSmooth(self, index, value):
+        self._setFlag(index, _SMOOTH, value)
+
+    def getSelected(self, index):
+        return bool(self._flags[index] & _SELECTED)
+
+    def setSelected(self, index, value):
+        self._setFlag(index, _SELECTED, value)
+
+    def getName(self, index):
+        if self._extras is None:
+            return None
+        return self._extras[index][0]
+
+    def setName(self, index, value):
+        self._setExtra(index, 0, value)
+
+    def getIdentifier(self, index):
+        if self._extras is None:
+            return None
+        return self._extras[index][1]
+
+    def setIdentifier(self, index, value):
+        self._setExtra(index, 1, value)
+
+    # ---------
+    # Internals
+    # ---------
+
+    def _insertValues(self, index, x, y, segmentType, smooth, name,
+                      identifier, selected):
+        self._xs.insert(index, x)
+        self._ys.insert(index, y)
+        self._flags.insert(
+            index, _packFlags(x, y, segmentType, smooth, selected))
+        if self._extras is not None:
+            self._extras.insert(index, (name, identifier))
+        elif name is not None or identifier is not None:
+            self._extras = [(None, None)] * (len(self._flags) - 1)
+            self._extras.insert(index, (name, identifier))
+        self._shiftViews(index, 1)
+
+    def _setFlag(self, index, flag, value):
+        if value:
+            self._flags[index] |= flag
+        else:
+            self._flags[index] &= ~flag
+
+    def _setExtra(self, index, position, value):
+        if self._extras is None:
+            if value is None:
+                return
+            self._extras = [(None, None)] * len(self._flags)
+        extra = list(self._extras[index])
+        extra[position] = value
+        self._extras[index] = tuple(extra)
+
+    def _view(self, index):
+        views = self._views
+        if views is None:
+            views = self._views = {}
+        else:
+            ref = views.get(index)
+            if ref is not None:
+                point = ref()
+                if point is not None:
+                    return point
+        if len(views) >= _MAX_VIEWS:
+            self._pruneViews()
+        point = self.pointClass.viewPoint(self, index)
+        views[index] = weakref.ref(point)
+        return point
+
+    def _dropView(self, point):
+        views = self._views
+        if views is None:
+            return
+        ref = views.get(point._index)
+        if ref is not None and ref() is point:
+            del views[point._index]
+
+    def _pruneViews(self):
+        views = self._views
+        for index in [index for index, ref in views.items()
+                      if ref() is None]:
+            del views[index]
+
+    def _shiftViews(self, start, offset):
+        # keep the indexes of the points handed out in sync
+        views = self._views
+        if not views:
+            return
+        self._views = shiftedViews = {}
+        for index, ref in views.items():
+            point = ref()
+            if point is None:
+                continue
+            if index >= start:
+                index += offset
+                point._index = index
+            shiftedViews[index] = ref
@@ -45,9 +45,15 @@ _latinDefaultGlyphNames = \
      "tildecomb", "uni0327", "quoteleft", "quoteright", "minus"]
 
 _fallbackValues = {
+    "fontWindow/glyphCellCacheSize": 128,
     "fontWindow/glyphCellSize": 68,
     "metricsWindow/comboBoxItems": _metricsWindowComboBoxItems,
+    "misc/artifactCacheSize": 512,
+    "misc/glyphBudget": 0,
+    "misc/glyphLoaderWorkerCount": 0,
+    "misc/useGlyphCache": False,
     "misc/loadRecentFile": False,
+    "misc/packedContours": False,
     "outputWindow/wrapLines": False,
     "scriptingWindow/hSplitterSizes": [0, 1],
     "scriptingWindow/vSplitterSizes": [1, 100],
@@ -111,6 +117,14 @@ def setFontInfoWindowGeometry(geometry):
     setValue("fontInfoWindow/geometry", geometry)
 
 
+def glyphCellCacheSize():
+    return value("fontWindow/glyphCellCacheSize")
+
+
+def setGlyphCellCacheSize(size):
+    setValue("fontWindow/glyphCellCacheSize", size)
+
+
 def glyphCellSize():
     return value("fontWindow/glyphCellSize")
 
@@ -240,6 +254,46 @@ def setLoadRecentFile(value):
     setValue("misc/loadRecentFile", value)
 
 
+def artifactCacheSize():
+    return value("misc/artifactCacheSize")
+
+
+def setArtifactCacheSize(size):
+    setValue("misc/artifactCacheSize", size)
+
+
+def glyphBudget():
+    return value("misc/glyphBudget")
+
+
+def setGlyphBudget(count):
+    setValue("misc/glyphBudget", count)
+
+
+def glyphLoaderWorkerCount():
+    return value("misc/glyphLoaderWorkerCount")
+
+
+def setGlyphLoaderWorkerCount(count):
+    setValue("misc/glyphLoaderWorkerCount", count)
+
+
+def packedContours():
+    return value("misc/packedContours")
+
+
+def setPackedContours(value):
+    setValue("misc/packedContours", value)
+
+
+def useGlyphCache():
+    return value("misc/useGlyphCache")
+
+
+def setUseGlyphCache(value):
+    setValue("misc/useGlyphCache", value)
+
+
 def recentFiles():
     return value("core/recentFiles", [], type=str)
 
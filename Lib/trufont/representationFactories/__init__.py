@@ -1,28 +1,64 @@
 from defcon import Font, Glyph, Component, registerRepresentationFactory
 from trufont.representationFactories.glyphCellFactory import (
-    TFGlyphCellFactory)
+    TFGlyphCellFactory, TFGlyphCellImageFactory)
+from trufont.representationFactories.glyphDigestFactory import (
+    GlyphDigestFactory)
 from trufont.representationFactories.glyphViewFactory import (
     ComponentQPainterPathFactory, FilterSelectionFactory,
-    FilterSelectionQPainterPathFactory, SplitLinesQPainterPathFactory)
+    FilterSelectionQPainterPathFactory, OnlyComponentsQPainterPathFactory,
+    QPainterPathFactory, SplitLinesQPainterPathFactory)
 from trufont.representationFactories.openTypeFactory import (
     TTFontFactory, QuadraticTTFontFactory)
 
+# the notifications glyphs post when each of their aspects changes
+glyphAspectNotifications = {
+    "outline": ("Glyph.ContoursChanged",),
+    "components": (
+        "Glyph.ComponentsChanged", "Glyph.ComponentBaseGlyphDataChanged"),
+    "anchors": ("Glyph.AnchorsChanged",),
+    "metrics": ("Glyph.WidthChanged", "Glyph.HeightChanged"),
+    "name": ("Glyph.NameChanged",),
+    "unicodes": ("Glyph.UnicodesChanged",),
+    "markColor": ("Glyph.MarkColorChanged",),
+    "selection": ("Glyph.SelectionChanged",),
+    "template": ("Glyph.TemplateChanged",),
+    "dirty": ("Glyph.DirtyStateChanged",),
+}
+
+# what glyph cells show
+_cellAspects = (
+    "outline", "components", "metrics", "name", "unicodes", "markColor",
+    "template", "dirty")
+
 _fontFactories = {
     "TruFont.TTFont": (TTFontFactory, None),
     "TruFont.QuadraticTTFont": (QuadraticTTFontFactory, None),
 }
-# TODO: fine-tune the destructive notifications
+# glyph factories list the aspects (see glyphAspectNotifications) they
+# depend on
 _glyphFactories = {
+    # replace those of defconQt, see glyphViewFactory
+    "defconQt.QPainterPath": (
+        QPainterPathFactory, ("outline", "components")),
+    "defconQt.OnlyComponentsQPainterPath": (
+        OnlyComponentsQPainterPathFactory, ("components",)),
     "TruFont.SplitLinesQPainterPath": (
-        SplitLinesQPainterPathFactory, None),
+        SplitLinesQPainterPathFactory, ("outline",)),
     "TruFont.FilterSelection": (
-        FilterSelectionFactory, ("Glyph.Changed", "Glyph.SelectionChanged")),
+        FilterSelectionFactory,
+        ("outline", "components", "anchors", "selection")),
     "TruFont.FilterSelectionQPainterPath": (
         FilterSelectionQPainterPathFactory,
-        ("Glyph.Changed", "Glyph.SelectionChanged")),
+        ("outline", "components", "anchors", "selection")),
     "TruFont.GlyphCell": (
-        TFGlyphCellFactory, None),
+        TFGlyphCellFactory, _cellAspects),
+    "TruFont.GlyphCellImage": (
+        TFGlyphCellImageFactory, _cellAspects),
+    "TruFont.Digest": (
+        GlyphDigestFactory, ("outline", "components", "metrics")),
 }
+# in TLayers, components don't post Component.BaseGlyphDataChanged; their
+# glyph drops their representations when a base glyph changes instead
 _componentFactories = {
     "TruFont.QPainterPath": (
         ComponentQPainterPathFactory, (
@@ -30,15 +66,25 @@ _componentFactories = {
 }
 
 
+def glyphNotifications(aspects):
+    """
+    Returns the notifications glyphs post when any of *aspects* changes.
+    """
+    notifications = []
+    for aspect in aspects:
+        notifications.extend(glyphAspectNotifications[aspect])
+    return notifications
+
+
 def registerAllFactories():
     for name, (factory, destructiveNotifications) in _fontFactories.items():
         registerRepresentationFactory(
             Font, name, factory,
             destructiveNotifications=destructiveNotifications)
-    for name, (factory, destructiveNotifications) in _glyphFactories.items():
+    for name, (factory, aspects) in _glyphFactories.items():
         registerRepresentationFactory(
             Glyph, name, factory,
-            destructiveNotifications=destructiveNotifications)
+            destructiveNotifications=glyphNotifications(aspects))
     for name, (factory, destructiveNotifications) in \
             _componentFactories.items():
         registerRepresentationFactory(
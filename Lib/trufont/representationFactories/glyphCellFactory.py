@@ -2,6 +2,7 @@ from defconQt.representationFactories.glyphCellFactory import (
     GlyphCellFactoryDrawingController, GlyphCellHeaderHeight,
     GlyphCellMinHeightForHeader, GlyphCellMinHeightForMetrics)
 from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPainter, QPainterPath, QPixmap
 
 
 def TFGlyphCellFactory(
@@ -18,6 +19,88 @@ def TFGlyphCellFactory(
     return obj.getPixmap()
 
 
+def TFGlyphCellImageFactory(
+        glyph, width, height, drawMarkColor=True, drawTemplate=True,
+        drawHeader=None, drawMetrics=None, pixelRatio=1.0):
+    return GlyphCellImage(dict(
+        width=width, height=height, drawMarkColor=drawMarkColor,
+        drawTemplate=drawTemplate, drawHeader=drawHeader,
+        drawMetrics=drawMetrics, pixelRatio=pixelRatio))
+
+
+class GlyphCellImage(object):
+    """
+    The cell of a glyph, drawn by a GlyphCellRenderer: pixmap is None until
+    it is ready. Being a representation of the glyph, it is dropped when the
+    glyph changes.
+    """
+
+    def __init__(self, arguments):
+        self.arguments = arguments
+        self.pixmap = None
+
+
+class GlyphCellSnapshot(object):
+    """
+    What a cell shows of *glyph*, taken on the main thread so that the cell
+    can be drawn on another one. *fontSnapshot* is the FontCellSnapshot of
+    the glyph's font.
+    """
+
+    def __init__(self, glyph, fontSnapshot):
+        self.name = glyph.name
+        self.width = glyph.width
+        self.unicode = glyph.unicode
+        self.markColor = glyph.markColor
+        self.dirty = glyph.dirty
+        self.template = getattr(glyph, "template", False)
+        self.font = fontSnapshot
+        # a copy of its own, the representation stays with the main thread
+        self._path = QPainterPath(
+            glyph.getRepresentation("defconQt.QPainterPath"))
+
+    def getRepresentation(self, name, **kwargs):
+        assert name == "defconQt.QPainterPath"
+        return self._path
+
+
+class FontCellSnapshot(object):
+    """
+    The font metrics cells are drawn with.
+    """
+
+    def __init__(self, font):
+        self.info = _InfoSnapshot(font.info)
+
+
+class _InfoSnapshot(object):
+
+    def __init__(self, info):
+        self.unitsPerEm = info.unitsPerEm
+        self.ascender = info.ascender
+        self.descender = info.descender
+        self.capHeight = info.capHeight
+        self.xHeight = info.xHeight
+
+
+def drawGlyphCellImage(glyphSnapshot, width, height, drawMarkColor=True,
+                       drawTemplate=True, drawHeader=None, drawMetrics=None,
+                       pixelRatio=1.0):
+    """
+    Draws the cell of *glyphSnapshot* (a GlyphCellSnapshot) onto a QImage,
+    which is safe to do off the main thread.
+    """
+    if drawHeader is None:
+        drawHeader = height >= GlyphCellMinHeightForHeader
+    if drawMetrics is None:
+        drawMetrics = height >= GlyphCellMinHeightForMetrics
+    obj = TFGlyphCellFactoryDrawingController(
+        glyph=glyphSnapshot, font=glyphSnapshot.font, width=width,
+        height=height, drawMarkColor=drawMarkColor, drawTemplate=drawTemplate,
+        drawHeader=drawHeader, drawMetrics=drawMetrics, pixelRatio=pixelRatio)
+    return obj.getImage()
+
+
 class TFGlyphCellFactoryDrawingController(GlyphCellFactoryDrawingController):
 
     def __init__(self, *args, **kwargs):
@@ -28,6 +111,71 @@ class TFGlyphCellFactoryDrawingController(GlyphCellFactoryDrawingController):
         super().__init__(*args, **kwargs)
         self.shouldDrawTemplate = drawTemplate
 
+    def getPixmap(self):
+        pixmap = QPixmap(
+            round(self.width * self.pixelRatio),
+            round(self.height * self.pixelRatio))
+        pixmap.setDevicePixelRatio(self.pixelRatio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        self.drawCell(painter)
+        painter.end()
+        return pixmap
+
+    def getImage(self):
+        # unlike pixmaps, images can be painted on outside the main thread
+        image = QImage(
+            round(self.width * self.pixelRatio),
+            round(self.height * self.pixelRatio),
+            QImage.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(self.pixelRatio)
+        image.fill(Qt.transparent)
+        painter = QPainter(image)
+        self.drawCell(painter)
+        painter.end()
+        return image
+
+    def drawCell(self, painter):
+        # the layers of GlyphCellFactoryDrawingController.getPixmap(), header
+        # at the bottom
+        width, height, headerHeight = self.width, self.height, \
+            self.headerHeight
+        bodyRect = (0, 0, width, height - headerHeight)
+        headerRect = (0, 0, width, headerHeight)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.translate(0, height)
+        painter.scale(1, -1)
+        # background
+        painter.save()
+        painter.translate(0, height)
+        painter.scale(1, -1)
+        self.drawCellBackground(painter, bodyRect)
+        painter.restore()
+        # glyph
+        painter.translate(0, headerHeight)
+        if self.shouldDrawMetrics:
+            self.drawCellHorizontalMetrics(painter, bodyRect)
+            self.drawCellVerticalMetrics(painter, bodyRect)
+        painter.save()
+        painter.setClipRect(0, 0, width, height - headerHeight)
+        painter.translate(self.xOffset, self.yOffset)
+        painter.scale(self.scale, self.scale)
+        self.drawCellGlyph(painter)
+        painter.restore()
+        # foreground
+        painter.save()
+        painter.translate(0, height - headerHeight)
+        painter.scale(1, -1)
+        self.drawCellForeground(painter, bodyRect)
+        painter.restore()
+        # header
+        if self.shouldDrawHeader:
+            painter.save()
+            painter.scale(1, -1)
+            self.drawCellHeaderBackground(painter, headerRect)
+            self.drawCellHeaderText(painter, headerRect)
+            painter.restore()
+
     def drawCellHorizontalMetrics(self, painter, rect):
         if not self.glyph.template:
             super().drawCellHorizontalMetrics(painter, rect)
@@ -40,7 +188,7 @@ class TFGlyphCellFactoryDrawingController(GlyphCellFactoryDrawingController):
         if self.shouldDrawTemplate and self.glyph.template:
             painter.save()
             font = painter.font()
-            font.setPointSize(.425 * self.height)
+            font.setPointSize(int(.425 * self.height))
             painter.setFont(font)
             painter.setPen(Qt.lightGray)
             if self.glyph.unicode is not None:
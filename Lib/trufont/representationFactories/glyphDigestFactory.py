@@ -0,0 +1,37 @@
+import hashlib
+
+
+class DigestPointPen(object):
+    """
+    A point pen that hashes what is drawn into it, leaving out what doesn't
+    make it into binary fonts (point names, smoothness, identifiers).
+    """
+
+    def __init__(self):
+        self.hash = hashlib.sha1()
+
+    def beginPath(self, identifier=None, **kwargs):
+        self.hash.update(b"(")
+
+    def endPath(self):
+        self.hash.update(b")")
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None,
+                 identifier=None, **kwargs):
+        self.hash.update(repr((pt, segmentType)).encode("ascii"))
+
+    def addComponent(self, baseGlyphName, transformation, identifier=None,
+                     **kwargs):
+        self.hash.update(
+            repr((baseGlyphName, tuple(transformation))).encode("utf-8"))
+
+
+def GlyphDigestFactory(glyph):
+    """
+    Returns a digest of the width and drawing of *glyph*. Composite glyphs
+    only account for the name and transformation of their components.
+    """
+    pen = DigestPointPen()
+    pen.hash.update(repr(glyph.width).encode("ascii"))
+    glyph.drawPoints(pen)
+    return pen.hash.digest()
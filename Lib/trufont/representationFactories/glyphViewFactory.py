@@ -1,18 +1,46 @@
 from defconQt.representationFactories.glyphViewFactory import (
-    OnlyComponentsQtPen)
+    NoComponentsQtPen)
 from fontTools.pens.qtPen import QtPen
 from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainterPath, QTransform
 
-# --------------
-# component path
-# --------------
+# ---------------
+# flattened paths
+# ---------------
+
+# composites reuse the path of their base glyphs, mapped through the
+# transformation of the component, rather than drawing them again through
+# a pen. These replace defconQt's QPainterPath and OnlyComponentsQPainterPath.
+
+
+def QPainterPathFactory(glyph):
+    pen = NoComponentsQtPen(glyph.layer)
+    glyph.draw(pen)
+    path = pen.path
+    if glyph.components:
+        path.addPath(
+            glyph.getRepresentation("defconQt.OnlyComponentsQPainterPath"))
+    path.setFillRule(Qt.WindingFill)
+    return path
+
+
+def OnlyComponentsQPainterPathFactory(glyph):
+    path = QPainterPath()
+    for component in glyph.components:
+        path.addPath(component.getRepresentation("TruFont.QPainterPath"))
+    path.setFillRule(Qt.WindingFill)
+    return path
 
 
 def ComponentQPainterPathFactory(component):
-    pen = OnlyComponentsQtPen(component.font)
-    component.draw(pen)
-    pen.path.setFillRule(Qt.WindingFill)
-    return pen.path
+    layer = component.layer
+    baseGlyph = component.baseGlyph
+    if layer is None or baseGlyph not in layer:
+        return QPainterPath()
+    basePath = layer[baseGlyph].getRepresentation("defconQt.QPainterPath")
+    path = QTransform(*component.transformation).map(basePath)
+    path.setFillRule(Qt.WindingFill)
+    return path
 
 # ---------------
 # selection glyph
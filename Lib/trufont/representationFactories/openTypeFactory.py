@@ -1,12 +1,34 @@
+from functools import partial
+from trufont.tools.featureCache import CachedFeatureCompiler
+from trufont.tools.incrementalCompiler import (
+    IncrementalOTFCompiler, IncrementalTTFCompiler)
 from ufo2ft import compileOTF, compileTTF
 
 
 def TTFontFactory(font, useProductionNames=False, optimizeCff=False):
+    outlineCompilerClass = partial(
+        IncrementalOTFCompiler, compileCache=font.compileCache())
+    featureCompilerClass = partial(
+        CachedFeatureCompiler, featureCache=font.featureCache())
     otf = compileOTF(
-        font, useProductionNames=useProductionNames, optimizeCff=optimizeCff)
+        font, outlineCompilerClass=outlineCompilerClass,
+        featureCompilerClass=featureCompilerClass,
+        useProductionNames=useProductionNames, optimizeCff=optimizeCff)
+    # the bounds in the tables are up to date
+    otf.recalcBBoxes = False
     return otf
 
 
 def QuadraticTTFontFactory(font, useProductionNames=False):
-    ttf = compileTTF(font, useProductionNames=useProductionNames)
+    # curves of the glyphs that changed since the last build are converted
+    # in parallel
+    outlineCompilerClass = partial(
+        IncrementalTTFCompiler, compileCache=font.compileCache(),
+        workerCount=font.glyphLoader.workerCount())
+    featureCompilerClass = partial(
+        CachedFeatureCompiler, featureCache=font.featureCache())
+    ttf = compileTTF(
+        font, outlineCompilerClass=outlineCompilerClass,
+        featureCompilerClass=featureCompilerClass,
+        useProductionNames=useProductionNames)
     return ttf
@@ -0,0 +1,207 @@
+"""
+A local store of compiled binary fonts, addressed by the content they were
+compiled from.
+
+fontKey() hashes what goes into a binary font (glyphs, info, features,
+kerning, groups, lib and the compiler options and versions) into a key
+that is the same on any machine for the same UFO. Features that include
+other files also hash the paths and contents of these. ArtifactCache keeps
+one file per key in a directory and drops the least recently used ones
+once they take more than a given size.
+"""
+from fontTools.feaLib.lexer import IncludingLexer
+from trufont import __version__
+from ufoLib import fontInfoAttributesVersion3
+import fontTools
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import ufo2ft
+
+# bump when the key stops describing the artifacts the same way
+KEY_VERSION = 2
+
+# glyph lib keys that don't make it into binary fonts
+_ignoredGlyphLibKeys = {"public.markColor"}
+
+
+includeRe = re.compile(r"\binclude\s*\(")
+
+
+class _RecordingLexer(IncludingLexer):
+
+    def __init__(self, *args, **kwargs):
+        self.files = []
+        super().__init__(*args, **kwargs)
+
+    def make_lexer_(self, file_or_path):
+        lexer = super().make_lexer_(file_or_path)
+        if not hasattr(file_or_path, "read"):
+            self.files.append(
+                (os.path.abspath(file_or_path), lexer.text_))
+        return lexer
+
+
+def includedFeatures(text, path=None):
+    """
+    Returns the (path, text) of the files the features *text* of the UFO
+    at *path* include, resolved like the feature compiler does, or the
+    error that resolving them raises.
+    """
+    featureFile = io.StringIO(text)
+    if path is not None:
+        featureFile.name = os.path.join(path, "features.fea")
+    lexer = _RecordingLexer(featureFile)
+    try:
+        for _ in lexer:
+            pass
+    except Exception as e:
+        return lexer.files + [repr(e)]
+    return lexer.files
+
+
+def _dumps(value):
+    return json.dumps(
+        value, sort_keys=True, separators=(",", ":"), default=repr)
+
+
+def fontKey(font, **options):
+    """
+    Returns the hex digest of the content of *font* and compiler *options*
+    (format, useProductionNames, etc.).
+    """
+    keyHash = hashlib.sha256()
+
+    def update(value):
+        keyHash.update(_dumps(value).encode("utf-8"))
+        keyHash.update(b"\0")
+
+    update([KEY_VERSION, __version__, fontTools.version, ufo2ft.__version__])
+    update(options)
+    info = {}
+    for attr in fontInfoAttributesVersion3:
+        value = getattr(font.info, attr)
+        if value is None:
+            continue
+        if attr == "guidelines":
+            value = [dict(guideline) for guideline in value]
+        info[attr] = value
+    update(info)
+    featuresText = font.features.text or ""
+    update(featuresText)
+    if includeRe.search(featuresText):
+        update(includedFeatures(featuresText, font.path))
+    update(sorted(font.kerning.items()))
+    update(sorted(font.groups.items()))
+    update(dict(font.lib))
+    update(font.glyphOrder)
+    for glyphName in sorted(font.keys()):
+        glyph = font[glyphName]
+        keyHash.update(glyph.getRepresentation("TruFont.Digest"))
+        lib = {key: value for key, value in glyph.lib.items()
+               if key not in _ignoredGlyphLibKeys}
+        update([
+            glyphName, list(glyph.unicodes), glyph.height,
+            [(anchor.name, anchor.x, anchor.y) for anchor in glyph.anchors],
+            lib])
+    return keyHash.hexdigest()
+
+
+class ArtifactCache(object):
+    """
+    Binary fonts stored under their key in *directory*, up to *maxSize*
+    bytes. Several processes may share the directory.
+    """
+
+    def __init__(self, directory, maxSize):
+        self.directory = directory
+        self.maxSize = maxSize
+
+    def path(self, key):
+        return os.path.join(self.directory, key)
+
+    def copyTo(self, key, path):
+        """
+        Copies the artifact of *key* to *path*. Returns False if there is
+        none.
+        """
+        artifactPath = self.path(key)
+        try:
+            # marks the artifact as recently used
+            os.utime(artifactPath)
+            _copyFile(artifactPath, path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key, path):
+        """
+        Stores a copy of the file at *path* as the artifact of *key*, then
+        evicts artifacts past the size limit.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        _copyFile(path, self.path(key))
+        self.evict()
+
+    def size(self):
+        return sum(size for _, _, size in self._artifacts())
+
+    def _artifacts(self):
+        artifacts = []
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return artifacts
+        for entry in entries:
+            # leave out files being written
+            if entry.name.startswith("."):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            artifacts.append((stat.st_mtime, entry.path, stat.st_size))
+        return artifacts
+
+    def evict(self):
+        """
+        Removes the least recently used artifacts until the cache fits in
+        maxSize.
+        """
+        artifacts = sorted(self._artifacts())
+        size = sum(size for _, _, size in artifacts)
+        for _, path, artifactSize in artifacts:
+            if size <= self.maxSize:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= artifactSize
+
+    def clear(self):
+        for _, path, _ in self._artifacts():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def _copyFile(source, destination):
+    # copy then swap in, so that readers never see a partial file
+    dirName, fileName = os.path.split(os.path.abspath(destination))
+    fd, tempPath = tempfile.mkstemp(prefix=".%s" % fileName, dir=dirName)
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tempPath)
+        os.replace(tempPath, destination)
+    except Exception:
+        try:
+            os.remove(tempPath)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,83 @@
+"""
+A reverse index of the components of a layer, from base glyphs to the
+glyphs that use them.
+"""
+from collections import Counter
+
+
+class ComponentIndex(object):
+    """
+    Maps glyph names to the names of the glyphs that have components of
+    them. References are counted, a glyph may use a base glyph more than
+    once.
+    """
+
+    def __init__(self):
+        # baseGlyph: {glyphName: count}
+        self._composites = {}
+        # glyphName: {baseGlyph: count}
+        self._baseGlyphs = {}
+
+    def __contains__(self, glyphName):
+        return glyphName in self._baseGlyphs
+
+    def addReference(self, glyphName, baseGlyph):
+        self._baseGlyphs.setdefault(glyphName, Counter())[baseGlyph] += 1
+        self._composites.setdefault(baseGlyph, Counter())[glyphName] += 1
+
+    def removeReference(self, glyphName, baseGlyph):
+        baseGlyphs = self._baseGlyphs.get(glyphName)
+        if baseGlyphs is None or baseGlyph not in baseGlyphs:
+            return
+        _decrement(self._baseGlyphs, glyphName, baseGlyph)
+        _decrement(self._composites, baseGlyph, glyphName)
+
+    def renameGlyph(self, oldName, newName):
+        """
+        Moves the references of the components of *oldName* to *newName*.
+        References to *oldName* as a base glyph are left as they are, like
+        the components that hold them.
+        """
+        baseGlyphs = self._baseGlyphs.pop(oldName, None)
+        if baseGlyphs is None:
+            return
+        self._baseGlyphs[newName] = baseGlyphs
+        for baseGlyph, count in baseGlyphs.items():
+            composites = self._composites[baseGlyph]
+            del composites[oldName]
+            composites[newName] += count
+
+    def baseGlyphs(self, glyphName):
+        return set(self._baseGlyphs.get(glyphName, ()))
+
+    def composites(self, baseGlyph):
+        return set(self._composites.get(baseGlyph, ()))
+
+    def dependents(self, baseGlyph):
+        """
+        Returns the names of the glyphs that use *baseGlyph*, directly or
+        through other composites.
+        """
+        dependents = set()
+        stack = [baseGlyph]
+        while stack:
+            for glyphName in self._composites.get(stack.pop(), ()):
+                if glyphName not in dependents:
+                    dependents.add(glyphName)
+                    stack.append(glyphName)
+        # components may reference their glyph through a cycle
+        dependents.discard(baseGlyph)
+        return dependents
+
+    def clear(self):
+        self._composites.clear()
+        self._baseGlyphs.clear()
+
+
+def _decrement(mapping, key, subKey):
+    counter = mapping[key]
+    counter[subKey] -= 1
+    if counter[subKey] <= 0:
+        del counter[subKey]
+        if not counter:
+            del mapping[key]
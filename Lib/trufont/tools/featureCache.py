@@ -0,0 +1,169 @@
+"""
+Compilation of feature files, cached by content.
+
+Parsed feature files and the layout tables built from them are kept under
+a hash of the features text and the glyph order they were compiled
+against, so that checking the features as they are edited and compiling
+them into binary fonts only does the work once for a given text.
+"""
+from collections import OrderedDict
+from fontTools.feaLib.builder import Builder
+from fontTools.feaLib.parser import Parser
+from fontTools.ttLib import TTFont
+from ufo2ft.featureCompiler import FeatureCompiler
+import copy
+import hashlib
+import io
+import os
+import re
+import threading
+
+# tables built from the features that don't depend on other tables
+LAYOUT_TABLES = ("GDEF", "GSUB", "GPOS", "BASE")
+# features that set other tables need to be built into the font itself
+otherTablesRe = re.compile(r"\btable\s+(?!GDEF|BASE)")
+
+
+def officialGlyphOrder(font):
+    """
+    Returns the glyph order binary fonts compiled from *font* get.
+    """
+    glyphOrder = [".notdef"]
+    for glyphName in font.glyphOrder:
+        if glyphName != ".notdef" and glyphName in font:
+            glyphOrder.append(glyphName)
+    glyphNames = set(glyphOrder)
+    for glyphName in sorted(font.keys()):
+        if glyphName not in glyphNames:
+            glyphOrder.append(glyphName)
+    return glyphOrder
+
+
+class FeatureCache(object):
+    """
+    Parsed feature files and their layout tables, for the *maxEntries*
+    features texts that were compiled last. Safe to use from several
+    threads.
+    """
+
+    def __init__(self, maxEntries=8):
+        self.maxEntries = maxEntries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _entry(self, text, glyphOrder):
+        # ufo2ft separates the features it writes with blank lines, even
+        # when it writes none
+        keyHash = hashlib.sha1(text.rstrip().encode("utf-8"))
+        keyHash.update("\0".join(glyphOrder).encode("utf-8"))
+        key = keyHash.digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = {}
+                while len(self._entries) > self.maxEntries:
+                    self._entries.popitem(last=False)
+            else:
+                self._entries.move_to_end(key)
+        return entry
+
+    def parse(self, text, glyphOrder, path=None):
+        """
+        Returns the parsed *text* (a feaLib FeatureFile), checked against
+        the glyphs of *glyphOrder*. *path* is that of the UFO, includes are
+        resolved from there.
+
+        Raises the FeatureLibError of the text, if any.
+        """
+        return self._parse(self._entry(text, glyphOrder), text, glyphOrder,
+                           path)
+
+    def _parse(self, entry, text, glyphOrder, path):
+        doc = entry.get("doc")
+        if doc is None:
+            if "parseError" in entry:
+                raise entry["parseError"]
+            featureFile = io.StringIO(text)
+            if path is not None:
+                featureFile.name = os.path.join(path, "features.fea")
+            try:
+                doc = Parser(featureFile, glyphOrder).parse()
+            except Exception as e:
+                entry["parseError"] = e
+                raise
+            entry["doc"] = doc
+        return doc
+
+    def layoutTables(self, text, glyphOrder, path=None):
+        """
+        Returns a {tag: table} dict of the layout tables (see LAYOUT_TABLES)
+        built from *text* for a font with *glyphOrder*. The tables belong to
+        the cache, copy them before putting them in a font.
+
+        Raises the FeatureLibError of the text, if any.
+        """
+        entry = self._entry(text, glyphOrder)
+        tables = entry.get("tables")
+        if tables is None:
+            if "buildError" in entry:
+                raise entry["buildError"]
+            doc = self._parse(entry, text, glyphOrder, path)
+            font = TTFont()
+            font.setGlyphOrder(glyphOrder)
+            try:
+                Builder(font, doc).build()
+            except Exception as e:
+                entry["buildError"] = e
+                raise
+            tables = entry["tables"] = {
+                tag: font[tag] for tag in LAYOUT_TABLES if tag in font}
+        return tables
+
+    def check(self, text, glyphOrder, path=None):
+        """
+        Compiles *text* and returns the error it raises, or None.
+        """
+        try:
+            if otherTablesRe.search(text):
+                self.parse(text, glyphOrder, path)
+            else:
+                self.layoutTables(text, glyphOrder, path)
+        except Exception as e:
+            return e
+        return None
+
+
+class CachedFeatureCompiler(FeatureCompiler):
+    """
+    A ufo2ft FeatureCompiler that takes the layout tables from
+    *featureCache*, or builds the features from the parsed file kept there
+    if they set other tables.
+    """
+
+    def __init__(self, *args, featureCache=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if featureCache is None:
+            featureCache = FeatureCache()
+        self.featureCache = featureCache
+
+    def setupFile_featureTables(self):
+        if self.mtiFeatures is not None or not self.features.strip():
+            super().setupFile_featureTables()
+            return
+        glyphOrder = self.outline.getGlyphOrder()
+        path = self.font.path
+        if otherTablesRe.search(self.features):
+            doc = self.featureCache.parse(self.features, glyphOrder, path)
+            Builder(self.outline, doc).build()
+        else:
+            tables = self.featureCache.layoutTables(
+                self.features, glyphOrder, path)
+            for tag, table in tables.items():
+                self.outline[tag] = copy.deepcopy(table)
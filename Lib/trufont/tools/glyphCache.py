@@ -0,0 +1,210 @@
+"""
+A binary snapshot of the glyphs of a UFO, kept in a per-user cache
+directory so that reopening the font doesn't need to parse its .glif files
+again.
+
+The file holds a versioned header, a JSON index of {layerName: {glyphName:
+entry}} and the GlyphData of each glyph, as JSON followed by the .glif
+text. Nothing in it is executed when read. It is memory-mapped and glyphs
+are decoded as they are asked for. Each entry carries the modification
+time and size of the .glif file it was made from and is ignored once those
+change.
+"""
+from trufont.tools.glyphLoader import GlyphData
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+CACHE_VERSION = 2
+
+_MAGIC = b"TFGC"
+# magic, version, index size
+_HEADER = struct.Struct("<4sHxxQ")
+# JSON size, then the .glif text fills the rest
+_PAYLOAD_HEADER = struct.Struct("<I")
+
+
+def cachePath(path, directory):
+    """
+    Returns the path of the cache of the UFO at *path* in *directory*.
+    """
+    path = os.path.normcase(os.path.abspath(path))
+    fileName = os.path.splitext(os.path.basename(path))[0]
+    digest = hashlib.sha1(path.encode("utf-8")).hexdigest()
+    return os.path.join(directory, "%s-%s.tfcache" % (fileName, digest))
+
+
+def _dumps(value):
+    return json.dumps(
+        value, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+def dumpGlyphData(data):
+    """
+    Returns the payload of GlyphData *data*, or None if its attributes
+    hold values JSON can't (e.g. data or dates in the lib).
+    """
+    # empty values are a new glyph's defaults, leave them out like .glif
+    # files do since setting them costs notifications on load
+    attributes = {
+        attr: value for attr, value in data.attributes.items() if value}
+    try:
+        header = _dumps(
+            [attributes, data.outline, data.modificationTime])
+    except (TypeError, ValueError):
+        return None
+    return _PAYLOAD_HEADER.pack(len(header)) + header + (data.text or b"")
+
+
+def loadGlyphData(payload):
+    size, = _PAYLOAD_HEADER.unpack_from(payload)
+    start = _PAYLOAD_HEADER.size
+    attributes, outline, modificationTime = json.loads(
+        bytes(payload[start:start + size]).decode("utf-8"))
+    if not isinstance(attributes, dict):
+        raise ValueError("invalid glyph attributes")
+    data = GlyphData()
+    data.attributes = attributes
+    # JSON has no tuples, give the pens back what they were given
+    for method, args, kwargs in outline:
+        if method == "addPoint":
+            args[0] = tuple(args[0])
+        elif method == "addComponent":
+            args[1] = tuple(args[1])
+        elif method not in ("beginPath", "endPath"):
+            raise ValueError("invalid outline")
+        data.outline.append((method, tuple(args), kwargs))
+    data.text = bytes(payload[start + size:])
+    data.modificationTime = modificationTime
+    return data
+
+
+def _checkIndex(index):
+    if not isinstance(index, dict):
+        raise ValueError("invalid glyph cache index")
+    for entries in index.values():
+        if not isinstance(entries, dict):
+            raise ValueError("invalid glyph cache index")
+        for entry in entries.values():
+            if not isinstance(entry, list) or len(entry) != 5 or \
+                    not isinstance(entry[0], str) or not all(
+                        isinstance(value, int) and value >= 0
+                        for value in entry[1:]):
+                raise ValueError("invalid glyph cache index")
+
+
+class GlyphCache(object):
+    """
+    The glyph cache file at *path*. A missing, outdated or unreadable file
+    makes for an empty cache.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._map = None
+        self._index = {}
+        self._payloadOffset = 0
+        self._read()
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._index.values())
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._index = {}
+
+    def glyphPayload(self, layerName, glyphName, relPath, stat):
+        """
+        Returns the payload of the GlyphData of *glyphName* if it was made
+        from the .glif file at *relPath* with *stat* (mtime_ns, size), else
+        None.
+        """
+        entry = self._index.get(layerName, {}).get(glyphName)
+        if entry is None or entry[0] != relPath or \
+                tuple(entry[1:3]) != tuple(stat):
+            return None
+        offset = self._payloadOffset + entry[3]
+        length = entry[4]
+        if offset + length > len(self._map):
+            return None
+        return self._map[offset:offset + length]
+
+    def glyphData(self, layerName, glyphName, relPath, stat):
+        """
+        Like glyphPayload(), but returns GlyphData.
+        """
+        payload = self.glyphPayload(layerName, glyphName, relPath, stat)
+        if payload is None:
+            return None
+        try:
+            return loadGlyphData(payload)
+        except Exception:
+            return None
+
+    def write(self, glyphs):
+        """
+        Replaces the cache with *glyphs*, a {layerName: {glyphName:
+        (relPath, stat, payload)}} dict where payload comes from
+        dumpGlyphData() or glyphPayload().
+        """
+        index = {}
+        payloads = []
+        offset = 0
+        for layerName, layerGlyphs in glyphs.items():
+            layerIndex = index[layerName] = {}
+            for glyphName, (relPath, stat, payload) in layerGlyphs.items():
+                layerIndex[glyphName] = [
+                    relPath, stat[0], stat[1], offset, len(payload)]
+                payloads.append(payload)
+                offset += len(payload)
+        indexData = _dumps(index)
+        # the mapping must go before the file can be replaced on Windows
+        self.close()
+        dirName, fileName = os.path.split(self.path)
+        os.makedirs(dirName, exist_ok=True)
+        fd, tempPath = tempfile.mkstemp(prefix=fileName, dir=dirName)
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(_HEADER.pack(
+                    _MAGIC, CACHE_VERSION, len(indexData)))
+                file.write(indexData)
+                for payload in payloads:
+                    file.write(payload)
+            os.replace(tempPath, self.path)
+        except OSError:
+            try:
+                os.remove(tempPath)
+            except OSError:
+                pass
+            raise
+        self._read()
+
+    # ---------
+    # Internals
+    # ---------
+
+    def _read(self):
+        try:
+            self._file = open(self.path, "rb")
+            self._map = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, indexSize = _HEADER.unpack_from(self._map)
+            if magic != _MAGIC or version != CACHE_VERSION:
+                raise ValueError("unsupported glyph cache")
+            self._payloadOffset = _HEADER.size + indexSize
+            index = json.loads(
+                self._map[_HEADER.size:self._payloadOffset].decode("utf-8"))
+            _checkIndex(index)
+            self._index = index
+        except (OSError, ValueError, RecursionError, struct.error):
+            # missing, truncated, corrupt or from another version
+            self.close()
@@ -0,0 +1,159 @@
+"""
+Parsing of .glif files into plain, picklable data, optionally spread over
+a pool of worker processes.
+
+Workers never see defcon objects; TLayer builds its TGlyph/TContour/TPoint
+objects from the returned GlyphData on the main thread.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from ufoLib.glifLib import readGlyphFromString
+import copy
+import itertools
+import multiprocessing
+import os
+
+# below this many glyphs, starting worker processes costs more than it saves
+MIN_PARALLEL_GLYPH_COUNT = 200
+# number of chunks handed to each worker, to balance load
+CHUNKS_PER_WORKER = 4
+
+
+class GlyphData(object):
+    """
+    The parsed content of a .glif file: the glyph attributes that ufoLib
+    sets on a glyph object, its outline as recorded point pen calls, and
+    the raw file text and modification time (for external changes
+    detection).
+    """
+    __slots__ = ["attributes", "outline", "text", "modificationTime"]
+
+    def __init__(self, text=None, modificationTime=None):
+        self.attributes = {}
+        self.outline = []
+        self.text = text
+        self.modificationTime = modificationTime
+
+    @classmethod
+    def fromGlyph(cls, glyph):
+        """
+        Captures the current state of defcon *glyph* into plain data.
+        """
+        data = cls()
+        attributes = data.attributes
+        attributes["width"] = glyph.width
+        attributes["height"] = glyph.height
+        attributes["unicodes"] = list(glyph.unicodes)
+        attributes["note"] = glyph.note
+        attributes["anchors"] = [dict(anchor) for anchor in glyph.anchors]
+        attributes["guidelines"] = [
+            dict(guideline) for guideline in glyph.guidelines]
+        if glyph.image.fileName is not None:
+            attributes["image"] = dict(glyph.image)
+        attributes["lib"] = copy.deepcopy(dict(glyph.lib))
+        pen = _RecordingPointPen()
+        glyph.drawPoints(pen)
+        data.outline = pen.value
+        return data
+
+    def __getattr__(self, attr):
+        # lets ufoLib write GlyphData as a glyph object
+        if attr.startswith("_") or attr in self.__slots__:
+            raise AttributeError(attr)
+        try:
+            return self.attributes[attr]
+        except KeyError:
+            raise AttributeError(attr)
+
+    def drawPoints(self, pointPen):
+        for method, args, kwargs in self.outline:
+            getattr(pointPen, method)(*args, **kwargs)
+
+
+class _GlyphAttributes(object):
+    pass
+
+
+class _RecordingPointPen(object):
+
+    def __init__(self):
+        self.value = []
+
+    def beginPath(self, **kwargs):
+        self.value.append(("beginPath", (), kwargs))
+
+    def endPath(self):
+        self.value.append(("endPath", (), {}))
+
+    def addPoint(self, pt, segmentType=None, smooth=False, name=None,
+                 **kwargs):
+        self.value.append(
+            ("addPoint", (pt, segmentType, smooth, name), kwargs))
+
+    def addComponent(self, baseGlyphName, transformation, **kwargs):
+        self.value.append(
+            ("addComponent", (baseGlyphName, transformation), kwargs))
+
+
+def readGlyphFile(path, formatVersions=(1, 2)):
+    with open(path, "rb") as file:
+        text = file.read()
+    data = GlyphData(text, os.path.getmtime(path))
+    attributes = _GlyphAttributes()
+    pen = _RecordingPointPen()
+    readGlyphFromString(
+        text, attributes, pen, formatVersions=formatVersions)
+    data.attributes = vars(attributes)
+    data.outline = pen.value
+    return data
+
+
+def readGlyphFiles(paths, formatVersions=(1, 2)):
+    return [readGlyphFile(path, formatVersions) for path in paths]
+
+
+class GlyphLoader(object):
+    """
+    Reads glyphs out of a ufoLib GlyphSet. Large batches are parsed by
+    *workerCount* processes, which defaults to the number of CPUs.
+    """
+
+    def __init__(self, workerCount=None):
+        self._workerCount = workerCount
+
+    def workerCount(self):
+        if not self._workerCount:
+            return os.cpu_count() or 1
+        return self._workerCount
+
+    def setWorkerCount(self, workerCount):
+        self._workerCount = workerCount
+
+    def readGlyphs(self, glyphSet, glyphNames):
+        """
+        Returns a {glyphName: GlyphData} dict for the glyphs of *glyphNames*
+        that are present in *glyphSet*.
+        """
+        contents = glyphSet.contents
+        glyphNames = [name for name in glyphNames if name in contents]
+        paths = [os.path.join(glyphSet.dirName, contents[name])
+                 for name in glyphNames]
+        if glyphSet.ufoFormatVersion < 3:
+            formatVersions = (1,)
+        else:
+            formatVersions = (1, 2)
+        workerCount = self.workerCount()
+        if workerCount < 2 or len(paths) < MIN_PARALLEL_GLYPH_COUNT:
+            glyphsData = readGlyphFiles(paths, formatVersions)
+        else:
+            chunkSize = -(-len(paths) // (workerCount * CHUNKS_PER_WORKER))
+            chunks = [paths[i:i + chunkSize]
+                      for i in range(0, len(paths), chunkSize)]
+            # don't fork the GUI process
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                    workerCount, mp_context=context) as executor:
+                glyphsData = list(itertools.chain.from_iterable(
+                    executor.map(
+                        readGlyphFiles, chunks,
+                        itertools.repeat(formatVersions))))
+        return dict(zip(glyphNames, glyphsData))
@@ -0,0 +1,381 @@
+"""
+Outline compilers that reuse the work done for glyphs that didn't change
+since the last compilation.
+
+Glyphs are keyed by their content: the "TruFont.Digest" representation of
+the glyph combined with the keys of its components' base glyphs. Bounding
+boxes, CFF charstrings and glyf glyphs are kept in a CompileCache under
+these keys, so that compiling a font after a tweak only redraws the glyphs
+that were touched (and the composites that use them) before the tables are
+put together again.
+
+The TrueType compiler can convert the curves of the glyphs it doesn't have
+in cache in a pool of worker processes.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from defcon import Glyph
+from fontTools.misc.arrayTools import intRect, unionRect
+from fontTools.misc.psCharStrings import T2CharString
+from fontTools.pens.ttGlyphPen import TTGlyphPen
+from fontTools.ttLib import newTable
+from trufont.tools.glyphLoader import (
+    CHUNKS_PER_WORKER, GlyphData, MIN_PARALLEL_GLYPH_COUNT)
+from ufo2ft.outlineCompiler import (
+    OutlineOTFCompiler, OutlineTTFCompiler, StubGlyph)
+import hashlib
+import itertools
+import multiprocessing
+import math
+
+_missing = object()
+
+
+class CompileCache(object):
+    """
+    Per-glyph compilation results of a font, by compiler setup. Only the
+    glyphs used by the latest compilation of each setup are kept.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def clear(self):
+        self._entries = {}
+
+    def entries(self, setup):
+        """
+        Returns the {glyphKey: {field: value}} entries of *setup*, a
+        hashable description of the compiler's options.
+        """
+        return self._entries.get(setup, {})
+
+    def setEntries(self, setup, entries):
+        self._entries[setup] = entries
+
+    def updateEntries(self, setup, entries):
+        self._entries.setdefault(setup, {}).update(entries)
+
+
+class IncrementalCompilerMixin(object):
+    """
+    Looks up glyph values in a CompileCache before making them. Subclasses
+    define setupKey(), the options that values depend on. Unless
+    *pruneCache* is False, the cache is left with the glyphs of the latest
+    compilation only.
+    """
+
+    def _setupCache(self, compileCache, pruneCache=True):
+        if compileCache is None:
+            compileCache = CompileCache()
+        self.compileCache = compileCache
+        self.pruneCache = pruneCache
+        self._cachedEntries = compileCache.entries(self.setupKey())
+        self._usedEntries = {}
+        self._glyphKeys = {}
+
+    def setupKey(self):
+        raise NotImplementedError
+
+    def compile(self):
+        otf = super().compile()
+        if self.pruneCache:
+            self.compileCache.setEntries(self.setupKey(), self._usedEntries)
+        else:
+            # only some of the glyphs were compiled, keep the others around
+            self.compileCache.updateEntries(
+                self.setupKey(), self._usedEntries)
+        return otf
+
+    def glyphKey(self, glyph):
+        """
+        Returns the content key of *glyph*, or None for glyphs made up by the
+        compiler.
+        """
+        if isinstance(glyph, StubGlyph):
+            return None
+        name = glyph.name
+        key = self._glyphKeys.get(name)
+        if key is None:
+            # cyclic components get an empty key, drawing them fails anyway
+            self._glyphKeys[name] = b""
+            key = glyph.getRepresentation("TruFont.Digest")
+            if glyph.components:
+                keyHash = hashlib.sha1(key)
+                for component in glyph.components:
+                    baseGlyph = self.allGlyphs.get(component.baseGlyph)
+                    if baseGlyph is not None:
+                        keyHash.update(self.glyphKey(baseGlyph) or b"")
+                key = keyHash.digest()
+            self._glyphKeys[name] = key
+        return key
+
+    def cachedGlyphValue(self, glyph, field):
+        """
+        Returns the *field* value cached for *glyph*, or _missing.
+        """
+        key = self.glyphKey(glyph)
+        if key is None:
+            return _missing
+        entry = self._usedEntries.get(key)
+        if entry is None:
+            entry = self._usedEntries[key] = self._cachedEntries.get(key, {})
+        return entry.get(field, _missing)
+
+    def setCachedGlyphValue(self, glyph, field, value):
+        key = self.glyphKey(glyph)
+        if key is not None:
+            self._usedEntries[key][field] = value
+
+    def makeGlyphsBoundingBoxes(self):
+        glyphBoxes = {}
+        glyphsToBound = {}
+        for glyphName, glyph in self.allGlyphs.items():
+            bounds = self.cachedGlyphValue(glyph, "bounds")
+            if bounds is _missing:
+                glyphsToBound[glyphName] = glyph
+            else:
+                glyphBoxes[glyphName] = bounds
+        # let the base class bound the other glyphs, with its rounding
+        allGlyphs = self.allGlyphs
+        self.allGlyphs = glyphsToBound
+        try:
+            newGlyphBoxes = super().makeGlyphsBoundingBoxes()
+        finally:
+            self.allGlyphs = allGlyphs
+        for glyphName, bounds in newGlyphBoxes.items():
+            self.setCachedGlyphValue(allGlyphs[glyphName], "bounds", bounds)
+        glyphBoxes.update(newGlyphBoxes)
+        return glyphBoxes
+
+
+class IncrementalOTFCompiler(IncrementalCompilerMixin, OutlineOTFCompiler):
+    """
+    An OutlineOTFCompiler that keeps glyph bounds and charstrings in
+    *compileCache*.
+    """
+
+    def __init__(self, font, glyphOrder=None, roundTolerance=None,
+                 compileCache=None, pruneCache=True):
+        self.ufo = font
+        if roundTolerance is not None:
+            self.roundTolerance = float(roundTolerance)
+        else:
+            self.roundTolerance = 0.5
+        self._setupCache(compileCache, pruneCache)
+        self._charStringBounds = {}
+        super().__init__(font, glyphOrder, roundTolerance)
+
+    def setupKey(self):
+        return ("otf", self.roundTolerance,
+                self.ufo.info.postscriptNominalWidthX)
+
+    def compile(self):
+        otf = super().compile()
+        # fontTools would run all charstrings again to bound them when
+        # saving, use the bounds we kept instead
+        if not self.vertical:
+            self.recalcBoundingBoxes()
+            otf.recalcBBoxes = False
+        return otf
+
+    def getCharStringForGlyph(self, glyph, private, globalSubrs):
+        value = self.cachedGlyphValue(glyph, "charString")
+        if value is _missing:
+            charString = super().getCharStringForGlyph(
+                glyph, private, globalSubrs)
+            charString.compile()
+            # bounding decompiles the charstring, keep the bytecode first
+            bytecode = charString.bytecode
+            bounds = charString.calcBounds(None)
+            self.setCachedGlyphValue(
+                glyph, "charString", (bytecode, bounds))
+        else:
+            bytecode, bounds = value
+            charString = T2CharString(
+                bytecode=bytecode, private=private, globalSubrs=globalSubrs)
+        self._charStringBounds[glyph.name] = bounds
+        return charString
+
+    def recalcBoundingBoxes(self):
+        """
+        Sets the font bounding box and horizontal extents the way fontTools
+        computes them from the charstrings when saving.
+        """
+        otf = self.otf
+        hmtx = otf["hmtx"]
+        topDict = otf["CFF "].cff.topDictIndex[0]
+        fontBBox = None
+        boundsWidths = {}
+        for glyphName in self.glyphOrder:
+            bounds = self._charStringBounds.get(glyphName)
+            if bounds is None:
+                continue
+            if fontBBox is None:
+                fontBBox = bounds
+            else:
+                fontBBox = unionRect(fontBBox, bounds)
+            boundsWidths[glyphName] = int(
+                math.ceil(bounds[2]) - math.floor(bounds[0]))
+        if fontBBox is None:
+            topDict.FontBBox = topDict.defaults["FontBBox"][:]
+        else:
+            topDict.FontBBox = list(intRect(fontBBox))
+        head = otf["head"]
+        head.xMin, head.yMin, head.xMax, head.yMax = intRect(topDict.FontBBox)
+        hhea = otf["hhea"]
+        hhea.advanceWidthMax = max(
+            advance for advance, _ in hmtx.metrics.values())
+        minLeftSideBearing = minRightSideBearing = float("inf")
+        xMaxExtent = -float("inf")
+        for glyphName, boundsWidth in boundsWidths.items():
+            advance, leftSideBearing = hmtx[glyphName]
+            minLeftSideBearing = min(minLeftSideBearing, leftSideBearing)
+            minRightSideBearing = min(
+                minRightSideBearing, advance - leftSideBearing - boundsWidth)
+            xMaxExtent = max(xMaxExtent, leftSideBearing + boundsWidth)
+        if not boundsWidths:
+            minLeftSideBearing = minRightSideBearing = xMaxExtent = 0
+        hhea.minLeftSideBearing = minLeftSideBearing
+        hhea.minRightSideBearing = minRightSideBearing
+        hhea.xMaxExtent = xMaxExtent
+
+
+class IncrementalTTFCompiler(IncrementalCompilerMixin, OutlineTTFCompiler):
+    """
+    An OutlineTTFCompiler that keeps glyph bounds and glyf glyphs in
+    *compileCache*. Glyphs missing from the cache are converted by
+    *workerCount* processes when there are enough of them.
+    """
+
+    def __init__(self, font, glyphOrder=None, convertCubics=True,
+                 cubicConversionError=None, compileCache=None,
+                 workerCount=1, pruneCache=True):
+        self.ufo = font
+        self._conversionOptions = (convertCubics, cubicConversionError)
+        self._setupCache(compileCache, pruneCache)
+        self.workerCount = workerCount
+        super().__init__(
+            font, glyphOrder, convertCubics, cubicConversionError)
+
+    def setupKey(self):
+        return ("ttf", self.ufo.info.unitsPerEm) + self._conversionOptions
+
+    def setupTable_glyf(self):
+        self.otf["loca"] = newTable("loca")
+        self.otf["glyf"] = glyf = newTable("glyf")
+        glyf.glyphs = {}
+        glyf.glyphOrder = self.glyphOrder
+
+        self.convertGlyphsInParallel()
+        glyphSet = _QuadraticGlyphSet(self)
+        for name in self.glyphOrder:
+            glyph = self.allGlyphs[name]
+            ttGlyph = self.cachedGlyphValue(glyph, "ttGlyph")
+            if ttGlyph is _missing:
+                quadraticGlyph = glyphSet[name]
+                pen = TTGlyphPen(glyphSet)
+                quadraticGlyph.draw(pen)
+                ttGlyph = pen.glyph()
+                if ttGlyph.isComposite() and self.autoUseMyMetrics:
+                    self.autoUseMyMetrics(ttGlyph, glyph.width, glyphSet)
+                self.setCachedGlyphValue(glyph, "ttGlyph", ttGlyph)
+            glyf[name] = ttGlyph
+
+    def convertGlyph(self, glyph):
+        """
+        Returns *glyph* with its curves converted to quadratic ones.
+        """
+        if not self.convertCubics or isinstance(glyph, StubGlyph):
+            return glyph
+        return convertGlyph(glyph, self.cubicConversionError)
+
+    def convertGlyphsInParallel(self):
+        """
+        Puts the glyf glyphs of the outline-only glyphs missing from the
+        cache in it, converting them in worker processes. Does nothing if
+        there are too few of them to be worth it.
+        """
+        workerCount = self.workerCount or 1
+        if not self.convertCubics or workerCount < 2:
+            return
+        # worker processes of pools may not have children of their own on
+        # older Pythons
+        if multiprocessing.current_process().daemon:
+            return
+        glyphs = []
+        for name in self.glyphOrder:
+            glyph = self.allGlyphs[name]
+            # composites need the other glyphs to be drawn
+            if isinstance(glyph, StubGlyph) or glyph.components or \
+                    not len(glyph):
+                continue
+            if self.cachedGlyphValue(glyph, "ttGlyph") is _missing:
+                glyphs.append(glyph)
+        if len(glyphs) < MIN_PARALLEL_GLYPH_COUNT:
+            return
+        chunkSize = -(-len(glyphs) // (workerCount * CHUNKS_PER_WORKER))
+        chunks = [
+            [GlyphData.fromGlyph(glyph) for glyph in glyphs[i:i + chunkSize]]
+            for i in range(0, len(glyphs), chunkSize)]
+        # don't fork the GUI process
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+                workerCount, mp_context=context) as executor:
+            ttGlyphs = itertools.chain.from_iterable(executor.map(
+                convertGlyphs, chunks,
+                itertools.repeat(self.cubicConversionError)))
+            for glyph, ttGlyph in zip(glyphs, ttGlyphs):
+                self.setCachedGlyphValue(glyph, "ttGlyph", ttGlyph)
+
+
+def convertGlyph(glyph, cubicConversionError):
+    """
+    Returns a copy of *glyph* with its curves converted to quadratic ones.
+    """
+    from cu2qu.pens import Cu2QuPen
+    newGlyph = glyph.__class__()
+    glyph.draw(Cu2QuPen(
+        newGlyph.getPen(), cubicConversionError, reverse_direction=True))
+    newGlyph.width = glyph.width
+    return newGlyph
+
+
+def convertGlyphs(glyphsData, cubicConversionError):
+    """
+    Returns the glyf glyphs of the outline-only glyphs of *glyphsData*
+    (GlyphData objects), with their curves converted to quadratic ones.
+    """
+    ttGlyphs = []
+    for data in glyphsData:
+        glyph = Glyph()
+        data.drawPoints(glyph.getPointPen())
+        glyph.width = data.width
+        pen = TTGlyphPen(None)
+        convertGlyph(glyph, cubicConversionError).draw(pen)
+        ttGlyphs.append(pen.glyph())
+    return ttGlyphs
+
+
+class _QuadraticGlyphSet(object):
+    """
+    The glyphs of *compiler*, converted to quadratic curves as they are
+    asked for.
+    """
+
+    def __init__(self, compiler):
+        self._compiler = compiler
+        self._glyphs = {}
+
+    def __contains__(self, name):
+        return name in self._compiler.allGlyphs
+
+    def __getitem__(self, name):
+        glyph = self._glyphs.get(name)
+        if glyph is None:
+            compiler = self._compiler
+            glyph = self._glyphs[name] = compiler.convertGlyph(
+                compiler.allGlyphs[name])
+        return glyph
@@ -0,0 +1,223 @@
+"""
+Checks of the glyphs of a font before it is exported.
+
+Outline checks only look at the glyph itself, their results are kept under
+the "TruFont.Digest" representation of the glyph so that checking a font
+again only looks at the glyphs that changed. Large batches of glyphs are
+checked by a pool of worker processes. Component checks depend on the rest
+of the font and are cheap, they run every time.
+"""
+from booleanOperations.booleanGlyph import BooleanGlyph
+from concurrent.futures import ProcessPoolExecutor
+from defcon import Glyph
+from fontTools.misc.bezierTools import solveQuadratic
+from trufont.tools.glyphLoader import (
+    CHUNKS_PER_WORKER, GlyphData, MIN_PARALLEL_GLYPH_COUNT)
+import itertools
+import multiprocessing
+import os
+
+# how far, in units, a curve may bulge past its on-curve points before it
+# needs points at its extremes
+EXTREME_TOLERANCE = 0.5
+
+
+def hasOverlap(glyph):
+    """
+    Returns whether the closed contours of *glyph* overlap.
+    """
+    bGlyph = BooleanGlyph()
+    pen = bGlyph.getPointPen()
+    openContours = 0
+    for contour in glyph:
+        if not contour.open:
+            contour.drawPoints(pen)
+        else:
+            openContours += 1
+    bGlyph = bGlyph.removeOverlap()
+    return len(bGlyph.contours) + openContours != len(glyph)
+
+
+def _curveExtremes(p0, p1, p2, p3):
+    # parameters where the curve derivative is zero, per axis
+    for axis in (0, 1):
+        a0, a1, a2, a3 = p0[axis], p1[axis], p2[axis], p3[axis]
+        a = -a0 + 3 * a1 - 3 * a2 + a3
+        b = 2 * (a0 - 2 * a1 + a2)
+        c = a1 - a0
+        for t in solveQuadratic(a, b, c):
+            if 0 < t < 1:
+                mt = 1 - t
+                value = mt * mt * mt * a0 + 3 * mt * mt * t * a1 + \
+                    3 * mt * t * t * a2 + t * t * t * a3
+                if value < min(a0, a3) - EXTREME_TOLERANCE or \
+                        value > max(a0, a3) + EXTREME_TOLERANCE:
+                    return True
+    return False
+
+
+def checkOutline(glyph):
+    """
+    Returns the (check, message) issues of the contours of defcon *glyph*.
+    """
+    issues = []
+    quadratic = False
+    for index, contour in enumerate(glyph):
+        if contour.open:
+            issues.append(("openContour", "contour {} is open".format(index)))
+        points = list(contour)
+        for pointIndex, point in enumerate(points):
+            if point.segmentType == "qcurve":
+                quadratic = True
+            if point.segmentType != "curve":
+                continue
+            if contour.open and pointIndex < 3:
+                continue
+            # closed contours wrap around
+            p0, p1, p2 = (points[pointIndex - i] for i in (3, 2, 1))
+            if p1.segmentType is not None or p2.segmentType is not None:
+                continue
+            if _curveExtremes((p0.x, p0.y), (p1.x, p1.y), (p2.x, p2.y),
+                              (point.x, point.y)):
+                issues.append((
+                    "extremePoints",
+                    "contour {} lacks extreme points before point {}".format(
+                        index, pointIndex)))
+    # booleanOperations only handles cubic curves
+    if len(glyph) > 1 and not quadratic and hasOverlap(glyph):
+        issues.append(("overlap", "contours overlap"))
+    return issues
+
+
+def checkOutlines(glyphsData):
+    """
+    Returns the issues of the outlines of *glyphsData* (GlyphData objects).
+    """
+    results = []
+    for data in glyphsData:
+        glyph = Glyph()
+        data.drawPoints(glyph.getPointPen())
+        results.append(checkOutline(glyph))
+    return results
+
+
+class PreflightReport(object):
+    """
+    The issues found in a font: a list of (glyphName, check, message)
+    tuples, in glyph order.
+    """
+
+    def __init__(self, issues=None, glyphCount=0):
+        self.issues = issues or []
+        self.glyphCount = glyphCount
+
+    def __len__(self):
+        return len(self.issues)
+
+    def glyphNames(self):
+        """
+        Returns the names of the glyphs that have issues, in order.
+        """
+        glyphNames = []
+        for glyphName, _, _ in self.issues:
+            if not glyphNames or glyphNames[-1] != glyphName:
+                glyphNames.append(glyphName)
+        return glyphNames
+
+    def issuesByCheck(self):
+        """
+        Returns a {check: [(glyphName, message)]} dict of the issues.
+        """
+        issuesByCheck = {}
+        for glyphName, check, message in self.issues:
+            issuesByCheck.setdefault(check, []).append((glyphName, message))
+        return issuesByCheck
+
+    def __str__(self):
+        return "\n".join("{}: {} ({})".format(glyphName, message, check)
+                         for glyphName, check, message in self.issues)
+
+
+class PreflightChecker(object):
+    """
+    Checks the glyphs of fonts for open contours, missing component base
+    glyphs, overlapping contours and missing extreme points.
+
+    Outline results are cached by glyph content; glyphs missing from the
+    cache are checked by *workerCount* processes (defaults to the number of
+    CPUs) when there are enough of them.
+    """
+
+    def __init__(self, workerCount=None):
+        self._workerCount = workerCount
+        self._results = {}
+
+    def workerCount(self):
+        if not self._workerCount:
+            return os.cpu_count() or 1
+        return self._workerCount
+
+    def setWorkerCount(self, workerCount):
+        self._workerCount = workerCount
+
+    def clear(self):
+        self._results = {}
+
+    def check(self, font, glyphNames=None):
+        """
+        Checks the glyphs of *glyphNames* in *font* (all of them by default)
+        and returns a PreflightReport.
+        """
+        if glyphNames is None:
+            allGlyphNames = font.glyphOrder + sorted(
+                set(font.keys()) - set(font.glyphOrder))
+        else:
+            allGlyphNames = glyphNames
+        glyphs = [font[glyphName] for glyphName in allGlyphNames
+                  if glyphName in font]
+        keys = [glyph.getRepresentation("TruFont.Digest") for glyph in glyphs]
+        cachedResults = self._results
+        results = {}
+        toCheck = []
+        for glyph, key in zip(glyphs, keys):
+            if key in results:
+                continue
+            if key in cachedResults:
+                results[key] = cachedResults[key]
+            else:
+                results[key] = None
+                toCheck.append((glyph, key))
+        workerCount = self.workerCount()
+        if workerCount < 2 or len(toCheck) < MIN_PARALLEL_GLYPH_COUNT:
+            for glyph, key in toCheck:
+                results[key] = checkOutline(glyph)
+        else:
+            chunkSize = -(-len(toCheck) // (workerCount * CHUNKS_PER_WORKER))
+            chunks = [
+                [GlyphData.fromGlyph(glyph)
+                 for glyph, _ in toCheck[i:i + chunkSize]]
+                for i in range(0, len(toCheck), chunkSize)]
+            # don't fork the GUI process
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                    workerCount, mp_context=context) as executor:
+                newResults = itertools.chain.from_iterable(
+                    executor.map(checkOutlines, chunks))
+                for (_, key), issues in zip(toCheck, newResults):
+                    results[key] = issues
+        if glyphNames is None:
+            # only keep the glyphs that are still around
+            self._results = results
+        else:
+            cachedResults.update(results)
+        issues = []
+        for glyph, key in zip(glyphs, keys):
+            for component in glyph.components:
+                if component.baseGlyph not in font:
+                    issues.append((
+                        glyph.name, "missingComponent",
+                        "component base glyph {} is missing".format(
+                            component.baseGlyph)))
+            for check, message in results[key]:
+                issues.append((glyph.name, check, message))
+        return PreflightReport(issues, len(glyphs))
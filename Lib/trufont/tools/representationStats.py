@@ -0,0 +1,62 @@
+"""
+Hit and miss counts of representations, per factory name.
+
+Counting is off by default. To measure, from the scripting window:
+
+    from trufont.tools.representationStats import representationStats
+    representationStats.enabled = True
+    # ... use the app, then
+    print(representationStats)
+"""
+
+
+class RepresentationStats(object):
+    """
+    Counts the representations asked of TruFont objects while enabled: hits
+    come from the representation cache of the object, misses are built by
+    the factory.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        # name: [hits, misses]
+        self._counts = {}
+
+    def record(self, name, hit):
+        counts = self._counts.get(name)
+        if counts is None:
+            counts = self._counts[name] = [0, 0]
+        counts[0 if hit else 1] += 1
+
+    def hits(self, name):
+        return self._counts.get(name, (0, 0))[0]
+
+    def misses(self, name):
+        return self._counts.get(name, (0, 0))[1]
+
+    def hitRate(self, name):
+        """
+        Returns the share of lookups of *name* that were hits, or None if
+        there were none.
+        """
+        hits, misses = self._counts.get(name, (0, 0))
+        if not hits + misses:
+            return None
+        return hits / (hits + misses)
+
+    def names(self):
+        return sorted(self._counts)
+
+    def clear(self):
+        self._counts = {}
+
+    def __str__(self):
+        lines = []
+        for name in self.names():
+            hits, misses = self._counts[name]
+            lines.append("{}: {} hits, {} misses ({:.0%})".format(
+                name, hits, misses, self.hitRate(name)))
+        return "\n".join(lines)
+
+
+representationStats = RepresentationStats()
@@ -0,0 +1,58 @@
+"""
+Decoding of the glyphs of OpenType/TrueType/WOFF binaries into GlyphData,
+so that it can be spread over worker processes.
+"""
+from fontTools.pens.pointPen import SegmentToPointPen
+from fontTools.ttLib import TTFont
+from trufont.tools.glyphLoader import GlyphData, _RecordingPointPen
+
+# binaries opened by this process, so that each worker parses the tables it
+# needs only once
+_fonts = {}
+
+
+def _openFont(path):
+    font = _fonts.get(path)
+    if font is None:
+        font = _fonts[path] = TTFont(path, lazy=True)
+    return font
+
+
+def readGlyphOrder(path):
+    """
+    Returns the glyph order of the binary at *path* and a {glyphName:
+    unicodes} dict made from its cmap.
+    """
+    font = TTFont(path, lazy=True)
+    glyphOrder = font.getGlyphOrder()
+    unicodes = {}
+    if "cmap" in font:
+        for table in font["cmap"].tables:
+            if not table.isUnicode():
+                continue
+            for value, glyphName in table.cmap.items():
+                glyphUnicodes = unicodes.setdefault(glyphName, [])
+                if value not in glyphUnicodes:
+                    glyphUnicodes.append(value)
+    for glyphUnicodes in unicodes.values():
+        glyphUnicodes.sort()
+    font.close()
+    return glyphOrder, unicodes
+
+
+def readGlyphs(path, glyphNames):
+    """
+    Returns [(glyphName, GlyphData)] for *glyphNames* in the binary at
+    *path*.
+    """
+    glyphSet = _openFont(path).getGlyphSet()
+    result = []
+    for glyphName in glyphNames:
+        glyph = glyphSet[glyphName]
+        data = GlyphData()
+        data.attributes["width"] = glyph.width
+        pen = _RecordingPointPen()
+        glyph.draw(SegmentToPointPen(pen))
+        data.outline = pen.value
+        result.append((glyphName, data))
+    return result
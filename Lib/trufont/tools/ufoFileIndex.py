@@ -0,0 +1,270 @@
+"""
+An index of the files of a UFO, to tell which parts of a font changed on
+disk.
+"""
+import hashlib
+import os
+import plistlib
+
+# UFO root files that map to a font attribute
+FONT_FILES = {
+    "fontinfo.plist": "info",
+    "groups.plist": "groups",
+    "kerning.plist": "kerning",
+    "features.fea": "features",
+    "lib.plist": "lib",
+}
+
+
+def dataDigest(data):
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha1(data).digest()
+
+
+def fileDigest(path):
+    with open(path, "rb") as file:
+        return dataDigest(file.read())
+
+
+def _readPlist(path):
+    try:
+        with open(path, "rb") as file:
+            return plistlib.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+class UFOFileIndex(object):
+    """
+    The modification times and sizes of the files of the UFO at *path*,
+    with their content hashes, and the layer and glyph contents that map
+    those files to font objects.
+
+    Hashes are recorded with setDigest() by whoever reads the file
+    anyway, and computed when the stat of a file changes so that touching
+    a file doesn't count as a change. A file that changed before its hash
+    was known counts as changed.
+
+    If *layerDirs* ({layerName: dirName}) and *contents* ({dirName:
+    {glyphName: fileName}}) are given, they are taken as read and the UFO
+    isn't scanned until changes() is first called. Files that weren't
+    recorded by then are taken as they are on disk.
+    """
+
+    def __init__(self, path, layerDirs=None, contents=None):
+        self.path = path
+        self._entries = {}
+        self._scanned = False
+        if layerDirs is None:
+            self._layerDirs = {}
+            self._contents = {}
+            self.update()
+        else:
+            self._layerDirs = dict(layerDirs)
+            self._contents = {
+                dirName: dict(glyphs) for dirName, glyphs in contents.items()}
+
+    def layerDirs(self):
+        return dict(self._layerDirs)
+
+    def paths(self):
+        """
+        Returns the directories and metadata files that should be watched.
+        """
+        paths = [self.path]
+        for fileName in FONT_FILES:
+            paths.append(os.path.join(self.path, fileName))
+        for dirName in self._layerDirs.values():
+            layerPath = os.path.join(self.path, dirName)
+            paths.append(layerPath)
+            paths.append(os.path.join(layerPath, "contents.plist"))
+        return [path for path in paths if os.path.exists(path)]
+
+    def stat(self, relPath):
+        """
+        Returns the (mtime_ns, size) of the file at *relPath* as of the last
+        scan, or None.
+        """
+        entry = self._entries.get(relPath)
+        if entry is None:
+            if self._scanned:
+                return None
+            try:
+                stat = os.stat(os.path.join(self.path, relPath))
+            except OSError:
+                return None
+            entry = self._entries[relPath] = [
+                stat.st_mtime_ns, stat.st_size, None]
+        return tuple(entry[:2])
+
+    def digest(self, relPath):
+        entry = self._entries.get(relPath)
+        if entry is None:
+            return None
+        if entry[2] is None:
+            try:
+                entry[2] = fileDigest(os.path.join(self.path, relPath))
+            except OSError:
+                return None
+        return entry[2]
+
+    def setDigest(self, relPath, data):
+        """
+        Records *data* as the current contents of the file at *relPath*.
+        """
+        try:
+            stat = os.stat(os.path.join(self.path, relPath))
+        except OSError:
+            return
+        self._entries[relPath] = [
+            stat.st_mtime_ns, stat.st_size, dataDigest(data)]
+
+    def setGlyphDigest(self, layerName, glyphName, data):
+        relPath = self.glyphPath(layerName, glyphName)
+        if relPath is not None:
+            self.setDigest(relPath, data)
+
+    def glyphPath(self, layerName, glyphName):
+        dirName = self._layerDirs.get(layerName)
+        if dirName is None:
+            return None
+        fileName = self._contents[dirName].get(glyphName)
+        if fileName is None:
+            return None
+        return os.path.join(dirName, fileName)
+
+    def _scan(self):
+        entries = {}
+        path = self.path
+        for entry in os.scandir(path):
+            if entry.is_file():
+                stat = entry.stat()
+                entries[entry.name] = [stat.st_mtime_ns, stat.st_size, None]
+        layerContents = _readPlist(os.path.join(path, "layercontents.plist"))
+        if layerContents is not None:
+            layerDirs = dict(layerContents)
+        else:
+            layerDirs = {"public.default": "glyphs"}
+        contents = {}
+        for dirName in layerDirs.values():
+            layerPath = os.path.join(path, dirName)
+            if not os.path.isdir(layerPath):
+                continue
+            for entry in os.scandir(layerPath):
+                if entry.is_file():
+                    stat = entry.stat()
+                    entries[os.path.join(dirName, entry.name)] = [
+                        stat.st_mtime_ns, stat.st_size, None]
+            contents[dirName] = _readPlist(
+                os.path.join(layerPath, "contents.plist")) or {}
+        layerDirs = {
+            name: dirName for name, dirName in layerDirs.items()
+            if dirName in contents}
+        return entries, layerDirs, contents
+
+    def update(self):
+        """
+        Takes the files on disk as the new reference, keeping the hashes of
+        files that didn't change.
+        """
+        entries, self._layerDirs, self._contents = self._scan()
+        for relPath, entry in entries.items():
+            oldEntry = self._entries.get(relPath)
+            if oldEntry is not None and oldEntry[:2] == entry[:2]:
+                entry[2] = oldEntry[2]
+            elif relPath in FONT_FILES:
+                # those are few and small, hash them upfront
+                entry[2] = fileDigest(os.path.join(self.path, relPath))
+        self._entries = entries
+        self._scanned = True
+
+    def updateFiles(self, relPaths, layerDirs, contents):
+        """
+        Takes the files at *relPaths* on disk as the new reference, along
+        with the *layerDirs* and glyph *contents* of the layers, e.g. after
+        those files were written. Other files are left alone.
+        """
+        self._layerDirs = dict(layerDirs)
+        self._contents = {
+            dirName: dict(glyphs) for dirName, glyphs in contents.items()}
+        for relPath in relPaths:
+            try:
+                stat = os.stat(os.path.join(self.path, relPath))
+            except OSError:
+                self._entries.pop(relPath, None)
+                continue
+            entry = [stat.st_mtime_ns, stat.st_size, None]
+            oldEntry = self._entries.get(relPath)
+            if oldEntry is not None and oldEntry[:2] == entry[:2]:
+                entry[2] = oldEntry[2]
+            elif relPath in FONT_FILES:
+                entry[2] = fileDigest(os.path.join(self.path, relPath))
+            self._entries[relPath] = entry
+
+    def changes(self):
+        """
+        Rescans the UFO and returns what changed since the last scan as a
+        dict of *info*, *groups*, *kerning*, *features* and *lib* bools and
+        a *layers* dict of {layerName: dict(info=bool, modifiedGlyphs=set,
+        addedGlyphs=set, deletedGlyphs=set)} for the layers that changed,
+        or None if nothing changed.
+
+        Layers added or removed from the UFO aren't reported.
+        """
+        oldEntries, oldContents = self._entries, self._contents
+        entries, layerDirs, contents = self._scan()
+        changedPaths = set()
+        for relPath in set(oldEntries) | set(entries):
+            oldEntry = oldEntries.get(relPath)
+            entry = entries.get(relPath)
+            if oldEntry is None and entry is not None and \
+                    not self._scanned:
+                # not read yet, the first scan is the reference
+                if relPath in FONT_FILES:
+                    entry[2] = fileDigest(os.path.join(self.path, relPath))
+            elif oldEntry is None or entry is None:
+                changedPaths.add(relPath)
+            elif oldEntry[:2] != entry[:2]:
+                try:
+                    entry[2] = fileDigest(os.path.join(self.path, relPath))
+                except OSError:
+                    changedPaths.add(relPath)
+                    continue
+                if entry[2] != oldEntry[2]:
+                    changedPaths.add(relPath)
+            else:
+                entry[2] = oldEntry[2]
+        self._entries, self._contents = entries, contents
+        self._layerDirs = layerDirs
+        self._scanned = True
+        if not changedPaths:
+            return None
+        changes = dict(layers={})
+        for fileName, attr in FONT_FILES.items():
+            changes[attr] = fileName in changedPaths
+        for layerName, dirName in layerDirs.items():
+            if dirName not in oldContents:
+                continue
+            oldGlyphs, glyphs = oldContents[dirName], contents[dirName]
+            addedGlyphs = set(glyphs) - set(oldGlyphs)
+            deletedGlyphs = set(oldGlyphs) - set(glyphs)
+            modifiedGlyphs = set()
+            for glyphName, fileName in glyphs.items():
+                if glyphName in addedGlyphs:
+                    continue
+                if fileName != oldGlyphs[glyphName] or \
+                        os.path.join(dirName, fileName) in changedPaths:
+                    modifiedGlyphs.add(glyphName)
+            info = os.path.join(dirName, "layerinfo.plist") in changedPaths
+            if info or addedGlyphs or deletedGlyphs or modifiedGlyphs:
+                changes["layers"][layerName] = dict(
+                    info=info,
+                    modifiedGlyphs=modifiedGlyphs,
+                    addedGlyphs=addedGlyphs,
+                    deletedGlyphs=deletedGlyphs,
+                )
+        if not any(changes[attr] for attr in FONT_FILES.values()) and \
+                not changes["layers"]:
+            return None
+        return changes
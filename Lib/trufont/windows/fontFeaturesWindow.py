@@ -2,6 +2,7 @@ from defconQt.controls.featureCodeEditor import FeatureCodeEditor
 from PyQt5.QtCore import QSize
 from PyQt5.QtWidgets import QApplication, QMainWindow, QMessageBox
 from trufont.objects import settings
+from trufont.objects.featureChecker import FeatureChecker
 from trufont.objects.menu import Entries
 
 
@@ -15,9 +16,14 @@ class FontFeaturesWindow(QMainWindow):
         self.editor = FeatureCodeEditor(self)
         self.editor.setPlainText(self.font.features.text)
         self.editor.modificationChanged.connect(self.setWindowModified)
+        self.featureChecker = FeatureChecker(self.font, self)
+        self.featureChecker.checked.connect(self._featuresChecked)
+        self.editor.textChanged.connect(self._textChanged)
 
         self.updateWindowTitle()
         self.setCentralWidget(self.editor)
+        self.statusBar().setSizeGripEnabled(False)
+        self._textChanged()
 
         self.readSettings()
 
@@ -52,6 +58,15 @@ class FontFeaturesWindow(QMainWindow):
     def _fontInfoChanged(self, notification):
         self.updateWindowTitle()
 
+    def _textChanged(self):
+        self.featureChecker.check(self.editor.toPlainText())
+
+    def _featuresChecked(self, error):
+        if error is None:
+            self.statusBar().clearMessage()
+        else:
+            self.statusBar().showMessage(str(error))
+
     # ------------
     # Menu methods
     # ------------
@@ -100,3 +115,4 @@ class FontFeaturesWindow(QMainWindow):
                 event.ignore()
                 return
             self.font.info.removeObserver(self, "Info.Changed")
+        self.featureChecker.wait()
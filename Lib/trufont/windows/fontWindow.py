@@ -1,9 +1,18 @@
-from defconQt.controls.glyphCellView import GlyphCellView, GlyphCellWidget
+from defconQt.controls.glyphCellView import (
+    GlyphCellView, GlyphCellWidget, cacheBustSize, insertionPositionColor)
+from defconQt.representationFactories.glyphCellFactory import (
+    GlyphCellHeaderHeight, GlyphCellMinHeightForHeader,
+    GlyphCellMinHeightForMetrics)
+from defconQt.tools import platformSpecific as basePlatformSpecific
 from defconQt.windows.baseWindows import BaseMainWindow
-from trufont.controls.fontDialogs import AddGlyphsDialog, SortDialog
+from trufont.controls.fontDialogs import (
+    AddGlyphsDialog, PreflightDialog, SortDialog)
 from trufont.objects import settings
 from trufont.objects.defcon import TFont
+from trufont.objects.glyphCellRenderer import GlyphCellRenderer
+from trufont.objects.lazyGlyphList import LazyGlyphList
 from trufont.objects.menu import Entries
+from trufont.representationFactories.glyphCellFactory import GlyphCellImage
 from trufont.tools import errorReports, platformSpecific
 from trufont.windows.fontFeaturesWindow import FontFeaturesWindow
 from trufont.windows.fontInfoWindow import FontInfoWindow
@@ -11,13 +20,16 @@ from trufont.windows.glyphWindow import GlyphWindow
 from trufont.windows.groupsWindow import GroupsWindow
 from trufont.windows.metricsWindow import MetricsWindow
 from trufont.windows.settingsWindow import SettingsWindow
-from PyQt5.QtCore import QEvent, QMimeData, QSize, Qt
-from PyQt5.QtGui import QCursor, QKeySequence
+from PyQt5.QtCore import QEvent, QMimeData, QRectF, QSize, Qt
+from PyQt5.QtGui import (
+    QColor, QCursor, QKeySequence, QPainter, QPainterPath, QPalette)
 from PyQt5.QtWidgets import (
-    QApplication, QFileDialog, QLabel, QMessageBox, QSlider, QToolTip)
+    QApplication, QFileDialog, QLabel, QMessageBox, QPushButton, QSlider,
+    QToolTip)
 from collections import OrderedDict
 import os
 import pickle
+import time
 
 
 class FontWindow(BaseMainWindow):
@@ -31,20 +43,24 @@ class FontWindow(BaseMainWindow):
         self._featuresWindow = None
         self._metricsWindow = None
         self._groupsWindow = None
+        self._importCancelButton = None
+        self._exportCancelButton = None
 
         self.glyphCellView = FontCellView(self)
         self.glyphCellView.glyphActivated.connect(self._glyphActivated)
         self.glyphCellView.glyphsDropped.connect(self._orderChanged)
         self.glyphCellView.selectionChanged.connect(self._selectionChanged)
         self.glyphCellView.setAcceptDrops(True)
-        self.glyphCellView.setCellRepresentationName("TruFont.GlyphCell")
+        self.glyphCellView.setCellRepresentationName(
+            "TruFont.GlyphCellImage")
         self.glyphCellView.setFocus()
 
         self.cellSizeSlider = QSlider(Qt.Horizontal, self)
         self.cellSizeSlider.setMinimum(32)
         self.cellSizeSlider.setMaximum(116)
         self.cellSizeSlider.setFixedWidth(.9 * self.cellSizeSlider.width())
-        self.cellSizeSlider.sliderReleased.connect(self.writeSettings)
+        self.cellSizeSlider.sliderPressed.connect(self._sliderPressed)
+        self.cellSizeSlider.sliderReleased.connect(self._sliderReleased)
         self.cellSizeSlider.valueChanged.connect(self._sliderCellSizeChanged)
         self.selectionLabel = QLabel(self)
 
@@ -62,6 +78,8 @@ class FontWindow(BaseMainWindow):
 
         app = QApplication.instance()
         app.dispatcher.addObserver(self, "_fontSaved", "fontSaved")
+        app.dispatcher.addObserver(
+            self, "_fontChangedExternally", "fontChangedExternally")
 
         self.setCentralWidget(self.glyphCellView)
         self.setWindowTitle()
@@ -96,6 +114,9 @@ class FontWindow(BaseMainWindow):
         fileMenu.fetchAction(Entries.File_Reload, self.reloadFile)
         fileMenu.addSeparator()
         fileMenu.fetchAction(Entries.File_Export, self.exportFile)
+        fileMenu.fetchAction(
+            Entries.File_Export_Selection, self.exportSelection)
+        fileMenu.fetchAction(Entries.File_Export_All)
         fileMenu.fetchAction(Entries.File_Exit)
 
         editMenu = menuBar.fetchMenu(Entries.Edit)
@@ -190,10 +211,41 @@ class FontWindow(BaseMainWindow):
     def _fontSaved(self, notification):
         if notification.data["font"] != self._font:
             return
-        self.setWindowModified(False)
+        # the font may have been edited during a background save
+        self.setWindowModified(self._font.dirty)
+
+    def _fontChangedExternally(self, notification):
+        font = notification.data["font"]
+        if font != self._font:
+            return
+        if font.dirty:
+            currentFont = self.windowTitle()[3:]
+            body = self.tr("“{}” was changed by another application. Do you "
+                           "want to reload the changes?").format(currentFont)
+            reloadDialog = QMessageBox(
+                QMessageBox.Question, None, body,
+                QMessageBox.Yes | QMessageBox.No, self)
+            reloadDialog.setInformativeText(
+                self.tr("Unsaved changes to the same glyphs will be lost."))
+            reloadDialog.setModal(True)
+            if reloadDialog.exec_() != QMessageBox.Yes:
+                return
+        font.reloadChanges(notification.data)
+        layerChanges = notification.data["layers"].get(
+            font.layers.defaultLayer.name)
+        if layerChanges is not None and (
+                layerChanges["addedGlyphs"] or layerChanges["deletedGlyphs"]):
+            self._updateGlyphsFromGlyphOrder()
 
     # widgets
 
+    def _sliderPressed(self):
+        self.glyphCellView.setLiveResizing(True)
+
+    def _sliderReleased(self):
+        self.glyphCellView.setLiveResizing(False)
+        self.writeSettings()
+
     def _sliderCellSizeChanged(self):
         cellSize = self.cellSizeSlider.value()
         self.glyphCellView.setCellSize(cellSize)
@@ -206,7 +258,7 @@ class FontWindow(BaseMainWindow):
     def _orderChanged(self):
         # TODO: reimplement when we start showing glyph subsets
         glyphs = self.glyphCellView.glyphs()
-        self._font.glyphOrder = [glyph.name for glyph in glyphs]
+        self._font.glyphOrder = glyphs.glyphNames()
 
     def _selectionChanged(self):
         # currentGlyph
@@ -241,33 +293,32 @@ class FontWindow(BaseMainWindow):
         self._updateGlyphsFromGlyphOrder()
 
     def _updateGlyphsFromGlyphOrder(self):
+        # only deal with glyph names here, glyphs are loaded by the cell view
+        # as they become visible
         font = self._font
         glyphOrder = font.glyphOrder
         if glyphOrder:
-            glyphCount = 0
-            glyphs = []
+            glyphNames = []
             for glyphName in glyphOrder:
-                if glyphName in font:
-                    glyph = font[glyphName]
-                    glyphCount += 1
-                else:
-                    glyph = font.newStandardGlyph(glyphName, asTemplate=True)
-                glyphs.append(glyph)
-            if glyphCount < len(font):
+                if glyphName not in font:
+                    font.newStandardGlyph(glyphName, asTemplate=True)
+                glyphNames.append(glyphName)
+            orderedNames = set(glyphNames)
+            if len(orderedNames) < len(font):
                 # if some glyphs in the font are not present in the glyph
-                # order, loop again to add them at the end
-                for glyph in font:
-                    if glyph not in glyphs:
-                        glyphs.append(glyph)
+                # order, add them at the end
+                for glyphName in font.keys():
+                    if glyphName not in orderedNames:
+                        glyphNames.append(glyphName)
                 font.disableNotifications(observer=self)
-                font.glyphOrder = [glyph.name for glyph in glyphs]
+                font.glyphOrder = glyphNames
                 font.enableNotifications(observer=self)
         else:
-            glyphs = list(font)
+            glyphNames = list(font.keys())
             font.disableNotifications(observer=self)
-            font.glyphOrder = [glyph.name for glyph in glyphs]
+            font.glyphOrder = glyphNames
             font.enableNotifications(observer=self)
-        self.glyphCellView.setGlyphs(glyphs)
+        self.glyphCellView.setGlyphs(LazyGlyphList(font, glyphNames))
 
     def _sortDescriptorChanged(self, notification):
         font = notification.object
@@ -303,13 +354,47 @@ class FontWindow(BaseMainWindow):
 
         if path:
             font = TFont()
+            window = FontWindow(font)
             try:
-                font.extract(path)
+                importer = font.extractInBackground(path, window)
             except Exception as e:
+                window.deleteLater()
                 errorReports.showCriticalException(e)
                 return
-            window = FontWindow(font)
             window.show()
+            window._importStarted(importer)
+
+    def _importStarted(self, importer):
+        importer.glyphsAdded.connect(self._importGlyphsAdded)
+        importer.progressChanged.connect(self._importProgressChanged)
+        importer.finished.connect(self._importFinished)
+        self._importCancelButton = QPushButton(self.tr("Cancel"), self)
+        self._importCancelButton.clicked.connect(importer.cancel)
+        self.statusBar().addWidget(self._importCancelButton)
+        self.statusBar().showMessage(self.tr("Importing…"))
+
+    def _importGlyphsAdded(self, glyphNames):
+        # the glyph order is only set once the import is done
+        glyphs = self.glyphCellView.glyphs()
+        glyphs.addGlyphNames(glyphNames)
+        self.glyphCellView.setGlyphs(glyphs)
+
+    def _importProgressChanged(self, done, total):
+        percent = 100 * done // total if total else 100
+        self.statusBar().showMessage(
+            self.tr("Importing… {}%").format(percent))
+
+    def _importFinished(self):
+        self.statusBar().clearMessage()
+        self.statusBar().removeWidget(self._importCancelButton)
+        self._importCancelButton.deleteLater()
+        self._importCancelButton = None
+        error = self.sender().error
+        if error is not None:
+            try:
+                raise error
+            except Exception as e:
+                errorReports.showCriticalException(e)
 
     def saveFile(self, path=None, ufoFormatVersion=3):
         if path is None and self._font.path is None:
@@ -317,7 +402,27 @@ class FontWindow(BaseMainWindow):
         else:
             if path is None:
                 path = self._font.path
-            self._font.save(path, ufoFormatVersion)
+            font = self._font
+            if font.canSaveInBackground(path, ufoFormatVersion):
+                saver = font.saveInBackground(self)
+                saver.progressChanged.connect(self._saveProgressChanged)
+                saver.finished.connect(self._saveFinished)
+            else:
+                font.save(path, ufoFormatVersion)
+
+    def _saveProgressChanged(self, done, total):
+        percent = 100 * done // total if total else 100
+        self.statusBar().showMessage(
+            self.tr("Saving… {}%").format(percent))
+
+    def _saveFinished(self):
+        self.statusBar().clearMessage()
+        error = self.sender().error
+        if error is not None:
+            try:
+                raise error
+            except Exception as e:
+                errorReports.showCriticalException(e)
 
     def saveFileAs(self):
         fileFormats = OrderedDict([
@@ -340,12 +445,8 @@ class FontWindow(BaseMainWindow):
         font = self._font
         if font.path is None:
             return
-        font.reloadInfo()
-        font.reloadKerning()
-        font.reloadGroups()
-        font.reloadFeatures()
-        font.reloadLib()
-        font.reloadGlyphs(font.keys())
+        font.reload()
+        self._updateGlyphsFromGlyphOrder()
         self.setWindowModified(False)
 
     def exportFile(self):
@@ -353,8 +454,64 @@ class FontWindow(BaseMainWindow):
             self, self.tr("Export File"), None,
             self.tr("OpenType PS font {}").format("(*.otf)"))
         if path:
+            report = self._font.preflight()
+            if not PreflightDialog.confirmExport(self, [(None, report)]):
+                return
             try:
-                self._font.export(path)
+                exporter = self._font.exportInBackground(path, parent=self)
+            except Exception as e:
+                errorReports.showCriticalException(e)
+                return
+            exporter.stageChanged.connect(self._exportStageChanged)
+            exporter.finished.connect(self._exportFinished)
+            if self._exportCancelButton is None:
+                self._exportCancelButton = QPushButton(self.tr("Cancel"), self)
+                self._exportCancelButton.clicked.connect(
+                    self._font.cancelBackgroundExport)
+                self.statusBar().addWidget(self._exportCancelButton)
+            self.statusBar().showMessage(self.tr("Exporting…"))
+
+    def exportSelection(self):
+        glyphs = self.glyphCellView.glyphsForIndexes(
+            self.glyphCellView.selection())
+        self.exportProof([glyph.name for glyph in glyphs])
+
+    def exportProof(self, glyphNames):
+        if not glyphNames:
+            return
+        path, _ = QFileDialog.getSaveFileName(
+            self, self.tr("Export Proof"), None,
+            self.tr("OpenType PS font {}").format("(*.otf)"))
+        if path:
+            try:
+                self._font.exportSubset(path, glyphNames)
+            except Exception as e:
+                errorReports.showCriticalException(e)
+
+    def _exportStageChanged(self, stage):
+        stageNames = dict(
+            outlines=self.tr("compiling outlines"),
+            features=self.tr("compiling features"),
+            subroutinization=self.tr("subroutinizing"),
+            save=self.tr("saving"),
+        )
+        stages = self.sender().snapshot.stages()
+        self.statusBar().showMessage(self.tr("Exporting… {}/{} ({})").format(
+            stages.index(stage) + 1, len(stages), stageNames[stage]))
+
+    def _exportFinished(self):
+        # an export started in the meantime takes over the status bar
+        if self._font.isExportingInBackground() or \
+                self._exportCancelButton is None:
+            return
+        self.statusBar().clearMessage()
+        self.statusBar().removeWidget(self._exportCancelButton)
+        self._exportCancelButton.deleteLater()
+        self._exportCancelButton = None
+        error = self.sender().error
+        if error is not None:
+            try:
+                raise error
             except Exception as e:
                 errorReports.showCriticalException(e)
 
@@ -452,7 +609,7 @@ class FontWindow(BaseMainWindow):
     def addGlyphs(self):
         glyphs = self.glyphCellView.glyphs()
         newGlyphNames, params, ok = AddGlyphsDialog.getNewGlyphNames(
-            self, glyphs)
+            self, glyphs.glyphNames())
         if ok:
             sortFont = params.pop("sortFont")
             for name in newGlyphNames:
@@ -553,10 +710,16 @@ class FontWindow(BaseMainWindow):
                 window=self,
             )
             app.postNotification("fontWindowWillClose", data)
+            self._font.cancelBackgroundExtract()
+            self._font.cancelBackgroundExport()
+            self._font.waitForBackgroundSave()
+            self._font.updateGlyphCache()
+            self.glyphCellView.cellRenderer().clear()
             self._font.removeObserver(self, "Font.Changed")
             app = QApplication.instance()
             app.dispatcher.removeObserver(self, "preferencesChanged")
             app.dispatcher.removeObserver(self, "fontSaved")
+            app.dispatcher.removeObserver(self, "fontChangedExternally")
             event.accept()
         else:
             event.ignore()
@@ -582,7 +745,102 @@ class FontWindow(BaseMainWindow):
         super().setWindowTitle("[*]{}".format(title))
 
 
+# cells are drawn on the main thread when no more than this many are missing
+# from the view, so that editing a glyph doesn't show a placeholder
+MAX_SYNC_CELL_COUNT = 4
+# rows drawn ahead of time behind the scroll direction
+ROWS_BEHIND = 2
+# while the cell size is dragged, cells are drawn at the first of these sizes
+# that is at least as large, and scaled down. Widths are scaled along and
+# rounded to a multiple of CELL_WIDTH_STEP
+CELL_SIZE_BUCKETS = (32, 48, 64, 80, 96, 116)
+CELL_WIDTH_STEP = 4
+
+placeholderColor = QColor(244, 244, 244)
+
+
 class FontCellWidget(GlyphCellWidget):
+    """
+    A GlyphCellWidget that works off a LazyGlyphList: painting, type-ahead
+    and reordering only touch glyph names, and glyphs are loaded as their
+    cells become visible.
+
+    When the cell representation is a GlyphCellImage, cells are drawn by a
+    GlyphCellRenderer ahead of the scroll direction, with a placeholder
+    shown until they are ready.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        cacheSize = settings.glyphCellCacheSize() * 1024 * 1024
+        self._cellRenderer = GlyphCellRenderer(
+            cacheSize=cacheSize, parent=self)
+        self._cellRenderer.cellsRendered.connect(self.update)
+        self._lastVisibleStart = 0
+        self._scrollDirection = 1
+        self._liveResizing = False
+
+    def cellRenderer(self):
+        return self._cellRenderer
+
+    def liveResizing(self):
+        return self._liveResizing
+
+    def setLiveResizing(self, value):
+        """
+        Sets whether the cell size is being changed interactively, in which
+        case cells are scaled from a few sizes rather than drawn at each
+        size the cells go through.
+        """
+        self._liveResizing = value
+        self.update()
+
+    def _cellArguments(self, scaled=False):
+        args = dict(self._cellRepresentationArguments)
+        width = self._cellWidth + 2 * self._cellWidthExtra
+        height = self._cellHeight
+        if scaled:
+            # the cell shows what it would at the size it's shown at
+            args.setdefault(
+                "drawHeader", height >= GlyphCellMinHeightForHeader)
+            args.setdefault(
+                "drawMetrics", height >= GlyphCellMinHeightForMetrics)
+            for size in CELL_SIZE_BUCKETS:
+                if size >= height:
+                    width = size * width / height
+                    width = max(CELL_WIDTH_STEP, CELL_WIDTH_STEP * round(
+                        width / CELL_WIDTH_STEP))
+                    height = size
+                    break
+        else:
+            self._cellSizeCache.add((width, height))
+        args["width"] = width
+        args["height"] = height
+        args["pixelRatio"] = self.devicePixelRatio()
+        return args
+
+    def _getCurrentRepresentation(self, glyph):
+        return glyph.getRepresentation(
+            self._cellRepresentationName,
+            **self._cellArguments(self._liveResizing))
+
+    def _visibleIndexes(self, rect):
+        columnCount = self._columnCount
+        if not columnCount:
+            return range(0)
+        cellHeight = self._cellHeight
+        firstRow = max(0, rect.top() // cellHeight)
+        lastRow = rect.bottom() // cellHeight
+        start = firstRow * columnCount
+        stop = min(len(self._glyphs), (lastRow + 1) * columnCount)
+        return range(start, stop)
+
+    def _checkFlushCache(self):
+        if len(self._cellSizeCache) >= cacheBustSize:
+            for glyph in self._glyphs.loadedGlyphs():
+                glyph.destroyRepresentation(self._cellRepresentationName)
+            self._cellRenderer.cache().clear()
+            self._cellSizeCache = set()
 
     def _proceedWithDeletion(self, erase=False):
         if not self._selection:
@@ -621,6 +879,214 @@ class FontCellWidget(GlyphCellWidget):
         else:
             super().keyPressEvent(event)
 
+    def _glyphNameInputEvent(self, event):
+        inputText = event.text()
+        if not self._isUnicodeChar(inputText):
+            return
+        rightNow = time.time()
+        if self._lastKeyInputTime is not None and \
+                rightNow - self._lastKeyInputTime > .75:
+            self._inputString = ""
+        self._lastKeyInputTime = rightNow
+        self._inputString += inputText
+        inputString = self._inputString
+
+        # match the closest name that starts with the input string, or else
+        # the closest name that sorts after it
+        match = lastResort = None
+        for index, name in enumerate(self._glyphs.glyphNames()):
+            if name.startswith(inputString):
+                if match is None or name < match[1]:
+                    match = (index, name)
+            elif name > inputString:
+                if lastResort is None or name < lastResort[1]:
+                    lastResort = (index, name)
+        if match is None:
+            match = lastResort
+        if match is not None:
+            self.setSelection({match[0]})
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        visibleRect = event.rect()
+        columnCount = self._columnCount
+        cellWidth = self._cellWidth + 2 * self._cellWidthExtra
+        cellHeight = self._cellHeight
+
+        painter.fillRect(visibleRect, Qt.white)
+        palette = self.palette()
+        active = palette.currentColorGroup() != QPalette.Inactive
+        selectionColor = palette.color(QPalette.Highlight)
+        opacityMultiplier = basePlatformSpecific.colorOpacityMultiplier()
+        selectionColor.setAlphaF(.2 * opacityMultiplier if active else .7)
+        drawHeaderSelection = cellHeight >= GlyphCellMinHeightForHeader
+        name = self._cellRepresentationName
+        liveResizing = self._liveResizing
+        args = self._cellArguments(liveResizing)
+        scaledArgs = args if liveResizing else self._cellArguments(True)
+        cache = self._cellRenderer.cache()
+        # only pull in the glyphs that intersect the exposed area
+        indexes = self._visibleIndexes(visibleRect)
+        representations = [
+            self._glyphs[index].getRepresentation(name, **args)
+            for index in indexes]
+        missingCells = [
+            (index, cellImage) for index, cellImage in zip(
+                indexes, representations)
+            if isinstance(cellImage, GlyphCellImage) and
+            cellImage.pixmap is None]
+        if 0 < len(missingCells) <= MAX_SYNC_CELL_COUNT:
+            self._cellRenderer.renderNow(
+                [self._glyphs[index] for index, _ in missingCells],
+                [cellImage for _, cellImage in missingCells])
+        painter.setRenderHint(QPainter.SmoothPixmapTransform)
+        for index, pixmap in zip(indexes, representations):
+            left = (index % columnCount) * cellWidth
+            top = (index // columnCount) * cellHeight
+            selected = index in self._selection
+            if selected:
+                painter.fillRect(
+                    left, top, cellWidth, cellHeight, selectionColor)
+            if isinstance(pixmap, GlyphCellImage):
+                cache.touch(pixmap)
+                pixmap = pixmap.pixmap
+                # show the scaled cell until this one is drawn
+                glyph = self._glyphs[index]
+                if pixmap is None and not liveResizing and \
+                        glyph.hasCachedRepresentation(name, **scaledArgs):
+                    pixmap = glyph.getRepresentation(
+                        name, **scaledArgs).pixmap
+            if pixmap is not None:
+                # scaled cells keep their aspect ratio
+                width = cellHeight * pixmap.width() / pixmap.height()
+                painter.drawPixmap(QRectF(
+                    left + .5 * (cellWidth - width), top, width,
+                    cellHeight), pixmap, QRectF(pixmap.rect()))
+            else:
+                painter.fillRect(
+                    left + 1, top + 1, cellWidth - 2, cellHeight - 2,
+                    placeholderColor)
+            if selected and drawHeaderSelection:
+                painter.fillRect(
+                    left, top + cellHeight - GlyphCellHeaderHeight,
+                    cellWidth, GlyphCellHeaderHeight, selectionColor)
+
+        # drop insertion position
+        dropIndex = self._currentDropIndex
+        if dropIndex is not None:
+            if columnCount:
+                x = (dropIndex % columnCount) * cellWidth
+                y = (dropIndex // columnCount) * cellHeight
+                # special-case the end-column
+                if dropIndex == len(self._glyphs) and \
+                        len(self._glyphs) < self.width() // self._cellWidth \
+                        or self.mapFromGlobal(QCursor.pos()).y() < y:
+                    x = columnCount * cellWidth
+                    y -= cellHeight
+            else:
+                x = y = 0
+            path = QPainterPath()
+            path.addRect(x - 2, y, 3, cellHeight)
+            path.addEllipse(x - 5, y - 5, 9, 9)
+            path.addEllipse(x - 5, y + cellHeight - 5, 9, 9)
+            path.setFillRule(Qt.WindingFill)
+            pen = painter.pen()
+            pen.setColor(Qt.white)
+            pen.setWidth(2)
+            painter.setPen(pen)
+            painter.setRenderHint(QPainter.Antialiasing)
+            painter.drawPath(path)
+            painter.fillPath(path, insertionPositionColor)
+
+        if representations and isinstance(
+                representations[0], GlyphCellImage):
+            self._renderAhead(args)
+
+    def _renderAhead(self, args):
+        # the visible cells first, then a screenful of cells in the scroll
+        # direction and a few rows the other way
+        visibleIndexes = self._visibleIndexes(
+            self.visibleRegion().boundingRect())
+        start, stop = visibleIndexes.start, visibleIndexes.stop
+        if start != self._lastVisibleStart:
+            self._scrollDirection = 1 if start > self._lastVisibleStart \
+                else -1
+            self._lastVisibleStart = start
+        count = stop - start
+        behindCount = ROWS_BEHIND * self._columnCount
+        glyphCount = len(self._glyphs)
+        if self._scrollDirection > 0:
+            ahead = range(stop, min(glyphCount, stop + count))
+            behind = range(start - 1, max(0, start - behindCount) - 1, -1)
+        else:
+            ahead = range(start - 1, max(0, start - count) - 1, -1)
+            behind = range(stop, min(glyphCount, stop + behindCount))
+        # don't draw cells ahead that would push visible ones out of the cache
+        pixelRatio = args["pixelRatio"]
+        cellBytes = 4 * args["width"] * args["height"] * pixelRatio ** 2
+        maxCount = max(
+            count, int(self._cellRenderer.cache().maxSize // cellBytes))
+        glyphs = []
+        cellImages = []
+        for indexes in (visibleIndexes, ahead, behind):
+            for index in indexes:
+                if len(glyphs) >= maxCount:
+                    break
+                glyph = self._glyphs[index]
+                glyphs.append(glyph)
+                cellImages.append(glyph.getRepresentation(
+                    self._cellRepresentationName, **args))
+        self._cellRenderer.render(glyphs, cellImages)
+
+    def dropEvent(self, event):
+        insert = self._currentDropIndex
+        glyphNames = self._glyphs.glyphNames()
+        newGlyphNames = [glyph.name for glyph in event.mimeData().glyphs()]
+        # put all glyphs to be moved to None (deleting them would
+        # invalidate our insert indexes)
+        if event.source() == self:
+            for index in self._selection:
+                glyphNames[index] = None
+        glyphNames = glyphNames[:insert] + newGlyphNames + glyphNames[insert:]
+        self._glyphs.setGlyphNames(
+            [name for name in glyphNames if name is not None])
+        self._currentDropIndex = None
+        self.setSelection(set())
+        self.glyphsDropped.emit()
+        self.update()
+
 
 class FontCellView(GlyphCellView):
     glyphCellWidgetClass = FontCellWidget
+
+    def cellRenderer(self):
+        return self._glyphCellWidget.cellRenderer()
+
+    def liveResizing(self):
+        return self._glyphCellWidget.liveResizing()
+
+    def setLiveResizing(self, value):
+        self._glyphCellWidget.setLiveResizing(value)
+
+    # observe the layer rather than each glyph, which would load all of them
+
+    def _subscribeToGlyphs(self, glyphs):
+        font = glyphs.font()
+        font.layers.defaultLayer.addObserver(
+            self, "_glyphChanged", "Layer.GlyphChanged")
+        font.info.addObserver(self, "_fontChanged", "Info.Changed")
+
+    def _unsubscribeFromGlyphs(self):
+        glyphs = self._glyphCellWidget.glyphs()
+        if not isinstance(glyphs, LazyGlyphList):
+            return
+        font = glyphs.font()
+        font.layers.defaultLayer.removeObserver(self, "Layer.GlyphChanged")
+        font.info.removeObserver(self, "Info.Changed")
+
+    def _fontChanged(self, notification):
+        glyphs = self._glyphCellWidget.glyphs()
+        representationName = self._glyphCellWidget.cellRepresentationName()
+        for glyph in glyphs.loadedGlyphs():
+            glyph.destroyRepresentation(representationName)
+        self._glyphCellWidget.update()
@@ -304,6 +304,8 @@ class GlyphWindow(BaseMainWindow):
 
     def _subscribeToGlyph(self, glyph):
         if glyph is not None:
+            # keep it loaded while it's shown
+            glyph.pin()
             glyph.addObserver(self, "_glyphNameChanged", "Glyph.NameChanged")
             glyph.addObserver(
                 self, "_glyphSelectionChanged", "Glyph.SelectionChanged")
@@ -314,6 +316,7 @@ class GlyphWindow(BaseMainWindow):
 
     def _unsubscribeFromGlyph(self, glyph):
         if glyph is not None:
+            glyph.unpin()
             glyph.removeObserver(self, "Glyph.NameChanged")
             glyph.removeObserver(self, "Glyph.SelectionChanged")
             undoManager = glyph.undoManager
@@ -43,6 +43,7 @@ class MetricsWindow(BaseWindow):
         self.toolbar.pointSizeChanged.connect(self.lineView.setPointSize)
         self.toolbar.settingsChanged.connect(self.lineView.setSettings)
         self.lineView.glyphActivated.connect(self._glyphActivated)
+        self.toolbar.exportProofAction.triggered.connect(self.exportProof)
         self.lineView.pointSizeModified.connect(self.toolbar.setPointSize)
         self.lineView.selectionModified.connect(self.table.setCurrentGlyph)
         self.table.selectedIndexChanged.connect(self.lineView.setSelected)
@@ -92,6 +93,16 @@ class MetricsWindow(BaseWindow):
     def setText(self, text):
         self.toolbar.setText(text)
 
+    def exportProof(self):
+        fontWindow = self.parent()
+        if fontWindow is None:
+            return
+        glyphNames = []
+        for glyph in self.table.glyphs():
+            if glyph.name in self.font and glyph.name not in glyphNames:
+                glyphNames.append(glyph.name)
+        fontWindow.exportProof(glyphNames)
+
     # -------------
     # Notifications
     # -------------
@@ -257,6 +268,9 @@ class MetricsToolBar(QToolBar):
         slider.valueChanged.connect(self._sliderLineHeightChanged)
         lineHeight.setDefaultWidget(slider)
         self.toolsMenu.addAction(lineHeight)
+        self.toolsMenu.addSeparator()
+        self.exportProofAction = self.toolsMenu.addAction(
+            self.tr("Export Proof…"))
         self.configBar.setMenu(self.toolsMenu)
 
         self.addWidget(self.leftTextField)
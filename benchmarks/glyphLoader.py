@@ -0,0 +1,69 @@
+"""
+Compares the serial and parallel .glif loaders.
+
+    python benchmarks/glyphLoader.py [path/to/font.ufo] [--workers N]
+
+Without a path, a synthetic UFO with --glyphs glyphs is generated in a
+temporary directory.
+"""
+from defcon import Font
+from trufont.objects.defcon import TFont
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+
+def makeFont(path, glyphCount):
+    font = Font()
+    for index in range(glyphCount):
+        glyph = font.newGlyph("glyph%05d" % index)
+        glyph.width = 500
+        glyph.unicodes = [0x4E00 + index]
+        pen = glyph.getPen()
+        for offset in range(0, 400, 100):
+            pen.moveTo((offset, 0))
+            pen.lineTo((offset + 80, 0))
+            pen.curveTo(
+                (offset + 120, 40), (offset + 120, 120), (offset + 80, 160))
+            pen.lineTo((offset, 160))
+            pen.closePath()
+    font.save(path)
+
+
+def timeLoad(path, workerCount):
+    start = time.perf_counter()
+    font = TFont(path, glyphLoaderWorkerCount=workerCount)
+    font.loadGlyphs()
+    return time.perf_counter() - start, len(font)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("path", nargs="?")
+    parser.add_argument("--glyphs", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=0)
+    args = parser.parse_args()
+
+    tempDir = None
+    path = args.path
+    if path is None:
+        tempDir = tempfile.mkdtemp()
+        path = os.path.join(tempDir, "Benchmark.ufo")
+        makeFont(path, args.glyphs)
+    try:
+        serial, glyphCount = timeLoad(path, 1)
+        parallel, _ = timeLoad(path, args.workers)
+    finally:
+        if tempDir is not None:
+            shutil.rmtree(tempDir)
+    workerCount = args.workers or os.cpu_count()
+    print("{} glyphs".format(glyphCount))
+    print("serial:   {:.3f}s".format(serial))
+    print("parallel: {:.3f}s ({} workers, {:.2f}x)".format(
+        parallel, workerCount, serial / parallel))
+
+
+if __name__ == "__main__":
+    main()
@@ -40,6 +40,9 @@ setup(
     entry_points={
         "gui_scripts": [
             "trufont =  trufont.__main__:main"
+        ],
+        "console_scripts": [
+            "trufont-compile = trufont.cli:main"
         ]
     },
     package_dir={"": "Lib"},
@@ -0,0 +1,217 @@
+from trufont import representationFactories
+from trufont.objects.defcon import NullNotifications, TFont
+from trufont.tools.artifactCache import (
+    ArtifactCache, fontKey, includedFeatures)
+import os
+import shutil
+import tempfile
+import unittest
+
+representationFactories.registerAllFactories()
+
+FEATURES = """\
+languagesystem DFLT dflt;
+
+feature liga {
+    sub A B by O;
+} liga;
+"""
+INCLUDE_FEATURES = "include(liga.fea);\n"
+
+
+def _drawTriangle(font, name="A", size=10):
+    pen = font[name].getPointPen()
+    pen.beginPath()
+    pen.addPoint((0, 0), "line")
+    pen.addPoint((0, size), "line")
+    pen.addPoint((size, 0), "line")
+    pen.endPath()
+
+
+def _makeFont(**kwargs):
+    font = TFont(notificationBackend=NullNotifications(), **kwargs)
+    info = font.info
+    info.familyName = "Test"
+    info.styleName = "Regular"
+    info.unitsPerEm = 1000
+    info.ascender = 750
+    info.descender = -250
+    info.xHeight = 500
+    info.capHeight = 700
+    for name, unicode in (("A", 0x41), ("B", 0x42), ("O", 0x4F),
+                          ("acute", 0xB4)):
+        glyph = font.newGlyph(name)
+        glyph.unicodes = [unicode]
+        glyph.width = 600
+        _drawTriangle(font, name, 500)
+    glyph = font.newGlyph("Aacute")
+    glyph.unicodes = [0xC1]
+    glyph.width = 600
+    pen = glyph.getPointPen()
+    pen.addComponent("A", (1, 0, 0, 1, 0, 0))
+    pen.addComponent("acute", (1, 0, 0, 1, 150, 0))
+    font.glyphOrder = ["A", "B", "O", "acute", "Aacute"]
+    font.groups["public.kern1.A"] = ["A", "Aacute"]
+    font.kerning[("O", "A")] = -10
+    font.features.text = FEATURES
+    return font
+
+
+def _setAttr(obj, attr, value):
+    setattr(obj, attr, value)
+
+
+# edits that each change the key
+CHANGES = [
+    ("info", lambda font: _setAttr(font.info, "familyName", "Other")),
+    ("features", lambda font: _setAttr(
+        font.features, "text", FEATURES + "\n# note\n")),
+    ("kerning", lambda font: font.kerning.__setitem__(("O", "A"), -30)),
+    ("groups", lambda font: font.groups.__setitem__(
+        "public.kern2.B", ["B"])),
+    ("font lib", lambda font: font.lib.__setitem__("com.example.key", 1)),
+    ("glyph order", lambda font: _setAttr(
+        font, "glyphOrder", list(reversed(font.glyphOrder)))),
+    ("outline", _drawTriangle),
+    ("width", lambda font: _setAttr(font["O"], "width", 650)),
+    ("unicodes", lambda font: _setAttr(font["O"], "unicodes", [0x4F, 0x6F])),
+    ("height", lambda font: _setAttr(font["O"], "height", 900)),
+    ("anchors", lambda font: font["O"].appendAnchor(
+        dict(x=0, y=0, name="top"))),
+    ("glyph lib", lambda font: font["O"].lib.__setitem__(
+        "com.example.key", 1)),
+    ("base glyph", lambda font: font["acute"].move((0, 10))),
+    ("new glyph", lambda font: font.newGlyph("D")),
+]
+
+
+class FontKeyTest(unittest.TestCase):
+
+    def test_sameContentSameKey(self):
+        self.assertEqual(fontKey(_makeFont()), fontKey(_makeFont()))
+        self.assertEqual(
+            fontKey(_makeFont(), format="otf"),
+            fontKey(_makeFont(), format="otf"))
+
+    def test_options(self):
+        font = _makeFont()
+        keys = {fontKey(font), fontKey(font, format="otf"),
+                fontKey(font, format="ttf"),
+                fontKey(font, format="otf", useProductionNames=True)}
+        self.assertEqual(len(keys), 4)
+
+    def test_inputsChangeTheKey(self):
+        key = fontKey(_makeFont())
+        for description, edit in CHANGES:
+            font = _makeFont()
+            edit(font)
+            self.assertNotEqual(fontKey(font), key, description)
+
+    def test_ignoredInputs(self):
+        font = _makeFont()
+        key = fontKey(font)
+        font["O"].markColor = "1,0,0,1"
+        font["A"][0][0].selected = True
+        self.assertEqual(fontKey(font), key)
+
+
+class IncludedFeaturesTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        self.path = os.path.join(directory, "Test.ufo")
+        font = _makeFont()
+        font.features.text = INCLUDE_FEATURES
+        font.save(self.path)
+        self.feaPath = os.path.join(self.path, "liga.fea")
+        with open(self.feaPath, "w") as file:
+            file.write(FEATURES)
+
+    def test_includedFeatures(self):
+        self.assertEqual(
+            includedFeatures(INCLUDE_FEATURES, self.path),
+            [(os.path.abspath(self.feaPath), FEATURES)])
+        self.assertEqual(includedFeatures(FEATURES, self.path), [])
+
+    def test_missingInclude(self):
+        os.remove(self.feaPath)
+        files = includedFeatures(INCLUDE_FEATURES, self.path)
+        self.assertEqual(len(files), 1)
+        self.assertIsInstance(files[0], str)
+
+    def test_includedFileChangesTheKey(self):
+        font = TFont(self.path, notificationBackend=NullNotifications())
+        key = fontKey(font)
+        self.assertEqual(fontKey(font), key)
+        with open(self.feaPath, "a") as file:
+            file.write("# note\n")
+        self.assertNotEqual(fontKey(font), key)
+
+
+class ArtifactCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.cache = ArtifactCache(
+            os.path.join(self.directory, "cache"), 250)
+
+    def _writeFile(self, name, size):
+        path = os.path.join(self.directory, name)
+        with open(path, "wb") as file:
+            file.write(name.encode("ascii")[:1] * size)
+        return path
+
+    def test_putAndCopy(self):
+        path = self._writeFile("a", 100)
+        destination = os.path.join(self.directory, "copy")
+        self.assertFalse(self.cache.copyTo("key", destination))
+        self.assertFalse(os.path.exists(destination))
+        self.cache.put("key", path)
+        self.assertEqual(self.cache.size(), 100)
+        self.assertTrue(self.cache.copyTo("key", destination))
+        with open(destination, "rb") as file:
+            self.assertEqual(file.read(), b"a" * 100)
+        # no temporary file is left behind
+        self.assertEqual(os.listdir(self.cache.directory), ["key"])
+
+    def test_evict(self):
+        self.cache.maxSize = 1000
+        for index, name in enumerate(("a", "b", "c")):
+            self.cache.put(name, self._writeFile(name, 100))
+            os.utime(self.cache.path(name), (index, index))
+        self.assertEqual(self.cache.size(), 300)
+        self.cache.maxSize = 250
+        # least recently used first
+        self.assertTrue(self.cache.copyTo(
+            "a", os.path.join(self.directory, "copy")))
+        self.cache.evict()
+        self.assertEqual(sorted(os.listdir(self.cache.directory)), ["a", "c"])
+        self.cache.clear()
+        self.assertEqual(self.cache.size(), 0)
+
+    def test_fontExport(self):
+        font = _makeFont(artifactCache=self.cache)
+        self.cache.maxSize = 1 << 20
+        path = os.path.join(self.directory, "Test.otf")
+        font.export(path)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 1)
+        key = os.listdir(self.cache.directory)[0]
+        with open(path, "rb") as file:
+            data = file.read()
+        with open(self.cache.path(key), "wb") as file:
+            file.write(b"cached")
+        # unchanged, the artifact is used
+        font.export(path)
+        with open(path, "rb") as file:
+            self.assertEqual(file.read(), b"cached")
+        font["A"].width = 500
+        font.export(path)
+        with open(path, "rb") as file:
+            self.assertNotEqual(file.read(), data)
+        self.assertEqual(len(os.listdir(self.cache.directory)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
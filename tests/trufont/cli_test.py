@@ -0,0 +1,119 @@
+from trufont import cli
+from trufont.objects.defcon import NullNotifications, TFont
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def _saveFont(testCase):
+    directory = tempfile.mkdtemp()
+    testCase.addCleanup(shutil.rmtree, directory, True)
+    path = os.path.join(directory, "Test.ufo")
+    font = TFont(notificationBackend=NullNotifications())
+    info = font.info
+    info.familyName = "Test"
+    info.styleName = "Regular"
+    info.unitsPerEm = 1000
+    info.ascender = 750
+    info.descender = -250
+    info.xHeight = 500
+    info.capHeight = 700
+    glyph = font.newGlyph("A")
+    glyph.unicodes = [0x41]
+    glyph.width = 600
+    pen = glyph.getPointPen()
+    pen.beginPath()
+    pen.addPoint((50, 0), "line")
+    pen.addPoint((300, 700), "line")
+    pen.addPoint((550, 0), "line")
+    pen.endPath()
+    font.save(path)
+    return path
+
+
+class CompileFontTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = _saveFont(self)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def test_compileFont(self):
+        results = cli.compileFont(self.path, ["otf"], self.directory)
+        outputPath, seconds, error = results["otf"]
+        self.assertIsNone(error)
+        self.assertEqual(outputPath, os.path.join(self.directory, "Test.otf"))
+        self.assertTrue(os.path.getsize(outputPath))
+        self.assertGreaterEqual(seconds, 0)
+
+    def test_unknownFormat(self):
+        with self.assertRaises(ValueError):
+            cli.compileFont(self.path, ["pdf"], self.directory)
+
+    def test_cacheDirectory(self):
+        cacheDirectory = os.path.join(self.directory, "cache")
+        options = dict(cacheDirectory=cacheDirectory, cacheSize=1 << 20)
+        results = cli.compileFont(self.path, ["otf"], self.directory,
+                                  **options)
+        outputPath, _, error = results["otf"]
+        self.assertIsNone(error)
+        key, = os.listdir(cacheDirectory)
+        with open(os.path.join(cacheDirectory, key), "wb") as file:
+            file.write(b"cached")
+        results = cli.compileFont(self.path, ["otf"], self.directory,
+                                  **options)
+        with open(results["otf"][0], "rb") as file:
+            self.assertEqual(file.read(), b"cached")
+
+
+class MainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = _saveFont(self)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def _main(self, *args):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            code = cli.main(list(args))
+        return code, output.getvalue().splitlines()
+
+    def test_success(self):
+        outputDirectory = os.path.join(self.directory, "build")
+        code, lines = self._main(
+            "-f", "otf", "-o", outputDirectory, "-j", "1", self.path)
+        self.assertEqual(code, 0)
+        self.assertEqual(len(lines), 1)
+        self.assertTrue(lines[0].startswith(self.path + " otf "))
+        self.assertTrue(lines[0].endswith(
+            os.path.join(outputDirectory, "Test.otf")))
+
+    def test_nextToTheUFO(self):
+        code, _ = self._main(self.path)
+        self.assertEqual(code, 0)
+        self.assertTrue(os.path.exists(
+            os.path.join(os.path.dirname(self.path), "Test.otf")))
+
+    def test_failure(self):
+        missingPath = os.path.join(self.directory, "Missing.ufo")
+        code, lines = self._main(
+            "-o", self.directory, "-j", "2", self.path, missingPath)
+        self.assertEqual(code, 1)
+        self.assertEqual(len(lines), 2)
+        failures = [line for line in lines if "failed:" in line]
+        self.assertEqual(len(failures), 1)
+        self.assertTrue(failures[0].startswith(missingPath + " otf "))
+
+    def test_unknownFormat(self):
+        with contextlib.redirect_stderr(io.StringIO()):
+            with self.assertRaises(SystemExit) as cm:
+                cli.main(["-f", "otf,pdf", self.path])
+        self.assertEqual(cm.exception.code, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
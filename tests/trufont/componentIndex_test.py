@@ -0,0 +1,163 @@
+from PyQt5.QtWidgets import QApplication
+from trufont.objects.defcon import NullNotifications, TFont
+from trufont.tools.componentIndex import ComponentIndex
+import os
+import shutil
+import tempfile
+import unittest
+
+
+def _makeFont():
+    font = TFont(notificationBackend=NullNotifications())
+    for name, bounds in (("A", (50, 0, 550, 700)), ("B", (50, 0, 550, 700)),
+                         ("acute", (100, 750, 200, 900))):
+        xMin, yMin, xMax, yMax = bounds
+        pen = font.newGlyph(name).getPointPen()
+        pen.beginPath()
+        pen.addPoint((xMin, yMin), "line")
+        pen.addPoint((xMin, yMax), "line")
+        pen.addPoint((xMax, yMax), "line")
+        pen.addPoint((xMax, yMin), "line")
+        pen.endPath()
+    pen = font.newGlyph("Aacute").getPointPen()
+    pen.addComponent("A", (1, 0, 0, 1, 0, 0))
+    pen.addComponent("acute", (1, 0, 0, 1, 150, 0))
+    pen = font.newGlyph("Aacute.alt").getPointPen()
+    pen.addComponent("Aacute", (1, 0, 0, 1, 0, 10))
+    return font
+
+
+class _Observer(object):
+
+    def __init__(self):
+        self.notifications = []
+
+    def notify(self, notification):
+        self.notifications.append(notification.object.name)
+
+
+class ComponentIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index = ComponentIndex()
+        self.index.addReference("Aacute", "A")
+        self.index.addReference("Aacute", "acute")
+        self.index.addReference("Aacute.alt", "Aacute")
+
+    def test_references(self):
+        self.assertIn("Aacute", self.index)
+        self.assertNotIn("A", self.index)
+        self.assertEqual(self.index.baseGlyphs("Aacute"), {"A", "acute"})
+        self.assertEqual(self.index.composites("A"), {"Aacute"})
+        self.assertEqual(self.index.composites("B"), set())
+
+    def test_countedReferences(self):
+        self.index.addReference("Aacute", "acute")
+        self.index.removeReference("Aacute", "acute")
+        self.assertEqual(self.index.composites("acute"), {"Aacute"})
+        self.index.removeReference("Aacute", "acute")
+        self.assertEqual(self.index.composites("acute"), set())
+        self.assertEqual(self.index.baseGlyphs("Aacute"), {"A"})
+        # unknown references are ignored
+        self.index.removeReference("Aacute", "acute")
+        self.index.removeReference("B", "A")
+
+    def test_dependents(self):
+        self.assertEqual(
+            self.index.dependents("A"), {"Aacute", "Aacute.alt"})
+        self.assertEqual(self.index.dependents("Aacute"), {"Aacute.alt"})
+        self.assertEqual(self.index.dependents("Aacute.alt"), set())
+
+    def test_cycles(self):
+        self.index.addReference("A", "Aacute.alt")
+        self.assertEqual(
+            self.index.dependents("A"), {"Aacute", "Aacute.alt"})
+        self.index.addReference("B", "B")
+        self.assertEqual(self.index.dependents("B"), set())
+
+    def test_renameGlyph(self):
+        self.index.renameGlyph("Aacute", "Aacute.new")
+        self.assertEqual(self.index.composites("A"), {"Aacute.new"})
+        self.assertEqual(self.index.baseGlyphs("Aacute.new"), {"A", "acute"})
+        # components still reference the old name
+        self.assertEqual(self.index.composites("Aacute"), {"Aacute.alt"})
+        self.index.renameGlyph("B", "C")
+        self.assertNotIn("C", self.index)
+
+    def test_clear(self):
+        self.index.clear()
+        self.assertNotIn("Aacute", self.index)
+        self.assertEqual(self.index.dependents("A"), set())
+
+
+class LayerComponentIndexTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.font = _makeFont()
+        self.layer = self.font.layers.defaultLayer
+        self.index = self.layer.componentIndex()
+
+    def test_index(self):
+        self.assertEqual(self.index.dependents("A"), {"Aacute", "Aacute.alt"})
+        self.assertEqual(self.index.composites("Aacute"), {"Aacute.alt"})
+
+    def test_componentChanges(self):
+        glyph = self.font["Aacute"]
+        glyph.removeComponent(glyph.components[1])
+        self.assertEqual(self.index.baseGlyphs("Aacute"), {"A"})
+        self.font["Aacute"].name = "Aacute.new"
+        self.assertEqual(self.index.composites("A"), {"Aacute.new"})
+        del self.font["Aacute.alt"]
+        self.assertNotIn("Aacute.alt", self.index)
+
+    def test_nestedCompositesAreInvalidated(self):
+        composite = self.font["Aacute.alt"]
+        self.assertEqual(composite.bounds, (50, 10, 550, 910))
+        self.font["A"].move((10, 0))
+        self.assertTrue(composite._baseGlyphDataChanged)
+        self.assertTrue(self.font["Aacute"]._baseGlyphDataChanged)
+        self.assertFalse(self.font["B"]._baseGlyphDataChanged)
+        self.assertEqual(composite.bounds, (60, 10, 560, 910))
+        self.assertFalse(composite._baseGlyphDataChanged)
+        self.font["acute"].move((0, 10))
+        self.assertEqual(composite.bounds, (60, 10, 560, 920))
+
+    def test_observedCompositesAreNotified(self):
+        observer = _Observer()
+        self.font["Aacute.alt"].addObserver(
+            observer, "notify", "Glyph.Changed")
+        self.font["A"].move((10, 0))
+        self.font["acute"].move((0, 10))
+        # once control returns to the event loop
+        self.assertEqual(observer.notifications, [])
+        QApplication.processEvents()
+        self.assertEqual(observer.notifications, ["Aacute.alt"])
+        # Aacute isn't observed
+        self.assertEqual(self.layer._changedComposites, set())
+
+
+class LoadedComponentIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, "Test.ufo")
+        _makeFont().save(path)
+        self.font = TFont(path, notificationBackend=NullNotifications())
+        self.index = self.font.layers.defaultLayer.componentIndex()
+
+    def test_onlyLoadedGlyphsAreIndexed(self):
+        self.assertNotIn("Aacute", self.index)
+        self.font["Aacute"]
+        self.assertEqual(self.index.dependents("A"), {"Aacute"})
+        self.font["Aacute.alt"]
+        self.assertEqual(
+            self.index.dependents("A"), {"Aacute", "Aacute.alt"})
+        self.font.layers.defaultLayer.unloadGlyphs(["Aacute.alt"])
+        self.assertNotIn("Aacute.alt", self.index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+from fontTools.feaLib.error import FeatureLibError
+from functools import partial
+from tests.trufont.fixtures import FEATURES, makeTestFont
+from trufont.objects.featureChecker import FeatureChecker
+from trufont.tools.featureCache import (
+    CachedFeatureCompiler, FeatureCache, officialGlyphOrder)
+from ufo2ft import compileOTF
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+GLYPH_ORDER = [".notdef", "A", "B", "C"]
+
+INVALID_FEATURES = """\
+feature liga {
+    sub A B by D;
+} liga;
+"""
+
+OS2_FEATURES = FEATURES + """
+table OS/2 {
+    TypoAscender 800;
+} OS/2;
+"""
+
+
+def _fontData(otf):
+    # compilations may be a second apart
+    otf["head"].modified = 0
+    otf.recalcTimestamp = False
+    stream = io.BytesIO()
+    otf.save(stream)
+    return stream.getvalue()
+
+
+class FeatureCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.featureCache = FeatureCache()
+
+    def test_officialGlyphOrder(self):
+        font = makeTestFont()
+        font.glyphOrder = ["B", "missing", "A"]
+        self.assertEqual(officialGlyphOrder(font), [
+            ".notdef", "B", "A", "Aacute", "Aacute.alt", "C", "O", "acute"])
+
+    def test_parseIsCached(self):
+        doc = self.featureCache.parse(FEATURES, GLYPH_ORDER)
+        self.assertIs(self.featureCache.parse(FEATURES, GLYPH_ORDER), doc)
+        # trailing blank lines don't matter
+        self.assertIs(
+            self.featureCache.parse(FEATURES + "\n\n", GLYPH_ORDER), doc)
+        self.assertEqual(len(self.featureCache), 1)
+        self.assertIsNot(
+            self.featureCache.parse(FEATURES, GLYPH_ORDER + ["D"]), doc)
+        self.assertEqual(len(self.featureCache), 2)
+
+    def test_layoutTables(self):
+        tables = self.featureCache.layoutTables(FEATURES, GLYPH_ORDER)
+        self.assertEqual(set(tables), {"GSUB"})
+        self.assertIs(
+            self.featureCache.layoutTables(FEATURES, GLYPH_ORDER), tables)
+
+    def test_check(self):
+        self.assertIsNone(self.featureCache.check(FEATURES, GLYPH_ORDER))
+        self.assertIsNone(self.featureCache.check(OS2_FEATURES, GLYPH_ORDER))
+        error = self.featureCache.check(INVALID_FEATURES, GLYPH_ORDER)
+        self.assertIsInstance(error, FeatureLibError)
+        # errors are kept too
+        self.assertIs(
+            self.featureCache.check(INVALID_FEATURES, GLYPH_ORDER), error)
+        with self.assertRaises(FeatureLibError):
+            self.featureCache.parse(INVALID_FEATURES, GLYPH_ORDER)
+
+    def test_maxEntries(self):
+        featureCache = FeatureCache(maxEntries=2)
+        doc = featureCache.parse(FEATURES, GLYPH_ORDER)
+        featureCache.parse(FEATURES, GLYPH_ORDER + ["D"])
+        # the first one is used last
+        featureCache.parse(FEATURES, GLYPH_ORDER)
+        featureCache.parse(FEATURES, GLYPH_ORDER + ["E"])
+        self.assertEqual(len(featureCache), 2)
+        self.assertIs(featureCache.parse(FEATURES, GLYPH_ORDER), doc)
+        featureCache.clear()
+        self.assertEqual(len(featureCache), 0)
+
+    def test_includesAreRelativeToTheUFO(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        with open(os.path.join(directory, "liga.fea"), "w") as file:
+            file.write("sub A B by C;\n")
+        text = "feature liga {\n    include(liga.fea);\n} liga;\n"
+        self.assertIsNone(self.featureCache.check(
+            text, GLYPH_ORDER, directory))
+
+
+class CachedFeatureCompilerTest(unittest.TestCase):
+
+    def _assertMatchesFeatureCompiler(self, font):
+        featureCache = FeatureCache()
+        expected = _fontData(compileOTF(font, useProductionNames=False))
+        for _ in range(2):
+            otf = compileOTF(
+                font, useProductionNames=False,
+                featureCompilerClass=partial(
+                    CachedFeatureCompiler, featureCache=featureCache))
+            self.assertEqual(_fontData(otf), expected)
+        self.assertEqual(len(featureCache), 1)
+
+    def test_layoutTables(self):
+        self._assertMatchesFeatureCompiler(makeTestFont())
+
+    def test_otherTables(self):
+        font = makeTestFont()
+        font.features.text = OS2_FEATURES
+        self._assertMatchesFeatureCompiler(font)
+
+
+class FeatureCheckerTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.font = makeTestFont()
+        self.checker = FeatureChecker(self.font)
+        self.addCleanup(self.checker.wait)
+        self.errors = []
+        self.checker.checked.connect(self.errors.append)
+
+    def _waitForCheck(self):
+        loop = QEventLoop()
+        self.checker.checked.connect(loop.quit)
+        QTimer.singleShot(10000, loop.quit)
+        loop.exec_()
+        self.checker.checked.disconnect(loop.quit)
+
+    def test_check(self):
+        self.checker.check(FEATURES)
+        self._waitForCheck()
+        self.assertEqual(self.errors, [None])
+        self.assertEqual(len(self.font.featureCache()), 1)
+        self.checker.check(INVALID_FEATURES)
+        self._waitForCheck()
+        self.assertIsInstance(self.errors[-1], FeatureLibError)
+
+    def test_lastTextIsChecked(self):
+        self.checker.check(INVALID_FEATURES)
+        self.checker.check(FEATURES)
+        self._waitForCheck()
+        self.assertEqual(self.errors, [None])
+
+
+if __name__ == "__main__":
+    unittest.main()
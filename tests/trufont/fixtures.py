@@ -0,0 +1,110 @@
+"""
+Small fonts the tests build on.
+"""
+from trufont.objects.defcon import NullNotifications, TFont
+import os
+import shutil
+import tempfile
+
+FEATURES = """\
+languagesystem DFLT dflt;
+
+feature liga {
+    sub A B by C;
+} liga;
+"""
+
+
+def drawRect(glyph, xMin, yMin, xMax, yMax):
+    pen = glyph.getPointPen()
+    pen.beginPath()
+    pen.addPoint((xMin, yMin), "line")
+    pen.addPoint((xMin, yMax), "line")
+    pen.addPoint((xMax, yMax), "line")
+    pen.addPoint((xMax, yMin), "line")
+    pen.endPath()
+
+
+def drawOval(glyph, xMin, yMin, xMax, yMax):
+    # on-curve points at the extremes
+    xMid, yMid = (xMin + xMax) // 2, (yMin + yMax) // 2
+    pen = glyph.getPointPen()
+    pen.beginPath()
+    pen.addPoint((xMid, yMin), "curve", smooth=True)
+    pen.addPoint((xMin + (xMid - xMin) // 2, yMin))
+    pen.addPoint((xMin, yMid - (yMid - yMin) // 2))
+    pen.addPoint((xMin, yMid), "curve", smooth=True)
+    pen.addPoint((xMin, yMid + (yMax - yMid) // 2))
+    pen.addPoint((xMid - (xMid - xMin) // 2, yMax))
+    pen.addPoint((xMid, yMax), "curve", smooth=True)
+    pen.addPoint((xMid + (xMax - xMid) // 2, yMax))
+    pen.addPoint((xMax, yMid + (yMax - yMid) // 2))
+    pen.addPoint((xMax, yMid), "curve", smooth=True)
+    pen.addPoint((xMax, yMid - (yMid - yMin) // 2))
+    pen.addPoint((xMax - (xMax - xMid) // 2, yMin))
+    pen.endPath()
+
+
+def addComponent(glyph, baseGlyph, offset=(0, 0)):
+    pen = glyph.getPointPen()
+    pen.addComponent(baseGlyph, (1, 0, 0, 1) + tuple(offset))
+
+
+def makeTestFont(**kwargs):
+    """
+    Returns a TFont with outline glyphs (A, B, C, O, acute), a composite
+    (Aacute) and a composite of that composite (Aacute.alt), along with
+    the info, kerning, groups and features exports need. *kwargs* go to
+    TFont.
+    """
+    kwargs.setdefault("notificationBackend", NullNotifications())
+    font = TFont(**kwargs)
+    info = font.info
+    info.familyName = "Test"
+    info.styleName = "Regular"
+    info.unitsPerEm = 1000
+    info.ascender = 750
+    info.descender = -250
+    info.xHeight = 500
+    info.capHeight = 700
+    for name, unicode in (("A", 0x41), ("B", 0x42), ("C", 0x43)):
+        glyph = font.newGlyph(name)
+        glyph.unicodes = [unicode]
+        glyph.width = 600
+        drawRect(glyph, 50, 0, 550, 700)
+    glyph = font.newGlyph("O")
+    glyph.unicodes = [0x4F]
+    glyph.width = 700
+    drawOval(glyph, 50, -10, 650, 710)
+    glyph = font.newGlyph("acute")
+    glyph.unicodes = [0xB4]
+    glyph.width = 300
+    drawRect(glyph, 100, 750, 200, 900)
+    glyph = font.newGlyph("Aacute")
+    glyph.unicodes = [0xC1]
+    glyph.width = 600
+    addComponent(glyph, "A")
+    addComponent(glyph, "acute", (150, 0))
+    glyph = font.newGlyph("Aacute.alt")
+    glyph.width = 600
+    addComponent(glyph, "Aacute", (0, 10))
+    font.glyphOrder = ["A", "B", "C", "O", "acute", "Aacute", "Aacute.alt"]
+    font.groups["public.kern1.A"] = ["A", "Aacute"]
+    font.kerning[("public.kern1.A", "B")] = -20
+    font.kerning[("O", "A")] = -10
+    font.features.text = FEATURES
+    return font
+
+
+def saveTestFont(testCase, font=None):
+    """
+    Saves *font* (a new test font by default) in a temporary directory
+    removed once *testCase* is done, and returns the path of the UFO.
+    """
+    directory = tempfile.mkdtemp()
+    testCase.addCleanup(shutil.rmtree, directory, True)
+    path = os.path.join(directory, "Test.ufo")
+    if font is None:
+        font = makeTestFont()
+    font.save(path)
+    return path
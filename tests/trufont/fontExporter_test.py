@@ -0,0 +1,272 @@
+from fontTools.ttLib import TTFont
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+from tests.trufont.fixtures import drawOval, makeTestFont
+from trufont import cli, representationFactories
+from trufont.objects import fontExporter
+from trufont.objects.batchExporter import REPORT_FILE_NAME, BatchExporter
+from trufont.objects.fontExporter import (
+    ExportSnapshot, makeSubsetFont, subsetGlyphNames)
+from trufont.tools.glyphLoader import MIN_PARALLEL_GLYPH_COUNT
+from trufont.tools.incrementalCompiler import IncrementalTTFCompiler
+from unittest import mock
+import os
+import shutil
+import tempfile
+import unittest
+
+representationFactories.registerAllFactories()
+
+
+def _makeLargeFont():
+    font = makeTestFont()
+    for index in range(MIN_PARALLEL_GLYPH_COUNT):
+        glyph = font.newGlyph("o%03d" % index)
+        glyph.width = index + 100
+        drawOval(glyph, 0, 0, index + 50, 100)
+    return font
+
+
+class ConversionWorkersTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def test_snapshotConvertsInParallel(self):
+        font = _makeLargeFont()
+        snapshot = ExportSnapshot(font, format="ttf", workerCount=2)
+        # ufo2ft is only asked for the outlines
+        with mock.patch.object(fontExporter, "compileTTF") as compileTTF:
+            snapshot.compileTTF(snapshot.makeFont())
+        outlineCompilerClass = compileTTF.call_args[1]["outlineCompilerClass"]
+        compiler = outlineCompilerClass(snapshot.makeFont())
+        self.assertEqual(compiler.workerCount, 2)
+        compiler.compile()
+        # the glyphs converted by the workers are in the cache
+        compiler = IncrementalTTFCompiler(
+            font, compileCache=snapshot.compileCache)
+        self.assertIsNot(compiler.cachedGlyphValue(
+            font["o000"], "ttGlyph"), None)
+
+    def test_backgroundExport(self):
+        font = makeTestFont(glyphLoaderWorkerCount=3)
+        exporter = font.exportInBackground(
+            os.path.join(self.directory, "Test.ttf"), "ttf")
+        font.cancelBackgroundExport()
+        self.assertEqual(exporter.snapshot.workerCount, 3)
+
+    def test_batchExport(self):
+        fonts = [makeTestFont(), makeTestFont()]
+        exporter = BatchExporter(fonts, ["ttf"], self.directory,
+                                 workerCount=4)
+        self.assertEqual(
+            [snapshot.workerCount for _, snapshot, _ in exporter._jobs],
+            [2, 2])
+        exporter = BatchExporter(fonts[:1], ["ttf"], self.directory,
+                                 workerCount=4)
+        self.assertEqual(exporter._jobs[0][1].workerCount, 4)
+
+    def test_commandLine(self):
+        with mock.patch.object(cli, "compileFont") as compileFont:
+            compileFont.return_value = {"ttf": (None, 0, None)}
+            with mock.patch("sys.stdout"):
+                cli.main(["-f", "ttf", "-j", "4", "-o", self.directory,
+                          "Test.ufo"])
+        self.assertEqual(compileFont.call_args[1]["workerCount"], 4)
+
+
+def _waitUntilFinished(thread):
+    loop = QEventLoop()
+    thread.finished.connect(loop.quit)
+    QTimer.singleShot(120000, loop.quit)
+    if not thread.isFinished():
+        loop.exec_()
+    QApplication.processEvents()
+
+
+class FontExporterTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.font = makeTestFont()
+
+    def test_stages(self):
+        snapshot = ExportSnapshot(self.font)
+        self.assertEqual(snapshot.stages(), ["outlines", "features", "save"])
+        snapshot = ExportSnapshot(self.font, optimizeCff=True)
+        self.assertEqual(snapshot.stages(), [
+            "outlines", "features", "subroutinization", "save"])
+        snapshot = ExportSnapshot(self.font, optimizeCff=True, format="woff")
+        self.assertEqual(snapshot.stages(), ["outlines", "features", "save"])
+
+    def test_export(self):
+        path = os.path.join(self.directory, "Test.otf")
+        exporter = self.font.exportInBackground(path)
+        self.assertTrue(self.font.isExportingInBackground())
+        stages, progress = [], []
+        exporter.stageChanged.connect(stages.append)
+        exporter.progressChanged.connect(
+            lambda done, total: progress.append((done, total)))
+        _waitUntilFinished(exporter)
+        self.assertIsNone(exporter.error)
+        self.assertFalse(exporter.cancelled)
+        self.assertFalse(self.font.isExportingInBackground())
+        self.assertEqual(stages, exporter.snapshot.stages())
+        self.assertEqual(progress, [(0, 3), (1, 3), (2, 3), (3, 3)])
+        self.assertTrue(os.path.exists(path))
+        # the glyphs compiled by the worker are reused by the next export
+        self.assertIs(self.font.compileCache(), exporter.compileCache)
+        self.assertTrue(len(self.font.compileCache()))
+
+    def test_cancel(self):
+        path = os.path.join(self.directory, "Test.otf")
+        exporter = self.font.exportInBackground(path)
+        exporter.cancel()
+        _waitUntilFinished(exporter)
+        self.assertTrue(exporter.cancelled)
+        self.assertIsNone(exporter.error)
+        self.assertFalse(self.font.isExportingInBackground())
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_newExportCancelsThePrevious(self):
+        firstPath = os.path.join(self.directory, "First.otf")
+        firstExporter = self.font.exportInBackground(firstPath)
+        path = os.path.join(self.directory, "Test.otf")
+        exporter = self.font.exportInBackground(path)
+        self.assertTrue(firstExporter.isFinished())
+        self.assertTrue(firstExporter.cancelled)
+        _waitUntilFinished(exporter)
+        self.assertIsNone(exporter.error)
+        self.assertFalse(os.path.exists(firstPath))
+        self.assertTrue(os.path.exists(path))
+
+
+class BatchExporterTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.fonts = [makeTestFont(), makeTestFont()]
+        self.fonts[1].info.styleName = "Bold"
+
+    def test_export(self):
+        exporter = BatchExporter(
+            self.fonts, ["woff", "otf"], self.directory, workerCount=2)
+        progress = []
+        exporter.progressChanged.connect(
+            lambda done, total: progress.append((done, total)))
+        exporter.start()
+        _waitUntilFinished(exporter)
+        self.assertIsNone(exporter.error)
+        self.assertEqual(progress, [(0, 2), (1, 2), (2, 2)])
+        self.assertEqual(sorted(os.listdir(self.directory)), [
+            "Test-Bold.otf", "Test-Bold.woff", "Test-Regular.otf",
+            "Test-Regular.woff", REPORT_FILE_NAME])
+        for font in self.fonts:
+            results = exporter.results[font]
+            self.assertEqual(sorted(results), ["otf", "woff"])
+            for format, (path, seconds, error) in results.items():
+                self.assertIsNone(error)
+                self.assertEqual(os.path.dirname(path), self.directory)
+                self.assertTrue(path.endswith("." + format))
+            # later exports reuse the glyphs compiled by the workers
+            self.assertTrue(len(font.compileCache()))
+        with open(exporter.reportPath(), encoding="utf-8") as file:
+            report = file.read()
+        self.assertEqual(report, exporter.report())
+        lines = report.splitlines()
+        self.assertEqual(len(lines), 4)
+        # formats come in the order of EXPORT_FORMATS
+        self.assertTrue(lines[0].startswith("Test Regular"))
+        self.assertEqual(lines[0].split()[2], "otf")
+        self.assertTrue(lines[0].endswith("Test-Regular.otf"))
+        self.assertEqual(lines[1].split()[2], "woff")
+        self.assertTrue(lines[3].startswith("Test Bold"))
+        self.assertTrue(lines[3].endswith("Test-Bold.woff"))
+
+    def test_fileNamesDontCollide(self):
+        fonts = [makeTestFont(), makeTestFont()]
+        exporter = BatchExporter(fonts, ["otf"], self.directory)
+        self.assertEqual(
+            [fileName for _, _, fileName in exporter._jobs],
+            ["Test-Regular", "Test-Regular-2"])
+
+    def test_report(self):
+        exporter = BatchExporter(self.fonts, ["otf", "ttf"], self.directory)
+        exporter.results = {
+            self.fonts[0]: {
+                "ttf": (os.path.join(self.directory, "Test-Regular.ttf"),
+                        1.5, "ValueError: bad"),
+                "otf": (os.path.join(self.directory, "Test-Regular.otf"),
+                        0.25, None),
+            },
+        }
+        self.assertEqual(exporter.report(), "".join(
+            "{:<32} {:<6} {:>8.2f}s  {}\n".format(*values) for values in (
+                ("Test Regular", "otf", 0.25, "Test-Regular.otf"),
+                ("Test Regular", "ttf", 1.5, "failed: ValueError: bad"))))
+
+    def test_cancel(self):
+        exporter = BatchExporter(self.fonts, ["otf"], self.directory)
+        exporter.cancel()
+        exporter.start()
+        _waitUntilFinished(exporter)
+        self.assertTrue(exporter.cancelled)
+        self.assertIsNone(exporter.error)
+        self.assertEqual(exporter.results, {})
+        self.assertEqual(os.listdir(self.directory), [REPORT_FILE_NAME])
+
+
+class SubsetTest(unittest.TestCase):
+
+    def setUp(self):
+        self.font = makeTestFont()
+
+    def test_subsetGlyphNames(self):
+        self.assertEqual(subsetGlyphNames(self.font, ["B", "missing"]), ["B"])
+        # with the base glyphs of components, in glyph order
+        self.assertEqual(
+            subsetGlyphNames(self.font, ["Aacute.alt", "O"]),
+            ["A", "O", "acute", "Aacute", "Aacute.alt"])
+        self.font.newGlyph(".notdef")
+        self.assertEqual(
+            subsetGlyphNames(self.font, ["B"]), ["B", ".notdef"])
+
+    def test_makeSubsetFont(self):
+        subsetFont = makeSubsetFont(self.font, ["Aacute", "B"])
+        self.assertEqual(sorted(subsetFont.keys()), ["Aacute", "B"])
+        self.assertEqual(subsetFont.glyphOrder, ["B", "Aacute"])
+        self.assertEqual(subsetFont.info.familyName, "Test")
+        self.assertEqual(
+            dict(subsetFont.groups), {"public.kern1.A": ["Aacute"]})
+        self.assertEqual(
+            dict(subsetFont.kerning), {("public.kern1.A", "B"): -20})
+        self.assertEqual(subsetFont.features.text, None)
+
+    def test_exportSubset(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, "Proof.otf")
+        self.font.exportSubset(path, ["Aacute"])
+        otf = TTFont(path)
+        self.assertEqual(
+            otf.getGlyphOrder(), [".notdef", "A", "acute", "Aacute"])
+        # the features refer to glyphs outside of the subset
+        self.assertNotIn("GSUB", otf)
+        self.font.exportSubset(path, ["A", "B", "C"])
+        otf = TTFont(path)
+        self.assertEqual(otf.getGlyphOrder(), [".notdef", "A", "B", "C"])
+        self.assertIn("GSUB", otf)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+from tests.trufont.fixtures import makeTestFont
+from trufont.objects import fontImporter
+from trufont.objects.defcon import NullNotifications, TFont
+from trufont.tools import sfntReader
+from trufont.tools.glyphLoader import GlyphData
+from ufo2ft import compileOTF
+import os
+import shutil
+from unittest import mock
+import tempfile
+import unittest
+
+
+def _binaryPath(testCase):
+    directory = tempfile.mkdtemp()
+    testCase.addCleanup(shutil.rmtree, directory, True)
+    path = os.path.join(directory, "Test.otf")
+    compileOTF(makeTestFont(), useProductionNames=False).save(path)
+    return path
+
+
+class _Observer(object):
+
+    def __init__(self):
+        self.notifications = []
+
+    def notify(self, notification):
+        self.notifications.append(
+            (notification.name, notification.data["name"]))
+
+
+class SfntReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = _binaryPath(self)
+
+    def test_readGlyphOrder(self):
+        glyphOrder, unicodes = sfntReader.readGlyphOrder(self.path)
+        self.assertEqual(glyphOrder[0], ".notdef")
+        self.assertEqual(set(glyphOrder[1:]), set(makeTestFont().keys()))
+        self.assertEqual(unicodes["A"], [0x41])
+        self.assertEqual(unicodes["Aacute"], [0xC1])
+        self.assertNotIn("Aacute.alt", unicodes)
+
+    def test_readGlyphs(self):
+        glyphsData = dict(sfntReader.readGlyphs(self.path, ["A", "O"]))
+        self.assertEqual(list(glyphsData), ["A", "O"])
+        self.assertEqual(glyphsData["A"].attributes["width"], 600)
+        font = TFont(notificationBackend=NullNotifications())
+        glyph = font.newGlyph("A")
+        glyphsData["A"].drawPoints(glyph.getPointPen())
+        self.assertEqual(len(glyph), 1)
+        self.assertEqual(glyph.bounds, (50, 0, 550, 700))
+
+
+class AddGlyphsFromDataTest(unittest.TestCase):
+
+    def setUp(self):
+        source = makeTestFont()
+        self.glyphsData = [
+            (name, GlyphData.fromGlyph(source[name])) for name in
+            ("acute", "Aacute", "A")]
+        self.font = TFont(notificationBackend=NullNotifications())
+        self.layer = self.font.layers.defaultLayer
+
+    def test_notificationsAndUnicodes(self):
+        observer = _Observer()
+        for notification in ("Layer.GlyphWillBeAdded", "Layer.GlyphAdded"):
+            self.layer.addObserver(observer, "notify", notification)
+        glyphs = self.layer.addGlyphsFromData(self.glyphsData)
+        self.assertEqual(
+            [glyph.name for glyph in glyphs], ["acute", "Aacute", "A"])
+        self.assertEqual(observer.notifications, [
+            (notification, name) for name in ("acute", "Aacute", "A")
+            for notification in ("Layer.GlyphWillBeAdded",
+                                 "Layer.GlyphAdded")])
+        self.assertEqual(
+            self.font.unicodeData.glyphNameForUnicode(0xC1), "Aacute")
+        self.assertEqual(
+            self.font.unicodeData.glyphNameForUnicode(0x41), "A")
+        self.assertTrue(self.layer.dirty)
+        self.assertFalse(self.font["A"].dirty)
+        # the font follows the layer
+        self.assertEqual(self.font.glyphOrder, ["acute", "Aacute", "A"])
+
+    def test_lateBaseGlyph(self):
+        self.layer.addGlyphsFromData(self.glyphsData[:2])
+        composite = self.font["Aacute"]
+        self.assertEqual(composite.bounds, (250, 750, 350, 900))
+        self.layer.addGlyphsFromData(self.glyphsData[2:])
+        self.assertEqual(composite.bounds, (50, 0, 550, 900))
+
+    def test_replacedGlyph(self):
+        self.layer.addGlyphsFromData(self.glyphsData)
+        data = GlyphData()
+        data.attributes["unicodes"] = [0x61]
+        self.layer.addGlyphsFromData([("A", data)])
+        unicodeData = self.font.unicodeData
+        self.assertIsNone(unicodeData.glyphNameForUnicode(0x41))
+        self.assertEqual(unicodeData.glyphNameForUnicode(0x61), "A")
+
+
+class FontImporterTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.path = _binaryPath(self)
+
+    def test_import(self):
+        font = TFont(notificationBackend=NullNotifications())
+        observer = _GlyphOrderObserver()
+        font.addObserver(observer, "notify", "Font.GlyphOrderChanged")
+        importer = font.extractInBackground(self.path)
+        addedGlyphNames = []
+        importer.glyphsAdded.connect(addedGlyphNames.extend)
+        loop = QEventLoop()
+        importer.finished.connect(loop.quit)
+        QTimer.singleShot(60000, loop.quit)
+        loop.exec_()
+        self.assertIsNone(importer.error)
+        self.assertFalse(font.isExtractingInBackground())
+        glyphOrder, _ = sfntReader.readGlyphOrder(self.path)
+        self.assertEqual(font.glyphOrder, glyphOrder)
+        self.assertEqual(addedGlyphNames, glyphOrder)
+        # cleared when starting, then set once
+        self.assertEqual(observer.glyphOrders, [[], glyphOrder])
+        self.assertEqual(font["A"].unicodes, [0x41])
+        self.assertEqual(font.unicodeData.glyphNameForUnicode(0x4F), "O")
+        self.assertFalse(font["O"].dirty)
+
+    def test_importOtherFormat(self):
+        # formats that extractor reads as a whole, off the main thread too
+        font = TFont(notificationBackend=NullNotifications())
+        with mock.patch.object(fontImporter, "STREAMED_FORMATS", ()):
+            importer = font.extractInBackground(self.path)
+            addedGlyphNames = []
+            importer.glyphsAdded.connect(addedGlyphNames.extend)
+            loop = QEventLoop()
+            importer.finished.connect(loop.quit)
+            QTimer.singleShot(60000, loop.quit)
+            # the event loop runs while the font is being read
+            states = []
+            QTimer.singleShot(0, lambda: states.append(
+                (importer.isRunning(), len(font))))
+            loop.exec_()
+        self.assertIsNone(importer.error)
+        self.assertFalse(font.isExtractingInBackground())
+        glyphOrder, _ = sfntReader.readGlyphOrder(self.path)
+        self.assertEqual(font.glyphOrder, glyphOrder)
+        self.assertEqual(addedGlyphNames, glyphOrder)
+        self.assertEqual(states, [(True, 0)])
+        self.assertEqual(font.info.unitsPerEm, 2000)
+        self.assertEqual(font["A"].unicodes, [0x41])
+        self.assertEqual(font["A"].width, 600)
+        self.assertEqual(font["O"].bounds, (50, -10, 650, 710))
+        self.assertFalse(font["O"].dirty)
+
+
+class _GlyphOrderObserver(object):
+
+    def __init__(self):
+        self.glyphOrders = []
+
+    def notify(self, notification):
+        self.glyphOrders.append(list(notification.object.glyphOrder))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,287 @@
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtWidgets import QApplication
+from tests.trufont.fixtures import saveTestFont
+from trufont.objects import fontSaver
+from trufont.objects.defcon import NullNotifications, TFont
+from trufont.objects.fontSaver import (
+    STAGING_PREFIX, FontSnapshot, recoverInterruptedSave)
+from unittest import mock
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+
+# far enough in the past to tell rewritten files apart
+OLD_TIME = 1000000000
+
+
+def _ageFiles(path):
+    for root, _, fileNames in os.walk(path):
+        for fileName in fileNames:
+            os.utime(os.path.join(root, fileName), (OLD_TIME, OLD_TIME))
+
+
+def _rewrittenFiles(path):
+    rewritten = set()
+    for root, _, fileNames in os.walk(path):
+        for fileName in fileNames:
+            filePath = os.path.join(root, fileName)
+            if os.stat(filePath).st_mtime != OLD_TIME:
+                rewritten.add(os.path.relpath(filePath, path))
+    return rewritten
+
+
+class FontSaveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = saveTestFont(self)
+        _ageFiles(self.path)
+        self.font = TFont(self.path, notificationBackend=NullNotifications())
+
+    def test_dirtyGlyphs(self):
+        layer = self.font.layers.defaultLayer
+        self.assertEqual(layer.dirtyGlyphs(), [])
+        glyph = self.font["B"]
+        glyph.width = 10
+        self.assertEqual(layer.dirtyGlyphs(), [glyph])
+        self.font.save()
+        self.assertEqual(layer.dirtyGlyphs(), [])
+        self.assertFalse(glyph.dirty)
+        self.assertFalse(self.font.dirty)
+
+    def test_onlyDirtyGlyphsAreWritten(self):
+        self.font["B"].width = 10
+        self.font["O"]
+        self.font.save()
+        rewritten = _rewrittenFiles(self.path)
+        self.assertIn(os.path.join("glyphs", "B_.glif"), rewritten)
+        for fileName in ("A_.glif", "O_.glif", "acute.glif"):
+            self.assertNotIn(os.path.join("glyphs", fileName), rewritten)
+        for fileName in ("fontinfo.plist", "groups.plist", "kerning.plist",
+                         "features.fea"):
+            self.assertNotIn(fileName, rewritten)
+
+    def test_dirtyInfoIsWritten(self):
+        self.font.info.familyName = "Other"
+        self.font.save()
+        rewritten = _rewrittenFiles(self.path)
+        self.assertIn("fontinfo.plist", rewritten)
+        self.assertNotIn("groups.plist", rewritten)
+        self.assertFalse(any(path.endswith(".glif") for path in rewritten))
+
+    def test_roundTrip(self):
+        self.font["B"].width = 10
+        self.font.info.familyName = "Other"
+        self.font.groups["public.kern2.B"] = ["B"]
+        self.font.save()
+        font = TFont(self.path, notificationBackend=NullNotifications())
+        self.assertEqual(font["B"].width, 10)
+        self.assertEqual(font["A"].width, 600)
+        self.assertEqual(font.info.familyName, "Other")
+        self.assertEqual(font.groups["public.kern2.B"], ["B"])
+        self.assertEqual(font.groups["public.kern1.A"], ["A", "Aacute"])
+
+    def test_saveAsWritesEverything(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        path = os.path.join(directory, "Copy.ufo")
+        self.font.save(path)
+        font = TFont(path, notificationBackend=NullNotifications())
+        self.assertEqual(sorted(font.keys()), sorted(
+            TFont(self.path).keys()))
+        self.assertEqual(font.info.familyName, "Test")
+        self.assertEqual(font.kerning[("public.kern1.A", "B")], -20)
+        self.assertEqual(len(font["O"][0]), 12)
+
+
+class _RecordingNotifications(NullNotifications):
+
+    def __init__(self):
+        self.notifications = []
+
+    def postNotification(self, notification, data=None):
+        self.notifications.append((notification, data))
+
+
+class _Crash(Exception):
+    pass
+
+
+def _stagingDirs(path):
+    return glob.glob(os.path.join(
+        os.path.dirname(path), STAGING_PREFIX + "*"))
+
+
+class BackgroundSaveTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.path = saveTestFont(self)
+        _ageFiles(self.path)
+        self.font = TFont(self.path, notificationBackend=NullNotifications())
+
+    def _reopen(self):
+        return TFont(self.path, notificationBackend=NullNotifications())
+
+    def test_laterEditsArentSaved(self):
+        self.font["B"].width = 10
+        self.font.info.familyName = "Other"
+        self.assertTrue(self.font.canSaveInBackground())
+        self.font.saveInBackground()
+        self.assertFalse(self.font.dirty)
+        self.font["B"].width = 20
+        self.font.info.familyName = "Later"
+        self.font.waitForBackgroundSave()
+        font = self._reopen()
+        self.assertEqual(font["B"].width, 10)
+        self.assertEqual(font.info.familyName, "Other")
+        self.assertEqual(self.font["B"].width, 20)
+        self.assertTrue(self.font["B"].dirty)
+        self.assertTrue(self.font.info.dirty)
+
+    def test_onlyRewrittenFilesAreStaged(self):
+        stagedFiles = set()
+        moveStagedFiles = fontSaver._moveStagedFiles
+
+        def recordStagedFiles(stagingDir, path, manifest):
+            stagedPath = os.path.join(stagingDir, fontSaver.STAGED_NAME)
+            for root, _, fileNames in os.walk(stagedPath):
+                for fileName in fileNames:
+                    stagedFiles.add(os.path.relpath(
+                        os.path.join(root, fileName), stagedPath))
+            moveStagedFiles(stagingDir, path, manifest)
+
+        self.font["B"].width = 10
+        with mock.patch.object(
+                fontSaver, "_moveStagedFiles", recordStagedFiles):
+            self.font.saveInBackground()
+            self.font.waitForBackgroundSave()
+        self.assertEqual(stagedFiles, {
+            "metainfo.plist",
+            os.path.join("glyphs", "B_.glif"),
+            os.path.join("glyphs", "contents.plist"),
+            os.path.join("glyphs", "layerinfo.plist"),
+        })
+        self.assertEqual(_rewrittenFiles(self.path), {
+            os.path.join("glyphs", "B_.glif"),
+            os.path.join("glyphs", "contents.plist"),
+            os.path.join("glyphs", "layerinfo.plist"),
+        })
+        self.assertEqual(_stagingDirs(self.path), [])
+
+    def test_filesAreReplacedByRenames(self):
+        glyphsPath = os.path.join(self.path, "glyphs")
+        inodes = {
+            fileName: os.stat(os.path.join(glyphsPath, fileName)).st_ino
+            for fileName in ("A_.glif", "B_.glif")}
+        self.font["B"].width = 10
+        del self.font["C"]
+        self.font.saveInBackground()
+        self.font.waitForBackgroundSave()
+        self.assertEqual(
+            os.stat(os.path.join(glyphsPath, "A_.glif")).st_ino,
+            inodes["A_.glif"])
+        self.assertNotEqual(
+            os.stat(os.path.join(glyphsPath, "B_.glif")).st_ino,
+            inodes["B_.glif"])
+        self.assertFalse(
+            os.path.exists(os.path.join(glyphsPath, "C_.glif")))
+        font = self._reopen()
+        self.assertEqual(font["B"].width, 10)
+        self.assertNotIn("C", font)
+        self.assertIsNone(self.font.fileIndex().changes())
+
+    def test_failedSaveIsPutBack(self):
+        self.font["B"].width = 10
+        self.font.info.familyName = "Other"
+        with mock.patch.object(
+                fontSaver, "_moveStagedFiles",
+                side_effect=OSError("disk full")):
+            saver = self.font.saveInBackground()
+            self.font.waitForBackgroundSave()
+        self.assertIsInstance(saver.error, OSError)
+        self.assertFalse(self.font.isSavingInBackground())
+        self.assertTrue(self.font.dirty)
+        self.assertTrue(self.font["B"].dirty)
+        self.assertTrue(self.font.info.dirty)
+        self.assertEqual(_rewrittenFiles(self.path), set())
+        self.assertEqual(_stagingDirs(self.path), [])
+        # and saves fine next time
+        self.font.saveInBackground()
+        self.font.waitForBackgroundSave()
+        self.assertEqual(self._reopen()["B"].width, 10)
+
+    def test_progressNotifications(self):
+        backend = _RecordingNotifications()
+        font = TFont(self.path, notificationBackend=backend)
+        font["B"].width = 10
+        saver = font.saveInBackground()
+        loop = QEventLoop()
+        saver.finished.connect(loop.quit)
+        QTimer.singleShot(60000, loop.quit)
+        loop.exec_()
+        QApplication.processEvents()
+        names = [name for name, _ in backend.notifications]
+        self.assertIn("fontSaveProgress", names)
+        self.assertLess(
+            names.index("fontSaveProgress"), names.index("fontSaved"))
+        progress = [data for name, data in backend.notifications
+                    if name == "fontSaveProgress"]
+        self.assertIs(progress[-1]["font"], font)
+        self.assertEqual(progress[-1]["done"], progress[-1]["total"])
+
+
+class RecoverInterruptedSaveTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = saveTestFont(self)
+        font = TFont(self.path, notificationBackend=NullNotifications())
+        font["B"].width = 10
+        del font["C"]
+        self.snapshot = FontSnapshot(font)
+
+    def _writeUntil(self, moveStagedFiles):
+        # cut the save short, without cleaning up
+        with mock.patch.object(
+                fontSaver, "_moveStagedFiles", moveStagedFiles), \
+                mock.patch.object(fontSaver.shutil, "rmtree"):
+            self.assertRaises(_Crash, self.snapshot.write)
+        self.assertEqual(len(_stagingDirs(self.path)), 1)
+
+    def test_stagingIsFinished(self):
+        moveStagedFiles = fontSaver._moveStagedFiles
+
+        def moveFirstFile(stagingDir, path, manifest):
+            manifest = dict(files=manifest["files"][:1], deletedFiles=[])
+            moveStagedFiles(stagingDir, path, manifest)
+            raise _Crash()
+
+        self._writeUntil(moveFirstFile)
+        # opening the font finishes the save
+        font = TFont(self.path, notificationBackend=NullNotifications())
+        self.assertEqual(font["B"].width, 10)
+        self.assertEqual(_stagingDirs(self.path), [])
+        self.assertNotIn("C", font)
+        self.assertFalse(os.path.exists(
+            os.path.join(self.path, "glyphs", "C_.glif")))
+
+    def test_incompleteStagingIsDropped(self):
+
+        def crash(*args):
+            raise _Crash()
+
+        with mock.patch.object(fontSaver, "_writeManifest", crash), \
+                mock.patch.object(fontSaver.shutil, "rmtree"):
+            self.assertRaises(_Crash, self.snapshot.write)
+        self.assertEqual(len(_stagingDirs(self.path)), 1)
+        recoverInterruptedSave(self.path)
+        self.assertEqual(_stagingDirs(self.path), [])
+        font = TFont(self.path, notificationBackend=NullNotifications())
+        self.assertEqual(font["B"].width, 600)
+        self.assertIn("C", font)
+
+
+if __name__ == "__main__":
+    unittest.main()
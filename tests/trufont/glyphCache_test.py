@@ -0,0 +1,197 @@
+from defcon import Font
+from tests.trufont.fixtures import saveTestFont
+from trufont.objects.defcon import NullNotifications, TFont
+from trufont.tools.glyphCache import (
+    GlyphCache, cachePath, dumpGlyphData, loadGlyphData)
+from trufont.tools.glyphLoader import GlyphData
+import os
+import shutil
+import tempfile
+import unittest
+
+STAT = (1000, 200)
+
+
+def _glyphData():
+    data = GlyphData(b"<glyph/>", 12.5)
+    data.attributes = dict(width=500, unicodes=[0x41], note="")
+    data.outline = [
+        ("beginPath", (), {}),
+        ("addPoint", ((0, 0), "line"), {}),
+        ("addPoint", ((0, 100), "line"), {}),
+        ("endPath", (), {}),
+        ("addComponent", ("B", (1, 0, 0, 1, 10, 0)), {}),
+    ]
+    return data
+
+
+class GlyphCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+        self.path = os.path.join(self.directory, "Test.tfcache")
+
+    def _writeCache(self):
+        cache = GlyphCache(self.path)
+        cache.write({"public.default": {
+            "A": ("glyphs/A_.glif", STAT, dumpGlyphData(_glyphData()))}})
+        return cache
+
+    def test_roundTrip(self):
+        self._writeCache().close()
+        cache = GlyphCache(self.path)
+        self.assertEqual(len(cache), 1)
+        data = cache.glyphData(
+            "public.default", "A", "glyphs/A_.glif", STAT)
+        expected = _glyphData()
+        # empty attributes are left out
+        self.assertEqual(data.attributes, dict(width=500, unicodes=[0x41]))
+        self.assertEqual(data.outline, expected.outline)
+        self.assertEqual(data.text, expected.text)
+        self.assertEqual(data.modificationTime, expected.modificationTime)
+        cache.close()
+
+    def test_staleEntries(self):
+        cache = self._writeCache()
+        self.assertIsNone(cache.glyphData(
+            "public.default", "A", "glyphs/A_.glif", (1001, 200)))
+        self.assertIsNone(cache.glyphData(
+            "public.default", "A", "glyphs/A_.glif", (1000, 201)))
+        self.assertIsNone(cache.glyphData(
+            "public.default", "A", "glyphs/other.glif", STAT))
+        self.assertIsNone(cache.glyphData(
+            "public.default", "B", "glyphs/B_.glif", STAT))
+        self.assertIsNone(cache.glyphData(
+            "other", "A", "glyphs/A_.glif", STAT))
+        cache.close()
+
+    def test_missingFile(self):
+        cache = GlyphCache(self.path)
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.glyphData(
+            "public.default", "A", "glyphs/A_.glif", STAT))
+
+    def _assertRejected(self, data):
+        with open(self.path, "wb") as file:
+            file.write(data)
+        cache = GlyphCache(self.path)
+        self.assertEqual(len(cache), 0)
+        self.assertIsNone(cache.glyphData(
+            "public.default", "A", "glyphs/A_.glif", STAT))
+
+    def test_corruptFiles(self):
+        self._writeCache().close()
+        with open(self.path, "rb") as file:
+            data = file.read()
+        self._assertRejected(b"")
+        self._assertRejected(b"garbage")
+        self._assertRejected(b"\x80" * len(data))
+        self._assertRejected(data[:20])
+        # another version
+        self._assertRejected(data[:4] + b"\x01\x00" + data[6:])
+
+    def test_invalidIndex(self):
+        self._writeCache().close()
+        with open(self.path, "rb") as file:
+            data = file.read()
+        index = b'{"public.default":{"A":["glyphs/A_.glif",-1,0,0,0]}}'
+        header = data[:8] + len(index).to_bytes(8, "little")
+        self._assertRejected(header + index)
+
+    def test_truncatedPayload(self):
+        self._writeCache().close()
+        with open(self.path, "rb") as file:
+            data = file.read()
+        with open(self.path, "wb") as file:
+            file.write(data[:-10])
+        cache = GlyphCache(self.path)
+        self.assertIsNone(cache.glyphData(
+            "public.default", "A", "glyphs/A_.glif", STAT))
+        cache.close()
+
+    def test_invalidPayload(self):
+        data = _glyphData()
+        data.outline.append(("__import__", ("os",), {}))
+        with self.assertRaises(ValueError):
+            loadGlyphData(dumpGlyphData(data))
+        cache = GlyphCache(self.path)
+        cache.write({"public.default": {
+            "A": ("glyphs/A_.glif", STAT, dumpGlyphData(data))}})
+        self.assertIsNone(cache.glyphData(
+            "public.default", "A", "glyphs/A_.glif", STAT))
+        cache.close()
+
+    def test_unserializableData(self):
+        data = _glyphData()
+        data.attributes["lib"] = {"data": b"\x00"}
+        self.assertIsNone(dumpGlyphData(data))
+
+
+class FontGlyphCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = saveTestFont(self)
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def _openFont(self):
+        font = TFont(self.path, glyphCacheDirectory=self.directory,
+                     notificationBackend=NullNotifications())
+        self.addCleanup(_closeGlyphCache, font)
+        return font
+
+    def test_cachePath(self):
+        path = cachePath(self.path, self.directory)
+        self.assertEqual(os.path.dirname(path), self.directory)
+        self.assertTrue(os.path.basename(path).startswith("Test-"))
+        self.assertNotEqual(path, cachePath(
+            os.path.join(self.directory, "Test.ufo"), self.directory))
+        self.assertFalse(os.path.exists(
+            os.path.join(self.path, "..", ".Test.ufo.tfcache")))
+
+    def test_reopen(self):
+        font = self._openFont()
+        font.loadGlyphs()
+        font.updateGlyphCache()
+        self.assertTrue(os.path.exists(
+            cachePath(self.path, self.directory)))
+        font = self._openFont()
+        self.assertEqual(len(font.glyphCache()), len(font))
+        font.loadGlyphs()
+        reference = Font(self.path)
+        for glyph in font:
+            referenceGlyph = reference[glyph.name]
+            self.assertEqual(glyph.width, referenceGlyph.width)
+            self.assertEqual(glyph.unicodes, referenceGlyph.unicodes)
+            self.assertEqual(len(glyph), len(referenceGlyph))
+            self.assertEqual(glyph.bounds, referenceGlyph.bounds)
+            self.assertFalse(glyph.dirty)
+
+    def test_staleGlyphIsReadFromDisk(self):
+        font = self._openFont()
+        font.loadGlyphs()
+        font.updateGlyphCache()
+        external = Font(self.path)
+        external["A"].width = 10
+        external.save()
+        font = self._openFont()
+        self.assertEqual(font["A"].width, 10)
+        self.assertEqual(font["B"].width, 600)
+
+    def test_corruptCache(self):
+        with open(cachePath(self.path, self.directory), "wb") as file:
+            file.write(b"TFGC\x02\x00\x00\x00" + b"\xff" * 64)
+        font = self._openFont()
+        self.assertEqual(len(font.glyphCache()), 0)
+        self.assertEqual(font["A"].width, 600)
+
+
+def _closeGlyphCache(font):
+    cache = font.glyphCache()
+    if cache is not None:
+        cache.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
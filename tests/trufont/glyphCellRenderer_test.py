@@ -0,0 +1,192 @@
+from PyQt5.QtCore import QEventLoop, QTimer
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QApplication
+from tests.trufont.fixtures import makeTestFont
+from trufont import representationFactories
+from trufont.objects import glyphCellRenderer
+from trufont.objects.glyphCellRenderer import (
+    GlyphCellCache, GlyphCellRenderer)
+from trufont.representationFactories.glyphCellFactory import (
+    GlyphCellImage, TFGlyphCellFactory)
+from unittest import mock
+import threading
+import unittest
+
+representationFactories.registerAllFactories()
+
+CELL_ARGUMENTS = dict(width=68, height=56)
+
+
+def _cellImages(glyphs, **kwargs):
+    kwargs.update(CELL_ARGUMENTS)
+    return [glyph.getRepresentation("TruFont.GlyphCellImage", **kwargs)
+            for glyph in glyphs]
+
+
+class _DrawingThreads(object):
+
+    def __init__(self):
+        self.threads = set()
+        self._lock = threading.Lock()
+        self._drawGlyphCellImage = glyphCellRenderer.drawGlyphCellImage
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.threads.add(threading.current_thread())
+        return self._drawGlyphCellImage(*args, **kwargs)
+
+
+class GlyphCellRendererTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.font = makeTestFont()
+        self.glyphs = [self.font[name] for name in self.font.glyphOrder]
+
+    def _waitForCells(self, renderer, cellImages):
+        loop = QEventLoop()
+
+        def cellsRendered():
+            if all(cellImage.pixmap is not None for cellImage in cellImages):
+                loop.quit()
+
+        renderer.cellsRendered.connect(cellsRendered)
+        QTimer.singleShot(10000, loop.quit)
+        loop.exec_()
+        renderer.cellsRendered.disconnect(cellsRendered)
+
+    def test_representation(self):
+        glyph = self.font["A"]
+        cellImage, = _cellImages([glyph])
+        self.assertIsInstance(cellImage, GlyphCellImage)
+        self.assertIsNone(cellImage.pixmap)
+        self.assertIs(_cellImages([glyph])[0], cellImage)
+        # a new size is a new cell
+        self.assertIsNot(_cellImages([glyph], pixelRatio=2.0)[0], cellImage)
+        glyph.width = 10
+        self.assertIsNot(_cellImages([glyph])[0], cellImage)
+
+    def test_renderOnThreads(self):
+        renderer = GlyphCellRenderer(threadCount=2)
+        cellImages = _cellImages(self.glyphs)
+        drawingThreads = _DrawingThreads()
+        with mock.patch.object(
+                glyphCellRenderer, "drawGlyphCellImage", drawingThreads):
+            renderer.render(self.glyphs, cellImages)
+            self._waitForCells(renderer, cellImages)
+        for cellImage in cellImages:
+            self.assertEqual(cellImage.pixmap.width(), 68)
+            self.assertEqual(cellImage.pixmap.height(), 56)
+        self.assertTrue(drawingThreads.threads)
+        self.assertNotIn(threading.main_thread(), drawingThreads.threads)
+        self.assertEqual(len(renderer.cache()), len(cellImages))
+
+    def test_renderOnMainThread(self):
+        renderer = GlyphCellRenderer(threadCount=0)
+        cellImages = _cellImages(self.glyphs)
+        drawingThreads = _DrawingThreads()
+        with mock.patch.object(
+                glyphCellRenderer, "drawGlyphCellImage", drawingThreads):
+            renderer.render(self.glyphs, cellImages)
+            # drawn from the event loop, not right away
+            self.assertIsNone(cellImages[0].pixmap)
+            self._waitForCells(renderer, cellImages)
+        self.assertEqual(drawingThreads.threads, {threading.main_thread()})
+
+    def test_renderReplacesQueue(self):
+        renderer = GlyphCellRenderer(threadCount=0)
+        cellImages = _cellImages(self.glyphs)
+        renderer.render(self.glyphs, cellImages)
+        renderer.render(self.glyphs[-1:], cellImages[-1:])
+        self._waitForCells(renderer, cellImages[-1:])
+        QApplication.processEvents()
+        self.assertIsNotNone(cellImages[-1].pixmap)
+        for cellImage in cellImages[:-1]:
+            self.assertIsNone(cellImage.pixmap)
+
+    def test_matchesPixmapFactory(self):
+        renderer = GlyphCellRenderer(threadCount=0)
+        for glyph in self.glyphs:
+            cellImage, = _cellImages([glyph])
+            renderer.renderNow([glyph], [cellImage])
+            pixmap = TFGlyphCellFactory(glyph, **CELL_ARGUMENTS)
+            format = QImage.Format_ARGB32_Premultiplied
+            self.assertEqual(
+                cellImage.pixmap.toImage().convertToFormat(format),
+                pixmap.toImage().convertToFormat(format))
+
+
+def _drawnCellImage(width=10, height=10):
+    cellImage = GlyphCellImage(dict(width=width, height=height))
+    cellImage.pixmap = QPixmap(width, height)
+    return cellImage
+
+
+class GlyphCellCacheTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.cellSize = _drawnCellImage().pixmap.depth() // 8 * 100
+        self.cache = GlyphCellCache(2 * self.cellSize)
+
+    def test_leastRecentlyUsedAreDropped(self):
+        cellImages = [_drawnCellImage() for _ in range(3)]
+        self.cache.add(cellImages[0])
+        self.cache.add(cellImages[1])
+        self.assertEqual(self.cache.size(), 2 * self.cellSize)
+        self.cache.touch(cellImages[0])
+        self.cache.add(cellImages[2])
+        self.assertEqual(len(self.cache), 2)
+        self.assertEqual(self.cache.size(), 2 * self.cellSize)
+        self.assertIsNone(cellImages[1].pixmap)
+        self.assertIsNotNone(cellImages[0].pixmap)
+        self.assertIsNotNone(cellImages[2].pixmap)
+
+    def test_readdingDoesntCountTwice(self):
+        cellImage = _drawnCellImage()
+        self.cache.add(cellImage)
+        self.cache.add(cellImage)
+        self.assertEqual(len(self.cache), 1)
+        self.assertEqual(self.cache.size(), self.cellSize)
+
+    def test_lastCellIsKept(self):
+        cellImage = _drawnCellImage(30, 30)
+        self.cache.add(_drawnCellImage())
+        self.cache.add(cellImage)
+        self.assertEqual(len(self.cache), 1)
+        self.assertIsNotNone(cellImage.pixmap)
+
+    def test_maxSize(self):
+        cellImages = [_drawnCellImage() for _ in range(2)]
+        for cellImage in cellImages:
+            self.cache.add(cellImage)
+        self.cache.maxSize = self.cellSize
+        self.cache.evict()
+        self.assertIsNone(cellImages[0].pixmap)
+        self.assertEqual(self.cache.size(), self.cellSize)
+
+    def test_clear(self):
+        cellImage = _drawnCellImage()
+        self.cache.add(cellImage)
+        self.cache.clear()
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size(), 0)
+        self.assertIsNone(cellImage.pixmap)
+
+    def test_rendererStaysWithinCache(self):
+        font = makeTestFont()
+        glyphs = [font[name] for name in font.glyphOrder]
+        cellImages = _cellImages(glyphs)
+        renderer = GlyphCellRenderer(threadCount=0, cacheSize=0)
+        renderer.cache().maxSize = 3 * 68 * 56 * 4
+        renderer.renderNow(glyphs, cellImages)
+        self.assertEqual(len(renderer.cache()), 3)
+        self.assertEqual(
+            [cellImage.pixmap is not None for cellImage in cellImages],
+            [False] * (len(glyphs) - 3) + [True] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
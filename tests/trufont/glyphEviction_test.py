@@ -0,0 +1,140 @@
+from PyQt5.QtWidgets import QApplication
+from tests.trufont.fixtures import saveTestFont
+from trufont.objects.defcon import NullNotifications, TFont
+import unittest
+
+
+class _RecordingNotifications(NullNotifications):
+
+    def __init__(self):
+        self.notifications = []
+
+    def postNotification(self, notification, data=None):
+        self.notifications.append((notification, data))
+
+
+class _Observer(object):
+
+    def notify(self, notification):
+        pass
+
+
+class GlyphEvictionTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.path = saveTestFont(self)
+        self.notifications = _RecordingNotifications()
+        self.font = TFont(self.path, glyphBudget=2,
+                          notificationBackend=self.notifications)
+        self.layer = self.font.layers.defaultLayer
+
+    def _loadedGlyphNames(self):
+        return {name for name in self.font.keys()
+                if self.layer.isGlyphLoaded(name)}
+
+    def test_leastRecentlyUsedGlyphsAreUnloaded(self):
+        for name in ("B", "C", "O"):
+            self.font[name]
+        # not before control returns to the event loop
+        self.assertEqual(self.layer.residentGlyphCount(), 3)
+        QApplication.processEvents()
+        self.assertEqual(self._loadedGlyphNames(), {"C", "O"})
+        self.assertEqual(self.font.residentGlyphCount(), 2)
+        notification, data = self.notifications.notifications[-1]
+        self.assertEqual(notification, "glyphsUnloaded")
+        self.assertEqual(data["glyphNames"], ["B"])
+        self.assertEqual(data["residentGlyphCount"], 2)
+        self.assertIs(data["layer"], self.layer)
+
+    def test_unloadedGlyphsAreReadAgain(self):
+        glyph = self.font["B"]
+        for name in ("C", "O"):
+            self.font[name]
+        self.layer._evictGlyphs()
+        self.assertFalse(self.layer.isGlyphLoaded("B"))
+        reloaded = self.font["B"]
+        self.assertIsNot(reloaded, glyph)
+        self.assertEqual(reloaded.width, 600)
+        self.assertEqual(reloaded.bounds, (50, 0, 550, 700))
+        self.assertFalse(reloaded.dirty)
+        self.assertFalse(self.font.dirty)
+
+    def test_glyphsInUseAreKept(self):
+        dirty = self.font["A"]
+        dirty.width = 10
+        pinned = self.font["B"]
+        pinned.pin()
+        observer = _Observer()
+        self.font["C"].addObserver(observer, "notify", "Glyph.Changed")
+        anyObserver = _Observer()
+        self.font["O"].addObserver(anyObserver, "notify", None)
+        selected = self.font["acute"]
+        selected[0][0].selected = True
+        self.font.setGlyphBudget(1)
+        self.layer._evictGlyphs()
+        self.assertEqual(
+            self._loadedGlyphNames(), {"A", "B", "C", "O", "acute"})
+        pinned.unpin()
+        self.font["C"].removeObserver(observer, "Glyph.Changed")
+        self.layer._evictGlyphs()
+        self.assertEqual(self._loadedGlyphNames(), {"A", "O", "acute"})
+
+    def test_baseGlyphsOfLoadedComponentsAreKept(self):
+        self.font["Aacute"].bounds
+        self.font["B"]
+        self.font.setGlyphBudget(1)
+        self.layer._evictGlyphs()
+        self.assertEqual(self._loadedGlyphNames(), {"A", "acute"})
+
+    def test_noBudget(self):
+        self.font.setGlyphBudget(0)
+        for name in self.font.keys():
+            self.font[name]
+        QApplication.processEvents()
+        self.assertEqual(self.layer.residentGlyphCount(), len(self.font))
+
+
+class ObservedGlyphTest(unittest.TestCase):
+
+    def setUp(self):
+        self.font = TFont(notificationBackend=NullNotifications())
+        self.glyph = self.font.newGlyph("A")
+
+    def test_ownObserversDoNotCount(self):
+        self.assertFalse(self.glyph.isObserved())
+
+    def test_observerCount(self):
+        observer = _Observer()
+        self.glyph.addObserver(observer, "notify", "Glyph.Changed")
+        self.glyph.addObserver(observer, "notify", "Glyph.NameChanged")
+        self.assertTrue(self.glyph.isObserved())
+        self.glyph.removeObserver(observer, "Glyph.Changed")
+        self.assertTrue(self.glyph.isObserved())
+        self.glyph.removeObserver(observer, "Glyph.NameChanged")
+        self.assertFalse(self.glyph.isObserved())
+        # removing twice doesn't go negative
+        self.glyph.removeObserver(observer, "Glyph.NameChanged")
+        self.glyph.addObserver(observer, "notify", "Glyph.Changed")
+        self.assertTrue(self.glyph.isObserved())
+
+    def test_anyNotification(self):
+        observer = _Observer()
+        self.glyph.addObserver(observer, "notify", None)
+        self.assertTrue(self.glyph.isObserved())
+        self.glyph.removeObserver(observer, None)
+        self.assertFalse(self.glyph.isObserved())
+
+    def test_pins(self):
+        self.glyph.pin()
+        self.glyph.pin()
+        self.glyph.unpin()
+        self.assertTrue(self.glyph.isPinned())
+        self.glyph.unpin()
+        self.glyph.unpin()
+        self.assertFalse(self.glyph.isPinned())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+from defcon import Font
+from tests.trufont.fixtures import (
+    drawOval, drawRect, makeTestFont, saveTestFont)
+from trufont.objects.defcon import NullNotifications, TFont
+from trufont.tools.glyphLoader import (
+    MIN_PARALLEL_GLYPH_COUNT, GlyphData, GlyphLoader)
+import unittest
+
+
+def _glyphState(glyph):
+    return (
+        glyph.width, glyph.unicodes,
+        [[(point.x, point.y, point.segmentType, point.smooth)
+          for point in contour] for contour in glyph],
+        [(component.baseGlyph, component.transformation)
+         for component in glyph.components],
+        [dict(anchor) for anchor in glyph.anchors],
+        dict(glyph.lib))
+
+
+class GlyphLoaderTest(unittest.TestCase):
+
+    def setUp(self):
+        font = makeTestFont()
+        for index in range(MIN_PARALLEL_GLYPH_COUNT):
+            glyph = font.newGlyph("g%03d" % index)
+            glyph.width = index
+            if index % 2:
+                drawRect(glyph, 0, 0, index, 100)
+            else:
+                drawOval(glyph, 0, 0, index + 10, 100)
+            glyph.appendAnchor(dict(x=index, y=0, name="top"))
+        self.path = saveTestFont(self, font)
+
+    def test_parallelReadMatchesSerialRead(self):
+        font = TFont(self.path, notificationBackend=NullNotifications())
+        glyphSet = font.layers.defaultLayer._glyphSet
+        glyphNames = list(glyphSet.keys())
+        serial = GlyphLoader(1).readGlyphs(glyphSet, glyphNames)
+        parallel = GlyphLoader(2).readGlyphs(glyphSet, glyphNames)
+        self.assertEqual(set(serial), set(glyphNames))
+        self.assertEqual(set(parallel), set(glyphNames))
+        for name in glyphNames:
+            self.assertEqual(serial[name].attributes,
+                             parallel[name].attributes)
+            self.assertEqual(serial[name].outline, parallel[name].outline)
+            self.assertEqual(serial[name].text, parallel[name].text)
+
+    def test_missingGlyphsAreSkipped(self):
+        font = TFont(self.path, notificationBackend=NullNotifications())
+        glyphSet = font.layers.defaultLayer._glyphSet
+        glyphsData = GlyphLoader(1).readGlyphs(glyphSet, ["A", "missing"])
+        self.assertEqual(list(glyphsData), ["A"])
+
+    def test_loadGlyphsMatchesDefcon(self):
+        for workerCount in (1, 2):
+            font = TFont(self.path, glyphLoaderWorkerCount=workerCount,
+                         notificationBackend=NullNotifications())
+            font.loadGlyphs()
+            layer = font.layers.defaultLayer
+            self.assertEqual(layer.residentGlyphCount(), len(font))
+            reference = Font(self.path)
+            for glyph in font:
+                self.assertEqual(
+                    _glyphState(glyph), _glyphState(reference[glyph.name]))
+                self.assertFalse(glyph.dirty)
+            self.assertFalse(font.dirty)
+            self.assertEqual(
+                font.unicodeData.glyphNameForUnicode(0xC1), "Aacute")
+
+    def test_loadGlyphsKeepsLoadedGlyphs(self):
+        font = TFont(self.path, glyphLoaderWorkerCount=1,
+                     notificationBackend=NullNotifications())
+        glyph = font["A"]
+        glyph.width = 10
+        font.loadGlyphs(["A", "B"])
+        self.assertIs(font["A"], glyph)
+        self.assertEqual(font["A"].width, 10)
+        self.assertTrue(font.layers.defaultLayer.isGlyphLoaded("B"))
+        self.assertFalse(font.layers.defaultLayer.isGlyphLoaded("C"))
+
+    def test_glyphDataFromGlyph(self):
+        font = makeTestFont()
+        for glyph in font:
+            data = GlyphData.fromGlyph(glyph)
+            copy = Font().newGlyph(glyph.name)
+            for attr, value in data.attributes.items():
+                setattr(copy, attr, value)
+            data.drawPoints(copy.getPointPen())
+            self.assertEqual(_glyphState(copy), _glyphState(glyph))
+
+
+if __name__ == "__main__":
+    unittest.main()
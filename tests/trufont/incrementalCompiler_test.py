@@ -0,0 +1,176 @@
+from defcon import Glyph, registerRepresentationFactory
+from functools import partial
+from tests.trufont.fixtures import drawOval, makeTestFont
+from trufont.representationFactories.glyphDigestFactory import (
+    GlyphDigestFactory)
+from trufont.tools.glyphLoader import MIN_PARALLEL_GLYPH_COUNT
+from trufont.tools.incrementalCompiler import (
+    CompileCache, IncrementalOTFCompiler, IncrementalTTFCompiler)
+from ufo2ft import compileOTF
+from ufo2ft.outlineCompiler import OutlineOTFCompiler, OutlineTTFCompiler
+import io
+import unittest
+
+registerRepresentationFactory(Glyph, "TruFont.Digest", GlyphDigestFactory)
+
+
+def _makeFont():
+    font = makeTestFont()
+    # keep the head table the same from one compilation to the next
+    font.info.openTypeHeadCreated = "2000/01/01 00:00:00"
+    return font
+
+
+def _fontData(otf):
+    # compilations may be a second apart
+    otf["head"].modified = 0
+    otf.recalcTimestamp = False
+    stream = io.BytesIO()
+    otf.save(stream)
+    return stream.getvalue()
+
+
+def _ttGlyphState(otf, name):
+    ttGlyph = otf["glyf"][name]
+    state = [otf["hmtx"][name], ttGlyph.numberOfContours]
+    if ttGlyph.isComposite():
+        state.append([(component.glyphName, component.x, component.y)
+                      for component in ttGlyph.components])
+    elif ttGlyph.numberOfContours:
+        state.extend((list(ttGlyph.coordinates), ttGlyph.endPtsOfContours,
+                      list(ttGlyph.flags)))
+    return state
+
+
+class IncrementalOTFCompilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.font = _makeFont()
+        self.compileCache = CompileCache()
+
+    def _compile(self, **kwargs):
+        return IncrementalOTFCompiler(
+            self.font, compileCache=self.compileCache, **kwargs).compile()
+
+    def test_matchesOutlineCompiler(self):
+        expected = _fontData(OutlineOTFCompiler(self.font).compile())
+        self.assertEqual(_fontData(self._compile()), expected)
+        self.assertTrue(len(self.compileCache))
+        # from the cache this time
+        self.assertEqual(_fontData(self._compile()), expected)
+
+    def test_matchesUfo2ft(self):
+        expected = _fontData(compileOTF(self.font, useProductionNames=False))
+        for _ in range(2):
+            otf = compileOTF(
+                self.font, useProductionNames=False,
+                outlineCompilerClass=partial(
+                    IncrementalOTFCompiler, compileCache=self.compileCache))
+            self.assertEqual(_fontData(otf), expected)
+
+    def test_changedGlyphs(self):
+        self._compile()
+        self.font["A"].move((10, 20))
+        self.font["O"].width = 650
+        expected = _fontData(OutlineOTFCompiler(self.font).compile())
+        self.assertEqual(_fontData(self._compile()), expected)
+
+    def test_pruneCache(self):
+        self._compile()
+        count = len(self.compileCache)
+        self.font["O"].move((0, 10))
+        self._compile()
+        self.assertEqual(len(self.compileCache), count)
+        self.font["O"].move((0, 10))
+        self._compile(pruneCache=False)
+        self.assertEqual(len(self.compileCache), count + 1)
+
+    def test_compositeKeys(self):
+        compiler = IncrementalOTFCompiler(self.font)
+        keys = {name: compiler.glyphKey(self.font[name])
+                for name in ("A", "Aacute", "Aacute.alt")}
+        self.font["A"].move((10, 0))
+        compiler = IncrementalOTFCompiler(self.font)
+        for name, key in keys.items():
+            self.assertNotEqual(compiler.glyphKey(self.font[name]), key)
+        self.assertIsNone(compiler.glyphKey(compiler.allGlyphs[".notdef"]))
+
+    def test_setups(self):
+        self._compile()
+        count = len(self.compileCache)
+        self.font.info.postscriptNominalWidthX = 600
+        expected = _fontData(OutlineOTFCompiler(self.font).compile())
+        self.assertEqual(_fontData(self._compile()), expected)
+        self.assertEqual(len(self.compileCache), 2 * count)
+
+
+class IncrementalTTFCompilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.font = _makeFont()
+        self.compileCache = CompileCache()
+
+    def _assertMatchesOutlineCompiler(self, compiler):
+        compiler.compile()
+        expected = OutlineTTFCompiler(self.font)
+        expected.compile()
+        self.assertEqual(compiler.glyphOrder, expected.glyphOrder)
+        for name in expected.glyphOrder:
+            self.assertEqual(_ttGlyphState(compiler.otf, name),
+                             _ttGlyphState(expected.otf, name))
+        for tag in ("head", "hhea"):
+            self.assertEqual(
+                compiler.otf[tag].__dict__, expected.otf[tag].__dict__)
+
+    def test_matchesOutlineCompiler(self):
+        for _ in range(2):
+            self._assertMatchesOutlineCompiler(IncrementalTTFCompiler(
+                self.font, compileCache=self.compileCache))
+
+    def test_changedGlyphs(self):
+        IncrementalTTFCompiler(
+            self.font, compileCache=self.compileCache).compile()
+        self.font["acute"].move((0, -50))
+        self._assertMatchesOutlineCompiler(IncrementalTTFCompiler(
+            self.font, compileCache=self.compileCache))
+
+
+class ParallelTTFCompilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.font = _makeFont()
+        for index in range(MIN_PARALLEL_GLYPH_COUNT):
+            glyph = self.font.newGlyph("o%03d" % index)
+            glyph.width = index + 100
+            drawOval(glyph, 0, 0, index + 50, 100 + index % 7)
+
+    def test_matchesSerialConversion(self):
+        serial = IncrementalTTFCompiler(self.font, workerCount=1)
+        serial.compile()
+        compileCache = CompileCache()
+        parallel = IncrementalTTFCompiler(
+            self.font, compileCache=compileCache, workerCount=2)
+        parallel.compile()
+        self.assertEqual(parallel.glyphOrder, serial.glyphOrder)
+        for name in serial.glyphOrder:
+            self.assertEqual(_ttGlyphState(parallel.otf, name),
+                             _ttGlyphState(serial.otf, name))
+        # the glyphs converted by the workers are cached
+        compiler = IncrementalTTFCompiler(
+            self.font, compileCache=compileCache, workerCount=2)
+        for name in ("O", "o000"):
+            self.assertIsNotNone(compiler.cachedGlyphValue(
+                self.font[name], "ttGlyph"))
+
+    def test_tooFewGlyphs(self):
+        for name in list(self.font.keys()):
+            if name.startswith("o"):
+                del self.font[name]
+        compiler = IncrementalTTFCompiler(self.font, workerCount=2)
+        compiler.convertGlyphsInParallel()
+        for entry in compiler._usedEntries.values():
+            self.assertNotIn("ttGlyph", entry)
+
+
+if __name__ == "__main__":
+    unittest.main()
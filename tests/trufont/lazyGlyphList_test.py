@@ -0,0 +1,94 @@
+from tests.trufont.fixtures import makeTestFont, saveTestFont
+from trufont.objects.defcon import NullNotifications, TFont
+from trufont.objects.lazyGlyphList import LazyGlyphList
+import unittest
+
+
+class LazyGlyphListTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = saveTestFont(self)
+        self.font = TFont(self.path, notificationBackend=NullNotifications())
+        self.layer = self.font.layers.defaultLayer
+        self.glyphs = LazyGlyphList(self.font, self.font.glyphOrder)
+
+    def test_glyphsLoadWhenAccessed(self):
+        self.assertEqual(len(self.glyphs), 7)
+        self.assertFalse(any(
+            self.glyphs.isLoaded(index) for index in range(7)))
+        self.assertEqual(self.glyphs.loadedGlyphs(), [])
+        glyph = self.glyphs[3]
+        self.assertEqual(glyph.name, "O")
+        self.assertTrue(self.glyphs.isLoaded(3))
+        self.assertFalse(self.glyphs.isLoaded(2))
+        self.assertEqual(self.glyphs.loadedGlyphs(), [glyph])
+
+    def test_namesDontLoadGlyphs(self):
+        self.assertEqual(self.glyphs.glyphName(5), "Aacute")
+        self.assertEqual(self.glyphs.glyphNames(), self.font.glyphOrder)
+        self.assertFalse(self.layer.isGlyphLoaded("Aacute"))
+
+    def test_roundTrip(self):
+        expected = makeTestFont()
+        for glyph in self.glyphs:
+            expectedGlyph = expected[glyph.name]
+            self.assertEqual(glyph.unicodes, expectedGlyph.unicodes)
+            self.assertEqual(glyph.width, expectedGlyph.width)
+            self.assertEqual(
+                [[(point.x, point.y, point.segmentType) for point in contour]
+                 for contour in glyph],
+                [[(point.x, point.y, point.segmentType) for point in contour]
+                 for contour in expectedGlyph])
+            self.assertEqual(
+                [(component.baseGlyph, component.transformation)
+                 for component in glyph.components],
+                [(component.baseGlyph, component.transformation)
+                 for component in expectedGlyph.components])
+        self.assertEqual(self.layer.residentGlyphCount(), 7)
+
+    def test_slice(self):
+        glyphs = self.glyphs[1:3]
+        self.assertIsInstance(glyphs, LazyGlyphList)
+        self.assertEqual(glyphs.glyphNames(), ["B", "C"])
+        self.assertFalse(self.layer.isGlyphLoaded("B"))
+
+    def test_containsAndIndex(self):
+        glyph = self.font["C"]
+        self.assertIn(glyph, self.glyphs)
+        self.assertEqual(self.glyphs.index(glyph), 2)
+        self.assertNotIn(None, self.glyphs)
+        glyphs = LazyGlyphList(self.font, ["A", "B"])
+        self.assertNotIn(glyph, glyphs)
+        with self.assertRaises(ValueError):
+            glyphs.index(glyph)
+
+    def test_indexFollowsChanges(self):
+        glyphs = LazyGlyphList(self.font, ["A", "B"])
+        glyph = self.font["O"]
+        self.assertNotIn(glyph, glyphs)
+        glyphs.append(glyph)
+        self.assertEqual(glyphs.index(glyph), 2)
+        glyphs.addGlyphNames(["C"])
+        self.assertEqual(glyphs.index(self.font["C"]), 3)
+        glyphs.setGlyphNames(["C", "O"])
+        self.assertEqual(glyphs.index(glyph), 1)
+        self.assertNotIn(self.font["A"], glyphs)
+
+    def test_loadedGlyphsDontCountAsUses(self):
+        self.font.setGlyphBudget(10)
+        for name in ("A", "B", "C"):
+            self.font[name]
+        recentGlyphNames = list(self.layer._recentGlyphNames)
+        glyphs = LazyGlyphList(self.font, ["C", "B", "A"])
+        self.assertEqual(
+            [glyph.name for glyph in glyphs.loadedGlyphs()], ["C", "B", "A"])
+        self.assertEqual(list(self.layer._recentGlyphNames), recentGlyphNames)
+
+    def test_duplicateNames(self):
+        glyphs = LazyGlyphList(self.font, ["A", "B", "A"])
+        self.assertEqual(glyphs.index(self.font["A"]), 0)
+        self.assertEqual(glyphs.glyphIndexes(), {"A": 0, "B": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
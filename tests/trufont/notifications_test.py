@@ -0,0 +1,129 @@
+from PyQt5.QtWidgets import QApplication
+from trufont.objects.defcon import (
+    ApplicationNotifications, NullNotifications, TFont, notificationBackend)
+import fontTools.agl
+import unittest
+
+
+class _RecordingNotifications(ApplicationNotifications):
+
+    def __init__(self, quiet):
+        self.quiet = quiet
+        self.notifications = []
+
+    def postNotification(self, notification, data=None):
+        self.notifications.append(notification)
+
+
+class _Observer(object):
+
+    def __init__(self):
+        self.notifications = []
+
+    def notify(self, notification):
+        self.notifications.append(notification.name)
+
+
+class BackendTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def test_applicationNotifications(self):
+        backend = ApplicationNotifications()
+        self.assertFalse(backend.quiet)
+        # the application doesn't post notifications
+        backend.postNotification("fontSaved", dict(font=None))
+        self.assertIs(backend.glyphList(), fontTools.agl.AGL2UV)
+        notifications = []
+        self.app.postNotification = lambda notification, data: \
+            notifications.append((notification, data))
+        self.app.GL2UV = {"foo": 0x41}
+        self.addCleanup(delattr, self.app, "postNotification")
+        self.addCleanup(delattr, self.app, "GL2UV")
+        backend.postNotification("fontSaved", dict(font=None))
+        self.assertEqual(notifications, [("fontSaved", dict(font=None))])
+        self.assertEqual(backend.glyphList(), {"foo": 0x41})
+
+    def test_nullNotifications(self):
+        backend = NullNotifications()
+        self.assertTrue(backend.quiet)
+        notifications = []
+        self.app.postNotification = lambda notification, data: \
+            notifications.append((notification, data))
+        self.app.GL2UV = {"foo": 0x41}
+        self.addCleanup(delattr, self.app, "postNotification")
+        self.addCleanup(delattr, self.app, "GL2UV")
+        backend.postNotification("fontSaved", dict(font=None))
+        self.assertEqual(notifications, [])
+        self.assertIs(backend.glyphList(), fontTools.agl.AGL2UV)
+
+    def test_notificationBackend(self):
+        self.assertIs(notificationBackend(None), TFont.notificationBackend)
+        backend = NullNotifications()
+        font = TFont(notificationBackend=backend)
+        self.assertIs(notificationBackend(font), backend)
+        self.assertIs(
+            notificationBackend(TFont()), TFont.notificationBackend)
+
+
+class NewStandardGlyphTest(unittest.TestCase):
+
+    def _newGlyph(self, quiet, **kwargs):
+        backend = _RecordingNotifications(quiet)
+        font = TFont(notificationBackend=backend)
+        glyph = font.newStandardGlyph("Aacute", markColor="1,0,0,1",
+                                      width=600, **kwargs)
+        return font, glyph, backend.notifications
+
+    def test_quietMatchesNotifying(self):
+        for asTemplate in (False, True):
+            _, glyph, _ = self._newGlyph(False, asTemplate=asTemplate)
+            font, quietGlyph, notifications = self._newGlyph(
+                True, asTemplate=asTemplate)
+            self.assertEqual(notifications, ["newGlyphCreated"])
+            for attr in ("width", "unicodes", "markColor", "template",
+                         "dirty"):
+                self.assertEqual(
+                    getattr(quietGlyph, attr), getattr(glyph, attr), attr)
+            self.assertEqual(
+                font.unicodeData.glyphNameForUnicode(0xC1), "Aacute")
+
+    def _glyphChanges(self, quiet):
+        font = TFont(notificationBackend=_RecordingNotifications(quiet))
+        observer = _Observer()
+        font.layers.defaultLayer.addObserver(
+            observer, "notify", "Layer.GlyphChanged")
+        glyph = font.newStandardGlyph("A", markColor="1,0,0,1")
+        self.assertEqual(glyph.unicodes, [0x41])
+        self.assertTrue(glyph.dirty)
+        return observer.notifications
+
+    def test_quietGlyphPostsOnce(self):
+        self.assertGreater(len(self._glyphChanges(False)), 1)
+        # for the dirty state only
+        self.assertEqual(self._glyphChanges(True), ["Layer.GlyphChanged"])
+
+    def test_existingGlyph(self):
+        font = TFont(notificationBackend=NullNotifications())
+        glyph = font.newStandardGlyph("A")
+        self.assertIsNone(font.newStandardGlyph("A"))
+        self.assertIsNot(font.newStandardGlyph("A", override=True), glyph)
+
+    def test_newStandardGlyphs(self):
+        for quiet in (False, True):
+            font = TFont(notificationBackend=_RecordingNotifications(quiet))
+            font.newStandardGlyph("B")
+            observer = _Observer()
+            font.addObserver(observer, "notify", "Font.GlyphOrderChanged")
+            glyphs = font.newStandardGlyphs(["A", "B", "uni00C1"])
+            self.assertEqual(
+                [glyph.name for glyph in glyphs], ["A", "uni00C1"])
+            self.assertEqual(font.glyphOrder, ["B", "A", "uni00C1"])
+            self.assertEqual(observer.notifications,
+                             ["Font.GlyphOrderChanged"])
+            self.assertEqual(font["uni00C1"].unicodes, [0xC1])
+            self.assertTrue(font.layers.defaultLayer.dirty)
+
+
+if __name__ == "__main__":
+    unittest.main()
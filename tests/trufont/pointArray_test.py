@@ -0,0 +1,149 @@
+from defcon import Font
+from tests.trufont.fixtures import drawOval, saveTestFont
+from trufont.objects.defcon import (
+    NullNotifications, TFont, TPackedContour, TPackedPoint)
+from trufont.objects.pointArray import PointArray
+import unittest
+
+
+def _contourState(contour):
+    return [(point.x, point.y, point.segmentType, point.smooth, point.name,
+             point.identifier) for point in contour]
+
+
+def _segmentState(contour):
+    return [[(point.x, point.y, point.segmentType) for point in segment]
+            for segment in contour.segments]
+
+
+def _glyphContours(glyph):
+    return [_contourState(contour) for contour in glyph]
+
+
+class PointArrayTest(unittest.TestCase):
+
+    def setUp(self):
+        self.points = PointArray(TPackedPoint)
+        self.points.appendValues(0, 0, "line")
+        self.points.appendValues(10.5, 20, "curve", smooth=True)
+        self.points.appendValues(30, 40, name="foo", identifier="bar")
+
+    def test_values(self):
+        self.assertEqual(len(self.points), 3)
+        self.assertEqual(list(self.points.iterValues()), [
+            (0, 0, "line", False, None, None, False),
+            (10.5, 20, "curve", True, None, None, False),
+            (30, 40, None, False, "foo", "bar", False),
+        ])
+        # integers stay integers
+        self.assertIsInstance(self.points.getX(0), int)
+        self.assertIsInstance(self.points.getX(1), float)
+
+    def test_viewsFollowInsertions(self):
+        point = self.points[1]
+        self.assertIs(self.points[1], point)
+        self.points.insert(0, TPackedPoint((-5, -5), segmentType="move"))
+        self.assertEqual(self.points.index(point), 2)
+        self.assertEqual((point.x, point.y), (10.5, 20))
+        point.x = 11
+        self.assertEqual(self.points.getX(2), 11)
+
+    def test_removedPointKeepsValues(self):
+        point = self.points[2]
+        self.points.remove(point)
+        self.assertEqual(len(self.points), 2)
+        self.assertNotIn(point, self.points)
+        self.assertEqual(
+            (point.x, point.y, point.name, point.identifier),
+            (30, 40, "foo", "bar"))
+        point.x = 50
+        self.assertEqual(self.points.getX(1), 10.5)
+
+    def test_detachPoints(self):
+        point = self.points[0]
+        self.points.detachPoints()
+        self.assertNotIn(point, self.points)
+        self.assertEqual((point.x, point.y, point.segmentType), (0, 0, "line"))
+
+    def test_indexErrors(self):
+        with self.assertRaises(IndexError):
+            self.points[3]
+        self.assertEqual(self.points[-1].name, "foo")
+        with self.assertRaises(ValueError):
+            self.points.index(TPackedPoint((0, 0)))
+
+
+class PackedContourTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = saveTestFont(self)
+
+    def _openFont(self):
+        return TFont(self.path, packedContours=True,
+                     notificationBackend=NullNotifications())
+
+    def test_contourClass(self):
+        font = self._openFont()
+        contour = font["O"][0]
+        self.assertIsInstance(contour, TPackedContour)
+        self.assertIsInstance(contour[0], TPackedPoint)
+
+    def test_matchesDefcon(self):
+        font = self._openFont()
+        reference = Font(self.path)
+        for glyph in font:
+            referenceGlyph = reference[glyph.name]
+            self.assertEqual(
+                _glyphContours(glyph), _glyphContours(referenceGlyph))
+            self.assertEqual(glyph.bounds, referenceGlyph.bounds)
+            self.assertEqual(
+                glyph.controlPointBounds, referenceGlyph.controlPointBounds)
+            for contour, referenceContour in zip(glyph, referenceGlyph):
+                self.assertEqual(
+                    _segmentState(contour), _segmentState(referenceContour))
+                self.assertEqual(
+                    contour.clockwise, referenceContour.clockwise)
+                self.assertEqual(contour.open, referenceContour.open)
+
+    def test_editsMatchDefcon(self):
+        font = self._openFont()
+        reference = Font(self.path)
+        for glyph in (font["O"], reference["O"]):
+            contour = glyph[0]
+            contour.reverse()
+            contour.setStartPoint(3)
+            contour.move((10, -5))
+            contour[1].x = 75.5
+            contour[2].smooth = True
+            drawOval(glyph, 0, 0, 100, 100)
+            glyph[1].removeSegment(1)
+        self.assertEqual(
+            _glyphContours(font["O"]), _glyphContours(reference["O"]))
+        self.assertEqual(font["O"].bounds, reference["O"].bounds)
+        self.assertTrue(font["O"].dirty)
+
+    def test_heldPointsFollowEdits(self):
+        font = self._openFont()
+        contour = font["O"][0]
+        index = [point.segmentType for point in contour].index("curve", 1)
+        point = contour[index]
+        x, y = point.x, point.y
+        contour.setStartPoint(index)
+        self.assertIs(contour[0], point)
+        self.assertEqual((point.x, point.y), (x, y))
+        point.y = y + 10
+        self.assertEqual(contour[0].y, y + 10)
+
+    def test_saveRoundTrip(self):
+        font = self._openFont()
+        font["O"][0].move((1, 2))
+        font["A"][0].move((-50, 0))
+        font.save()
+        reference = Font(self.path)
+        for name in ("O", "A"):
+            self.assertEqual(
+                _glyphContours(font[name]), _glyphContours(reference[name]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+from defcon import Glyph, registerRepresentationFactory
+from tests.trufont.fixtures import addComponent, drawRect, makeTestFont
+from trufont.representationFactories.glyphDigestFactory import (
+    GlyphDigestFactory)
+from trufont.tools.glyphLoader import MIN_PARALLEL_GLYPH_COUNT
+from trufont.tools.preflight import (
+    PreflightChecker, PreflightReport, checkOutline, hasOverlap)
+import unittest
+
+registerRepresentationFactory(Glyph, "TruFont.Digest", GlyphDigestFactory)
+
+
+def _drawOpenPath(glyph):
+    pen = glyph.getPointPen()
+    pen.beginPath()
+    pen.addPoint((0, 0), "move")
+    pen.addPoint((100, 100), "line")
+    pen.endPath()
+
+
+def _drawBulge(glyph):
+    # the curve goes past the top of its on-curve points
+    pen = glyph.getPointPen()
+    pen.beginPath()
+    pen.addPoint((0, 0), "line")
+    pen.addPoint((0, 100))
+    pen.addPoint((100, 100))
+    pen.addPoint((100, 0), "curve")
+    pen.endPath()
+
+
+def _addIssues(font):
+    _drawOpenPath(font.newGlyph("open"))
+    glyph = font.newGlyph("overlap")
+    drawRect(glyph, 0, 0, 100, 100)
+    drawRect(glyph, 50, 50, 150, 150)
+    _drawBulge(font.newGlyph("bulge"))
+    addComponent(font.newGlyph("broken"), "missing")
+
+
+class OutlineCheckTest(unittest.TestCase):
+
+    def setUp(self):
+        self.font = makeTestFont()
+
+    def test_cleanGlyphs(self):
+        for glyph in self.font:
+            self.assertEqual(checkOutline(glyph), [])
+
+    def test_openContour(self):
+        glyph = self.font.newGlyph("open")
+        drawRect(glyph, 0, 0, 10, 10)
+        _drawOpenPath(glyph)
+        self.assertEqual(
+            checkOutline(glyph), [("openContour", "contour 1 is open")])
+
+    def test_overlap(self):
+        glyph = self.font["A"]
+        self.assertFalse(hasOverlap(glyph))
+        drawRect(glyph, 500, 0, 700, 100)
+        self.assertTrue(hasOverlap(glyph))
+        self.assertEqual(
+            checkOutline(glyph), [("overlap", "contours overlap")])
+        # contours side by side don't
+        glyph = self.font.newGlyph("apart")
+        drawRect(glyph, 0, 0, 10, 10)
+        drawRect(glyph, 20, 0, 30, 10)
+        self.assertEqual(checkOutline(glyph), [])
+
+    def test_extremePoints(self):
+        glyph = self.font.newGlyph("bulge")
+        _drawBulge(glyph)
+        self.assertEqual(checkOutline(glyph), [(
+            "extremePoints", "contour 0 lacks extreme points before point 3")])
+
+
+class PreflightCheckerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.font = makeTestFont()
+        _addIssues(self.font)
+        self.checker = PreflightChecker(workerCount=1)
+
+    def test_check(self):
+        report = self.checker.check(self.font)
+        self.assertEqual(report.glyphCount, len(self.font))
+        # in glyph order
+        self.assertEqual(
+            report.glyphNames(), ["open", "overlap", "bulge", "broken"])
+        self.assertEqual(report.issuesByCheck(), {
+            "missingComponent": [
+                ("broken", "component base glyph missing is missing")],
+            "extremePoints": [
+                ("bulge", "contour 0 lacks extreme points before point 3")],
+            "openContour": [("open", "contour 0 is open")],
+            "overlap": [("overlap", "contours overlap")],
+        })
+        self.assertEqual(
+            str(report).splitlines()[0],
+            "open: contour 0 is open (openContour)")
+
+    def test_glyphNames(self):
+        report = self.checker.check(self.font, ["A", "open", "unknown"])
+        self.assertEqual(report.glyphCount, 2)
+        self.assertEqual(report.glyphNames(), ["open"])
+
+    def test_changedGlyphs(self):
+        self.checker.check(self.font)
+        self.font["overlap"].clearContours()
+        self.font.newGlyph("missing")
+        report = self.checker.check(self.font)
+        self.assertEqual(report.glyphNames(), ["open", "bulge"])
+
+    def test_resultsAreCached(self):
+        self.checker.check(self.font)
+        results = dict(self.checker._results)
+        # identical outlines share results
+        self.assertEqual(len(results), len(self.font) - 2)
+        report = self.checker.check(self.font)
+        self.assertEqual(self.checker._results, results)
+        self.assertEqual(len(report), 4)
+        self.checker.clear()
+        self.assertEqual(self.checker._results, {})
+
+    def test_parallelCheck(self):
+        for index in range(MIN_PARALLEL_GLYPH_COUNT):
+            glyph = self.font.newGlyph("g%03d" % index)
+            drawRect(glyph, 0, 0, 10 + index, 10)
+            if index % 3 == 0:
+                _drawOpenPath(glyph)
+        expected = self.checker.check(self.font)
+        checker = PreflightChecker(workerCount=2)
+        self.assertEqual(checker.check(self.font).issues, expected.issues)
+
+    def test_fontPreflight(self):
+        report = self.font.preflight()
+        self.assertIsInstance(report, PreflightReport)
+        self.assertEqual(len(report), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+from fontTools.pens.qtPen import QtPen
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPainterPath, QTransform
+from PyQt5.QtWidgets import QApplication
+from tests.trufont.fixtures import makeTestFont
+from trufont import representationFactories
+from trufont.representationFactories import glyphNotifications
+import unittest
+
+representationFactories.registerAllFactories()
+
+
+class GlyphNotificationsTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.font = makeTestFont()
+
+    def test_glyphNotifications(self):
+        self.assertEqual(
+            glyphNotifications(["outline", "metrics"]),
+            ["Glyph.ContoursChanged", "Glyph.WidthChanged",
+             "Glyph.HeightChanged"])
+        self.assertEqual(glyphNotifications([]), [])
+        with self.assertRaises(KeyError):
+            glyphNotifications(["kerning"])
+
+    def test_metricsChange(self):
+        glyph = self.font["A"]
+        glyph.getRepresentation("TruFont.Digest")
+        glyph.getRepresentation("defconQt.QPainterPath")
+        glyph.width = 500
+        self.assertFalse(glyph.hasCachedRepresentation("TruFont.Digest"))
+        self.assertTrue(
+            glyph.hasCachedRepresentation("defconQt.QPainterPath"))
+
+    def test_outlineChange(self):
+        glyph = self.font["A"]
+        glyph.getRepresentation("defconQt.QPainterPath")
+        glyph.getRepresentation("TruFont.Digest")
+        glyph.clearContours()
+        self.assertFalse(
+            glyph.hasCachedRepresentation("defconQt.QPainterPath"))
+        self.assertFalse(glyph.hasCachedRepresentation("TruFont.Digest"))
+
+    def test_cellsIgnoreSelectionAndAnchors(self):
+        glyph = self.font["A"]
+        cellArguments = dict(width=68, height=56)
+        cellImage = glyph.getRepresentation(
+            "TruFont.GlyphCellImage", **cellArguments)
+        glyph.getRepresentation("TruFont.FilterSelection")
+        glyph.selected = True
+        glyph.appendAnchor(dict(name="top", x=300, y=700))
+        self.assertFalse(
+            glyph.hasCachedRepresentation("TruFont.FilterSelection"))
+        self.assertIs(glyph.getRepresentation(
+            "TruFont.GlyphCellImage", **cellArguments), cellImage)
+        glyph.unicodes = [0x61]
+        self.assertIsNot(glyph.getRepresentation(
+            "TruFont.GlyphCellImage", **cellArguments), cellImage)
+
+
+def _penPath(glyph):
+    pen = QtPen(glyph.layer)
+    glyph.draw(pen)
+    path = pen.path
+    path.setFillRule(Qt.WindingFill)
+    return path
+
+
+class CompositePathTest(unittest.TestCase):
+
+    app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.font = makeTestFont()
+
+    def _path(self, name):
+        return self.font[name].getRepresentation("defconQt.QPainterPath")
+
+    def test_compositePath(self):
+        # copy, not to change the cached path
+        path = QPainterPath(self._path("A"))
+        path.addPath(QTransform(1, 0, 0, 1, 150, 0).map(self._path("acute")))
+        self.assertEqual(self._path("Aacute"), path)
+        self.assertEqual(
+            self._path("Aacute.alt"),
+            QTransform(1, 0, 0, 1, 0, 10).map(self._path("Aacute")))
+
+    def test_matchesPenPath(self):
+        for name in ("A", "O", "Aacute", "Aacute.alt"):
+            self.assertEqual(self._path(name), _penPath(self.font[name]))
+
+    def test_baseGlyphChange(self):
+        paths = [self._path(name) for name in ("Aacute", "Aacute.alt")]
+        self.font["A"].move((0, 20))
+        for name, path in zip(("Aacute", "Aacute.alt"), paths):
+            newPath = self._path(name)
+            self.assertNotEqual(newPath, path)
+            self.assertEqual(newPath, _penPath(self.font[name]))
+        self.assertEqual(
+            self._path("Aacute").boundingRect().top(), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
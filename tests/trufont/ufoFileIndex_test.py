@@ -0,0 +1,205 @@
+from defcon import Font, Glyph, registerRepresentationFactory
+from tests.trufont.fixtures import drawRect, saveTestFont
+from trufont.objects.defcon import NullNotifications, TFont
+from trufont.representationFactories.glyphDigestFactory import (
+    GlyphDigestFactory)
+from trufont.tools.ufoFileIndex import UFOFileIndex
+from unittest import mock
+import os
+import unittest
+
+registerRepresentationFactory(Glyph, "TruFont.Digest", GlyphDigestFactory)
+
+# far enough in the past that writes made by the tests change mtimes
+OLD_TIME = 1000000000
+
+
+def _ageFiles(path):
+    for root, _, fileNames in os.walk(path):
+        for fileName in fileNames:
+            os.utime(os.path.join(root, fileName), (OLD_TIME, OLD_TIME))
+
+
+class UFOFileIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = saveTestFont(self)
+        _ageFiles(self.path)
+        self.index = UFOFileIndex(self.path)
+
+    def test_noChanges(self):
+        self.assertIsNone(self.index.changes())
+
+    def test_paths(self):
+        paths = self.index.paths()
+        self.assertIn(self.path, paths)
+        self.assertIn(os.path.join(self.path, "fontinfo.plist"), paths)
+        self.assertIn(os.path.join(self.path, "glyphs"), paths)
+        self.assertIn(
+            os.path.join(self.path, "glyphs", "contents.plist"), paths)
+
+    def test_touchedMetadataIsNotAChange(self):
+        os.utime(os.path.join(self.path, "fontinfo.plist"))
+        self.assertIsNone(self.index.changes())
+
+    def test_touchedGlyphWithDigestIsNotAChange(self):
+        relPath = self.index.glyphPath("public.default", "A")
+        with open(os.path.join(self.path, relPath), "rb") as file:
+            data = file.read()
+        self.index.setDigest(relPath, data)
+        os.utime(os.path.join(self.path, relPath))
+        self.assertIsNone(self.index.changes())
+
+    def test_externalChanges(self):
+        font = Font(self.path)
+        font.info.familyName = "Other"
+        font["A"].width = 10
+        drawRect(font.newGlyph("D"), 0, 0, 10, 10)
+        del font["C"]
+        font.save()
+        changes = self.index.changes()
+        self.assertTrue(changes["info"])
+        self.assertFalse(changes["groups"])
+        self.assertFalse(changes["kerning"])
+        self.assertFalse(changes["features"])
+        layerChanges = changes["layers"]["public.default"]
+        self.assertEqual(layerChanges["modifiedGlyphs"], {"A"})
+        self.assertEqual(layerChanges["addedGlyphs"], {"D"})
+        self.assertEqual(layerChanges["deletedGlyphs"], {"C"})
+        # the rescan is the new reference
+        self.assertIsNone(self.index.changes())
+
+
+class FontFileIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = saveTestFont(self)
+        _ageFiles(self.path)
+        self.font = TFont(self.path, notificationBackend=NullNotifications())
+
+    def test_ownSavesAreNotChanges(self):
+        self.font["A"].width = 10
+        self.font.info.familyName = "Other"
+        self.font.save()
+        self.assertIsNone(self.font.fileIndex().changes())
+
+    def test_scannedOnFirstCheck(self):
+        with mock.patch.object(
+                UFOFileIndex, "_scan", autospec=True,
+                side_effect=UFOFileIndex._scan) as scan:
+            font = TFont(self.path, notificationBackend=NullNotifications())
+            index = font.fileIndex()
+            self.assertEqual(scan.call_count, 0)
+            self.assertEqual(
+                index.glyphPath("public.default", "A"),
+                os.path.join("glyphs", "A_.glif"))
+            self.assertIsNone(index.changes())
+            self.assertEqual(scan.call_count, 1)
+
+    def test_changesBeforeFirstCheck(self):
+        self.font["A"]
+        font = Font(self.path)
+        font["A"].width = 10
+        drawRect(font.newGlyph("D"), 0, 0, 10, 10)
+        del font["C"]
+        font.save()
+        changes = self.font.fileIndex().changes()
+        layerChanges = changes["layers"]["public.default"]
+        self.assertEqual(layerChanges["modifiedGlyphs"], {"A"})
+        self.assertEqual(layerChanges["addedGlyphs"], {"D"})
+        self.assertEqual(layerChanges["deletedGlyphs"], {"C"})
+
+    def test_saveUpdatesWrittenFiles(self):
+        index = self.font.fileIndex()
+        self.assertIsNone(index.changes())
+        self.font["A"].width = 10
+        del self.font["C"]
+        drawRect(self.font.newGlyph("D"), 0, 0, 10, 10)
+        with mock.patch.object(
+                UFOFileIndex, "updateFiles", autospec=True,
+                side_effect=UFOFileIndex.updateFiles) as updateFiles, \
+                mock.patch.object(UFOFileIndex, "_scan") as scan:
+            self.font.save()
+        self.assertEqual(scan.call_count, 0)
+        relPaths = updateFiles.call_args[0][1]
+        glyphPaths = {relPath for relPath in relPaths
+                      if relPath.endswith(".glif")}
+        self.assertEqual(glyphPaths, {
+            os.path.join("glyphs", fileName)
+            for fileName in ("A_.glif", "C_.glif", "D_.glif")})
+        self.assertIsNone(index.changes())
+        self.assertIsNone(index.glyphPath("public.default", "C"))
+
+    def test_reloadChanges(self):
+        glyph = self.font["A"]
+        self.font["B"]
+        font = Font(self.path)
+        font["A"].width = 10
+        font.kerning[("O", "A")] = -50
+        font.save()
+        changes = self.font.fileIndex().changes()
+        self.font.reloadChanges(changes)
+        self.assertIs(self.font["A"], glyph)
+        self.assertEqual(glyph.width, 10)
+        self.assertEqual(self.font["B"].width, 600)
+        self.assertEqual(self.font.kerning[("O", "A")], -50)
+        self.assertFalse(self.font.dirty)
+
+
+class ReloadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = saveTestFont(self)
+        _ageFiles(self.path)
+        self.font = TFont(self.path, notificationBackend=NullNotifications())
+
+    def test_unchangedGlyphsAreKept(self):
+        glyph = self.font["A"]
+        digest = glyph.getRepresentation("TruFont.Digest")
+        editedGlyph = self.font["B"]
+        editedGlyph.width = 10
+        changedGlyph = self.font["O"]
+        font = Font(self.path)
+        font["O"].width = 10
+        font.save()
+        self.font.reload()
+        self.assertIs(self.font["A"], glyph)
+        self.assertTrue(glyph.hasCachedRepresentation("TruFont.Digest"))
+        self.assertIs(glyph.getRepresentation("TruFont.Digest"), digest)
+        # glyphs changed on either side are read again, in place
+        self.assertIs(self.font["B"], editedGlyph)
+        self.assertEqual(editedGlyph.width, 600)
+        self.assertFalse(editedGlyph.dirty)
+        self.assertIs(self.font["O"], changedGlyph)
+        self.assertEqual(changedGlyph.width, 10)
+        self.assertFalse(self.font.dirty)
+
+    def test_deletedGlyphsAreDropped(self):
+        self.font["C"]
+        font = Font(self.path)
+        del font["C"]
+        del font["Aacute.alt"]
+        font.save()
+        drawRect(self.font.newGlyph("D"), 0, 0, 10, 10)
+        self.font.reload()
+        for glyphName in ("C", "Aacute.alt", "D"):
+            self.assertNotIn(glyphName, self.font)
+        self.assertIsNone(self.font.unicodeData.glyphNameForUnicode(0x43))
+        index = self.font.fileIndex()
+        self.assertIsNone(index.glyphPath("public.default", "C"))
+        self.assertIsNone(index.glyphPath("public.default", "Aacute.alt"))
+        self.assertIsNotNone(index.glyphPath("public.default", "A"))
+        self.assertIsNone(index.changes())
+
+    def test_deletedGlyphsComeBack(self):
+        glyph = self.font["B"]
+        del self.font["B"]
+        self.font.reload()
+        self.assertIn("B", self.font)
+        self.assertIsNot(self.font["B"], glyph)
+        self.assertEqual(self.font["B"].width, 600)
+        self.assertFalse(self.font.dirty)
+
+
+if __name__ == "__main__":
+    unittest.main()